@@ -0,0 +1,56 @@
+import json
+import time
+from datetime import datetime, timezone
+
+
+class AuditLog:
+    """log 테이블에 쓰는 내용을 모아 두었다가 커밋 시점(또는 일정 시간마다)에 한 번에 기록
+
+    각 항목은 event, 메시지, 관련 사용자 id, JSON payload, 소요 시간(ms)을 가진다.
+    retention_rows / retention_days 를 넘는 오래된 로그는 compact() 에서 삭제한다.
+    """
+
+    def __init__(self, flush_interval=5.0, retention_rows=10000, retention_days=365, compact_every=100):
+        self.flush_interval = flush_interval
+        self.retention_rows = retention_rows
+        self.retention_days = retention_days
+        self.compact_every = compact_every
+        self.buffer = list()
+        self.flush_count = 0
+        self.last_flush = time.monotonic()
+
+    def write(self, event, message, user_ids=(), payload=None, duration=None):
+        self.buffer.append((
+            message,
+            event,
+            ", ".join(map(str, user_ids)) if user_ids else None,
+            json.dumps(payload, ensure_ascii=False, default=str) if payload is not None else None,
+            round(duration * 1000, 3) if duration is not None else None,
+            datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        ))
+
+    def is_due(self):
+        return bool(self.buffer) and time.monotonic() - self.last_flush >= self.flush_interval
+
+    def discard(self, size):
+        # 롤백된 작업에서 쓴 로그는 버림
+        del self.buffer[size:]
+
+    def flush(self, cursor):
+        self.last_flush = time.monotonic()
+        if not self.buffer:
+            return 0
+
+        entries, self.buffer = self.buffer, list()
+        cursor.executemany("INSERT INTO log (text, event, user_ids, payload, duration_ms, created_at) "
+                           "VALUES (?, ?, ?, ?, ?, ?)", entries)
+        self.flush_count += 1
+        if self.flush_count % self.compact_every == 0:
+            self.compact(cursor)
+        return len(entries)
+
+    def compact(self, cursor):
+        if self.retention_rows:
+            cursor.execute("DELETE FROM log WHERE id <= (SELECT max(id) FROM log) - ?", (self.retention_rows,))
+        if self.retention_days:
+            cursor.execute("DELETE FROM log WHERE created_at < datetime('now', ?)", (f"-{self.retention_days} days",))
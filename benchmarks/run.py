@@ -0,0 +1,210 @@
+"""조편성/조회 성능 측정
+
+    python -m benchmarks.run --users 50 500 5000 50000 --years 1 10 --output bench_results.json
+    python -m benchmarks.run --users 500 --years 1 --compare bench_results.json
+
+사용자 수 x 이력 기간별로 합성 데이터(lunch_squad.dat 형식)를 만들고 각 작업의
+p50/p95 시간, 최대 메모리, 실행된 SQL 문 수를 JSON 으로 저장합니다.
+SQL 비용을 측정하도록 매번 history_cache 를 비우고 실행하며, SQL 문 수는 execute/executemany 호출 수입니다.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from config import Cache, load_settings
+from database import LunchSquadDB
+from engine import week_label
+
+BENCH_WEEK = "2030-01-07"
+
+
+def build_database(path, user_count, years, seed=0):
+    if os.path.exists(path):
+        return path
+
+    rng = random.Random(seed)
+    db = LunchSquadDB(path)
+    cursor = db.connect.cursor()
+    first_week = date(2030, 1, 7) - timedelta(weeks=52 * years)
+    cursor.executemany("INSERT INTO users (name, last_date, enable_date, priority) VALUES (?, ?, ?, ?)",
+                       [(f"user{x}", None, first_week.strftime("%Y-%m-%d"), rng.choice([1, 2, 3, 100]))
+                        for x in range(user_count)])
+    cursor.execute("select id, name from users")
+    users = cursor.fetchall()
+
+    team_number = Cache.team_member
+    for week in range(52 * years):
+        date_text = (first_week + timedelta(weeks=week)).strftime("%Y-%m-%d")
+        members = list(users)
+        rng.shuffle(members)
+        leaders = members[:team_number]
+        squads = [members[index::team_number] for index in range(team_number)]
+        cursor.execute("INSERT INTO team_history (date_label, date_text, team_data, leader_ids) VALUES (?, ?, ?, ?)",
+                       (week_label(date_text), date_text,
+                        json.dumps([[x[1] for x in squad] for squad in squads], ensure_ascii=False),
+                        ", ".join(str(x[0]) for x in leaders)))
+        history_id = cursor.lastrowid
+        db.insert_squad_leader(cursor, history_id, date_text, [x[0] for x in leaders])
+        db.insert_squad_member(cursor, history_id, [[x[0] for x in squad] for squad in squads],
+                               [x[0] for x in leaders])
+    db.commit()
+    db.close()
+    return path
+
+
+class CountingCursor(sqlite3.Cursor):
+    # executemany 는 행 수와 관계없이 한 번으로 셈
+    def execute(self, sql, parameters=()):
+        self.connection.statement_count += 1
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        self.connection.statement_count += 1
+        return super().executemany(sql, seq_of_parameters)
+
+
+class StatementCounter:
+    def __init__(self, connect):
+        # connect.execute() 도 cursor() 를 거치므로 (ProfiledConnection) cursor 만 바꾸면 모든 SQL 을 셈
+        self.connect = connect
+        connect.statement_count = 0
+        connect.cursor = lambda factory=None: sqlite3.Connection.cursor(connect, factory or CountingCursor)
+
+    @property
+    def count(self):
+        return self.connect.statement_count
+
+    @count.setter
+    def count(self, value):
+        self.connect.statement_count = value
+
+
+def measure(db, counter, operation, repeat, setup=None, teardown=None):
+    durations = list()
+    statements = 0
+    for _ in range(repeat):
+        if setup:
+            setup()
+        counter.count = 0
+        started = time.perf_counter()
+        operation()
+        durations.append(time.perf_counter() - started)
+        statements = counter.count
+        if teardown:
+            teardown()
+
+    # 메모리 측정은 tracemalloc 때문에 느려지므로 시간 측정과 따로 한 번 실행
+    if setup:
+        setup()
+    tracemalloc.start()
+    operation()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if teardown:
+        teardown()
+
+    durations.sort()
+    percentiles = statistics.quantiles(durations, n=100, method="inclusive") if len(durations) > 1 else durations * 99
+    return {
+        "runs": repeat,
+        "p50_ms": round(statistics.median(durations) * 1000, 3),
+        "p95_ms": round(percentiles[94] * 1000, 3),
+        "max_ms": round(durations[-1] * 1000, 3),
+        "peak_kb": round(peak / 1024, 1),
+        "statements": statements,
+    }
+
+
+def run_case(path, repeat):
+    db = LunchSquadDB(path)
+    counter = StatementCounter(db.connect)
+    date_label = week_label(BENCH_WEEK)
+
+    def delete_week():
+        db.delete_team_history(date_label)
+
+    operations = {
+        "select_users": lambda: db.select_users(),
+        "select_team_history": lambda: db.select_team_history(),
+        "select_team_history_week": lambda: db.select_team_history(date_label=date_label),
+        "generate_team": lambda: db.generate_team(BENCH_WEEK),
+        "insert_team_history": lambda: db.insert_team_history(date_label, BENCH_WEEK),
+    }
+    results = dict()
+    for name, operation in operations.items():
+        teardown = delete_week if name == "insert_team_history" else None
+        # 캐시에 있으면 SQL 을 실행하지 않으므로 매번 비움
+        results[name] = measure(db, counter, operation, repeat, setup=db.history_cache.clear, teardown=teardown)
+    db.connect.close()
+    return results
+
+
+def compare(results, baseline_path, threshold, min_ms):
+    with open(baseline_path, "r", encoding="utf-8") as file:
+        baseline = {(x["users"], x["years"], x["operation"]): x for x in json.load(file)["results"]}
+
+    regressions = list()
+    for x in results:
+        before = baseline.get((x["users"], x["years"], x["operation"]))
+        if not before or not before["p50_ms"]:
+            continue
+        ratio = x["p50_ms"] / before["p50_ms"]
+        print(f"{x['users']:>6} users {x['years']:>2}y {x['operation']:<26} "
+              f"{before['p50_ms']:>10.2f} -> {x['p50_ms']:>10.2f} ms ({ratio:.2f}x)")
+        if ratio > threshold and x["p50_ms"] - before["p50_ms"] > min_ms:
+            regressions.append(x)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks.run", description="조편성 성능 측정")
+    parser.add_argument("--users", type=int, nargs="+", default=[50, 500, 5000, 50000])
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workdir", default="./bench_data", help="합성 데이터 파일을 보관할 경로 (재사용)")
+    parser.add_argument("--settings", default="./settings.txt")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="이전 결과 파일과 p50 비교")
+    parser.add_argument("--threshold", type=float, default=1.2, help="이 배율보다 느려지면 실패로 처리")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="이 시간(ms) 이하의 차이는 무시")
+    args = parser.parse_args(argv)
+
+    load_settings(args.settings)
+    os.makedirs(args.workdir, exist_ok=True)
+
+    results = list()
+    for user_count in args.users:
+        for years in args.years:
+            path = os.path.join(args.workdir, f"lunch_squad_{user_count}u_{years}y.dat")
+            started = time.perf_counter()
+            build_database(path, user_count, years)
+            print(f"{user_count} users / {years} years: data ready ({time.perf_counter() - started:.1f}s)",
+                  file=sys.stderr)
+            for operation, result in run_case(path, args.repeat).items():
+                results.append({"users": user_count, "years": years, "operation": operation, **result})
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {"team_member": Cache.team_member, "leader_cycle": Cache.leader_cycle},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    print(f"saved: {args.output}", file=sys.stderr)
+
+    if args.compare and compare(results, args.compare, args.threshold, args.min_ms):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
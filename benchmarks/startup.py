@@ -0,0 +1,120 @@
+"""프로그램 시작 시간 측정 / 예산 검사
+
+    python -m benchmarks.startup --runs 5 --db lunch_squad.dat
+    python -m benchmarks.startup --exe dist/lunch_squad.exe --budget benchmarks/startup_budget.json
+
+lunch_squad 를 --profile-startup --quit-after-startup 으로 여러 번 실행하고 (화면 없이, QT_QPA_PLATFORM=offscreen)
+프로세스 전체 시간, 첫 화면까지의 시간, import 시간, 단계별 시간의 중앙값을 JSON 으로 저장합니다.
+예산(budget) 파일의 시간을 넘거나 첫 화면 전에 불러오면 안 되는 모듈이 불러와지면 실패(exit 1)로 처리합니다.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET = os.path.join(ROOT, "benchmarks", "startup_budget.json")
+
+
+def run_once(command, workdir, db_path=None, settings_path=None, show=False, timeout=120):
+    report_path = os.path.join(workdir, "startup_profile.json")
+    if db_path:
+        shutil.copyfile(db_path, os.path.join(workdir, "lunch_squad.dat"))
+    if settings_path and os.path.exists(settings_path):
+        shutil.copyfile(settings_path, os.path.join(workdir, "settings.txt"))
+
+    env = dict(os.environ, LUNCH_SQUAD_PROFILE=report_path)
+    if not show:
+        env["QT_QPA_PLATFORM"] = "offscreen"
+    started = time.perf_counter()
+    subprocess.run(command + ["--quit-after-startup"], cwd=workdir, env=env, check=True, timeout=timeout,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    process_ms = (time.perf_counter() - started) * 1000
+
+    with open(report_path, "r", encoding="utf-8") as file:
+        report = json.load(file)
+    marks = {x["name"]: x["at_ms"] for x in report["marks"]}
+    metrics = {
+        "process": process_ms,
+        "first_paint": marks.get("first_paint", report["total_ms"]),
+        "imports": report["import_total_ms"],
+    }
+    for x in report["phases"]:
+        metrics[x["name"]] = metrics.get(x["name"], 0) + x["duration_ms"]
+    return metrics, report
+
+
+def check_budget(summary, modules, budget):
+    failures = list()
+    for name, limit in budget.get("max_ms", {}).items():
+        if name in summary and summary[name] > limit:
+            failures.append(f"{name}: {summary[name]:.1f} ms > {limit} ms")
+    for name in budget.get("forbidden_imports", []):
+        loaded = sorted(x for x in modules if x == name or x.startswith(name + "."))
+        if loaded:
+            failures.append(f"첫 화면 전에 불러오면 안 되는 모듈: {', '.join(loaded[:5])}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks.startup", description="프로그램 시작 시간 측정")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--exe", help="PyInstaller/Nuitka 로 만든 실행 파일 (없으면 python lunch_squad.py)")
+    parser.add_argument("--db", help="측정에 사용할 lunch_squad.dat (없으면 빈 파일로 시작)")
+    parser.add_argument("--settings", default="./settings.txt")
+    parser.add_argument("--budget", default=DEFAULT_BUDGET, help="예산 파일 (빈 문자열이면 검사하지 않음)")
+    parser.add_argument("--output", default="startup_results.json")
+    parser.add_argument("--show", action="store_true", help="offscreen 대신 실제 화면에 표시")
+    args = parser.parse_args(argv)
+
+    command = [os.path.abspath(args.exe)] if args.exe else [sys.executable, os.path.join(ROOT, "lunch_squad.py")]
+    runs = list()
+    report = None
+    for index in range(args.runs):
+        with tempfile.TemporaryDirectory() as workdir:
+            metrics, report = run_once(command, workdir, db_path=args.db, settings_path=args.settings,
+                                       show=args.show)
+        runs.append(metrics)
+        print(f"run {index + 1}: first paint {metrics['first_paint']:.1f} ms, process {metrics['process']:.1f} ms",
+              file=sys.stderr)
+
+    names = list(dict.fromkeys(name for x in runs for name in x))
+    summary = {name: round(statistics.median(x.get(name, 0) for x in runs), 3) for name in names}
+    modules = [x["module"] for x in report["imports"]]
+
+    failures = list()
+    if args.budget:
+        with open(args.budget, "r", encoding="utf-8") as file:
+            failures = check_budget(summary, modules, json.load(file))
+
+    result = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "command": command,
+        "runs": args.runs,
+        "median_ms": summary,
+        "import_count": report["import_count"],
+        "slowest_imports": report["imports"][:20],
+        "budget_failures": failures,
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(result, file, ensure_ascii=False, indent=2)
+
+    for name, value in summary.items():
+        print(f"{name:<24} {value:>10.1f} ms")
+    print(f"saved: {args.output}", file=sys.stderr)
+    if failures:
+        print("\n".join(["시작 시간 예산을 넘었습니다."] + failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
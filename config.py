@@ -0,0 +1,55 @@
+from dataclasses import dataclass
+
+import yaml
+
+
+@dataclass
+class Cache:
+    team_member: int
+    leader_display_row: int
+    leader_cycle: int
+    pair_lookback: int
+    optimize_starts: int
+    optimize_budget: float
+    optimize_workers: int
+    objective_weights: dict
+    journal_mode: str
+    synchronous: str
+    log_flush_interval: float
+    log_retention_rows: int
+    log_retention_days: int
+    prefetch_tabs: bool
+    history_cache_size: int
+    query_stats: bool
+    slow_query_ms: float
+    new_leader_weight: float
+    server_token: str
+
+
+def load_settings(path="./settings.txt"):
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            data = yaml.safe_load(file) or {}
+    except FileNotFoundError:
+        data = {}
+
+    Cache.team_member = data.get("team_member", 4)
+    Cache.leader_display_row = data.get("leader_display_row", 3)
+    Cache.leader_cycle = data.get("leader_cycle", 3)
+    Cache.pair_lookback = data.get("pair_lookback", 12)
+    Cache.optimize_starts = data.get("optimize_starts", 0)
+    Cache.optimize_budget = data.get("optimize_budget", 2.0)
+    Cache.optimize_workers = data.get("optimize_workers", None)
+    Cache.objective_weights = data.get("objective_weights", None)
+    Cache.journal_mode = data.get("journal_mode", "WAL")
+    Cache.synchronous = data.get("synchronous", "NORMAL")
+    Cache.log_flush_interval = data.get("log_flush_interval", 5.0)
+    Cache.log_retention_rows = data.get("log_retention_rows", 10000)
+    Cache.log_retention_days = data.get("log_retention_days", 365)
+    Cache.prefetch_tabs = data.get("prefetch_tabs", False)
+    Cache.history_cache_size = data.get("history_cache_size", 256)
+    Cache.query_stats = data.get("query_stats", False)
+    Cache.slow_query_ms = data.get("slow_query_ms", 20.0)
+    Cache.new_leader_weight = data.get("new_leader_weight", 1.0)
+    Cache.server_token = data.get("server_token", None)
+    return data
@@ -2,52 +2,237 @@ import json
 import random
 import sqlite3
 import time
-from collections import defaultdict
+from contextlib import contextmanager, nullcontext
 from datetime import datetime, timedelta
-from itertools import zip_longest
+from pathlib import Path
 
-from utils import Cache
+from audit import AuditLog
+from config import Cache
+from engine import assign_squad, week_label, week_start
+from history_cache import HistoryCache
+from leaders import effective_weights
+from query_stats import ProfiledConnection, QueryStats
+from solver import RULE_APART, RULE_TYPES
 
+# optimizer(concurrent.futures), pairs(numpy) 는 조편성할 때만 필요하므로 시작 시간을 줄이기 위해 사용할 때 import
 
-def check_divide_members(squad, divide_members, user_order):
-    last_squad = list(squad[-1])
 
-    for index in range(len(squad)):
-        squad[index] = list(squad[index])
-        if len(set(squad[index]) & set(divide_members)) == len(divide_members):
-            squad[index].append(last_squad.pop(-1))
-            last_squad.append(squad[index].pop(squad[index].index(divide_members[1])))
-    squad[-1] = last_squad
+def parse_leader_ids(leader_ids_text):
+    return [int(x.strip()) for x in (leader_ids_text or "").split(",") if x.strip()]
 
-    for index in range(len(squad)):
-        squad[index][1:] = sorted(squad[index][1:], key=lambda _x: user_order.get(_x, 100))
+
+# 한 쿼리에 쓸 수 있는 ? 의 수 (SQLITE_MAX_VARIABLE_NUMBER, 3.32 이전 버전의 기본값)
+MAX_VARIABLES = 999
+
+
+def select_in(cursor, query, values):
+    """query 의 {} 를 (?, ?, ...) 로 바꿔 values 를 MAX_VARIABLES 개씩 나눠 조회하고 모든 행을 반환"""
+    rows = list()
+    for index in range(0, len(values), MAX_VARIABLES):
+        batch = values[index:index + MAX_VARIABLES]
+        cursor.execute(query.format(", ".join("?" * len(batch))), batch)
+        rows.extend(cursor.fetchall())
+    return rows
+
+
+# 그룹(부서)을 만들지 않고 사용하던 데이터는 모두 기본 그룹에 속함
+DEFAULT_GROUP_ID = 1
+DEFAULT_GROUP_NAME = "기본"
+
+# create_tables() 의 테이블/컬럼/인덱스를 바꾸면 1 증가 (PRAGMA user_version 이 같으면 스키마 확인을 생략)
+SCHEMA_VERSION = 4
+
+USER_ORDER_COLUMNS = {
+    "id": "a.id",
+    "name": "name",
+    "recent_date": "a.leader_date",
+    "priority": "priority",
+}
 
 
 class LunchSquadDB:
-    def __init__(self, db_name):
-        self.connect = sqlite3.connect(db_name)
-        self.create_tables()
-        self.team_number = Cache.team_member
+    def __init__(self, db_name, read_only=False, check_same_thread=True, profile_phase=None):
+        # read_only: 파일을 읽기 전용으로 열고 스키마 생성/변환을 하지 않음 (쓰기 연결이 먼저 연 파일을 동시에 읽을 때)
+        # check_same_thread=False: 연결을 만든 스레드가 아닌 곳에서 사용 (한 번에 한 스레드만 사용해야 함)
+        # profile_phase: 단계 이름을 받아 시간을 재는 context manager 를 반환 (프로그램은 startup_profile.phase)
+        phase = profile_phase or (lambda name: nullcontext())
+        self.db_name = db_name
+        self.read_only = read_only
+        if read_only:
+            self.connect = sqlite3.connect(f"{Path(db_name).resolve().as_uri()}?mode=ro", uri=True,
+                                           factory=ProfiledConnection, check_same_thread=check_same_thread)
+        else:
+            self.connect = sqlite3.connect(db_name, factory=ProfiledConnection, check_same_thread=check_same_thread)
+        if Cache.query_stats:
+            self.enable_query_stats()
+        self.transaction_depth = 0
+        self.transaction_log_size = 0
+        self.audit = AuditLog(flush_interval=Cache.log_flush_interval, retention_rows=Cache.log_retention_rows,
+                              retention_days=Cache.log_retention_days)
+        self.history_cache = HistoryCache(Cache.history_cache_size)
+        self.data_version = None
+        self.group_id = DEFAULT_GROUP_ID
+        if read_only:
+            self.check_schema()
+        else:
+            with phase("db_configure"):
+                self.configure_connection()
+            with phase("schema_check"):
+                self.create_tables()
+        self.team_number, self.leader_cycle = self.select_group_settings(self.group_id)
+        self.unsatisfied_rules = list()
+        self.pair_matrix = None
+        # 연 시점의 data_version 을 기록해 두어야 첫 refresh() 에서도 다른 연결의 커밋을 알 수 있음
+        self.refresh()
+
+    def configure_connection(self):
+        # WAL: 쓰는 동안에도 읽기가 막히지 않음, synchronous=NORMAL: 커밋마다 fsync 하지 않음 (WAL 에서는 안전)
+        # 네트워크 드라이브가 WAL(공유 메모리)을 지원하지 않으면 settings 의 journal_mode 를 DELETE 로 변경
+        self.connect.execute(f"PRAGMA journal_mode = {Cache.journal_mode}")
+        self.connect.execute(f"PRAGMA synchronous = {Cache.synchronous}")
+
+    def enable_query_stats(self, slow_ms=None):
+        """이후 실행하는 SQL 문별 통계를 모음 (slow_ms 이상 걸린 SQL 은 실행 계획도 저장)"""
+        if self.connect.stats is None:
+            self.connect.stats = QueryStats(Cache.slow_query_ms if slow_ms is None else slow_ms)
+        elif slow_ms is not None:
+            self.connect.stats.slow_ms = slow_ms
+        return self.connect.stats
+
+    def disable_query_stats(self):
+        stats, self.connect.stats = self.connect.stats, None
+        return stats
+
+    def query_stats(self):
+        return self.connect.stats
+
+    @contextmanager
+    def transaction(self):
+        """하나의 작업(조편성 생성, 복제, 가져오기, 삭제 등)을 하나의 커밋으로 묶습니다.
+
+        중첩해서 사용할 수 있으며 가장 바깥쪽 블록이 끝날 때 커밋, 예외가 발생하면 롤백합니다.
+        """
+        if self.transaction_depth == 0:
+            if not self.connect.in_transaction:
+                self.connect.execute("BEGIN IMMEDIATE")
+            self.transaction_log_size = len(self.audit.buffer)
+        self.transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self.transaction_depth -= 1
+            if self.transaction_depth == 0:
+                self.connect.rollback()
+                self.audit.discard(self.transaction_log_size)
+                # 롤백된 작업 중에 읽어 둔 이력이 남지 않도록 비움
+                self.history_cache.clear()
+            raise
+        self.transaction_depth -= 1
+        self.commit()
+
+    def commit(self):
+        # transaction() 안에서는 블록이 끝날 때 한 번만 커밋, 모아 둔 로그도 같은 커밋에 기록
+        if self.transaction_depth == 0:
+            cursor = self.connect.cursor()
+            self.audit.flush(cursor)
+            cursor.close()
+            self.connect.commit()
+
+    def flush_log(self, force=False):
+        # 타이머에서 호출: 작업 중이 아니고 기록할 로그가 오래 쌓였으면 기록
+        if self.transaction_depth == 0 and (force or self.audit.is_due()):
+            self.commit()
 
     def create_tables(self):
         cursor = self.connect.cursor()
+        cursor.execute("PRAGMA user_version")
+        if cursor.fetchone()[0] != SCHEMA_VERSION:
+            self.migrate_tables(cursor)
+        self.audit.compact(cursor)
+        self.logging_message("app_start", f"프로그램이 실행되었습니다.")
+        self.commit()
+
+    def check_schema(self):
+        # 읽기 전용 연결은 스키마를 바꿀 수 없으므로 현재 버전으로 변환된 파일만 엶
+        cursor = self.connect.cursor()
+        cursor.execute("PRAGMA user_version")
+        user_version = cursor.fetchone()[0]
+        cursor.close()
+        if user_version != SCHEMA_VERSION:
+            raise ValueError(f"데이터 파일을 쓰기 모드로 먼저 열어야 합니다. (스키마 버전: {user_version})")
+
+    def refresh(self):
+        """다른 연결(프로그램, 다른 프로세스)이 커밋했으면 읽어 둔 이력을 비움 (PRAGMA data_version)
+
+        변경이 있었으면 True 를 반환합니다. 자기 연결의 커밋은 각 메서드에서 이미 history_cache 에 반영합니다.
+        """
+        cursor = self.connect.cursor()
+        cursor.execute("PRAGMA data_version")
+        data_version = cursor.fetchone()[0]
+        cursor.close()
+        if data_version == self.data_version:
+            return False
+        if self.data_version is not None:
+            self.history_cache.clear()
+            self.pair_matrix = None
+        self.data_version = data_version
+        return True
+
+    def migrate_tables(self, cursor):
+        # 새 파일이거나 이전 버전에서 만든 파일일 때만 테이블 생성, 컬럼 추가, 이력 변환을 실행
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS users (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT NOT NULL,
                 last_date TEXT NULL,
                 enable_date TEXT NULL,
-                priority INTEGER NULL
+                priority INTEGER NULL,
+                group_id INTEGER NOT NULL DEFAULT 1,
+                leader_weight REAL NULL,
+                leader_date TEXT NULL
+            )
+        ''')
+        cursor.execute("PRAGMA table_info(users)")
+        user_columns = [x[1] for x in cursor.fetchall()]
+        if "group_id" not in user_columns:
+            cursor.execute(f"ALTER TABLE users ADD COLUMN group_id INTEGER NOT NULL DEFAULT {DEFAULT_GROUP_ID}")
+        if "leader_weight" not in user_columns:
+            # 조장 가중치 (NULL 은 1, 클수록 자주 / 작을수록 드물게 조장, 0 은 조장 제외)
+            cursor.execute("ALTER TABLE users ADD COLUMN leader_weight REAL NULL")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_name ON users (name)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_group ON users (group_id)")
+
+        # 그룹(부서)별로 조 수, 조장 주기를 따로 설정 (NULL 이면 settings 의 값을 사용)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS squad_group (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE,
+                team_member INTEGER NULL,
+                leader_cycle INTEGER NULL,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        cursor.execute("INSERT OR IGNORE INTO squad_group (id, name) VALUES (?, ?)",
+                       (DEFAULT_GROUP_ID, DEFAULT_GROUP_NAME))
 
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS log (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 text TEXT NOT NULL,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                event TEXT NULL,
+                user_ids TEXT NULL,
+                payload TEXT NULL,
+                duration_ms REAL NULL
             )
         ''')
+        cursor.execute("PRAGMA table_info(log)")
+        log_columns = [x[1] for x in cursor.fetchall()]
+        for column, column_type in (("event", "TEXT"), ("user_ids", "TEXT"), ("payload", "TEXT"),
+                                    ("duration_ms", "REAL")):
+            if column not in log_columns:
+                cursor.execute(f"ALTER TABLE log ADD COLUMN {column} {column_type} NULL")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_log_created_at ON log (created_at)")
 
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS team_history (
@@ -55,58 +240,258 @@ class LunchSquadDB:
                 date_label TEXT NOT NULL,
                 date_text TEXT NOT NULL,
                 team_data TEXT NOT NULL,
-                leader_ids TEXT NOT NULL
+                leader_ids TEXT NOT NULL,
+                seed INTEGER NULL,
+                group_id INTEGER NOT NULL DEFAULT 1
             )
         ''')
-        self.logging_message(cursor, message=f"프로그램이 실행되었습니다.")
-        self.connect.commit()
+        cursor.execute("PRAGMA table_info(team_history)")
+        history_columns = [x[1] for x in cursor.fetchall()]
+        if "seed" not in history_columns:
+            cursor.execute("ALTER TABLE team_history ADD COLUMN seed INTEGER NULL")
+        if "group_id" not in history_columns:
+            cursor.execute(f"ALTER TABLE team_history ADD COLUMN group_id INTEGER NOT NULL DEFAULT {DEFAULT_GROUP_ID}")
 
-    def initial_data(self, data, force=False):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS squad_leader (
+                history_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                date_text TEXT NOT NULL
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_squad_leader_user ON squad_leader (user_id, date_text)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_squad_leader_history ON squad_leader (history_id)")
+        # users.leader_date: 마지막 조장 날짜 (max(squad_leader.date_text)), 사용자 탭에서 정렬할 때 사용자마다 계산하지 않도록
+        if "leader_date" not in user_columns:
+            cursor.execute("ALTER TABLE users ADD COLUMN leader_date TEXT NULL")
+            cursor.execute("UPDATE users SET leader_date = "
+                           "(select max(date_text) from squad_leader where user_id = users.id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_group_leader_date ON users (group_id, leader_date, id)")
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_squad_leader_insert AFTER INSERT ON squad_leader BEGIN
+                UPDATE users SET leader_date = NEW.date_text
+                WHERE id = NEW.user_id AND (leader_date IS NULL OR leader_date < NEW.date_text);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_squad_leader_delete AFTER DELETE ON squad_leader BEGIN
+                UPDATE users SET leader_date = (select max(date_text) from squad_leader where user_id = OLD.user_id)
+                WHERE id = OLD.user_id;
+            END
+        ''')
+        # 이력을 먼저 가져온 뒤 같은 id 로 사용자를 추가하는 경우 (importer)
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_users_insert AFTER INSERT ON users BEGIN
+                UPDATE users SET leader_date = (select max(date_text) from squad_leader where user_id = NEW.id)
+                WHERE id = NEW.id;
+            END
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_team_history_date_text ON team_history (date_text)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_team_history_date_label ON team_history (date_label)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_team_history_group ON team_history (group_id, date_text)")
+        # date_label 조회도 모두 그룹으로 제한하므로 (그룹 안의 모든 주를 읽지 않도록)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_team_history_group_label "
+                       "ON team_history (group_id, date_label, date_text)")
+        self.backfill_squad_leader(cursor)
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS squad_member (
+                history_id INTEGER NOT NULL,
+                squad_no INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                is_leader INTEGER NOT NULL DEFAULT 0,
+                position INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_squad_member_history ON squad_member (history_id, squad_no)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_squad_member_user ON squad_member (user_id, history_id)")
+        self.backfill_squad_member(cursor)
+
+        cursor.execute("select 1 from sqlite_master where type = 'table' and name = 'squad_rule'")
+        exists_rule_table = cursor.fetchone()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS squad_rule (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                rule_type TEXT NOT NULL,
+                user_a INTEGER NOT NULL,
+                user_b INTEGER NOT NULL,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_squad_rule_user_a ON squad_rule (user_a)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_squad_rule_user_b ON squad_rule (user_b)")
+        if exists_rule_table is None:
+            # 기존에 코드로 고정되어 있던 '같은 조 금지' 규칙을 데이터로 옮김
+            cursor.execute("INSERT INTO squad_rule (rule_type, user_a, user_b) "
+                           "select ?, a.id, b.id from users a, users b where a.name = ? and b.name = ?",
+                           (RULE_APART, '김도윤', '이민우 팀장'))
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS export_state (
+                name TEXT PRIMARY KEY,
+                last_id INTEGER NOT NULL,
+                exported_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def backfill_squad_leader(self, cursor):
+        # 기존 leader_ids 문자열을 squad_leader 테이블로 옮김 (squad_leader 에 없는 이력만)
+        cursor.execute("select id, date_text, leader_ids from team_history "
+                       "where id not in (select history_id from squad_leader)")
+        histories = cursor.fetchall()
+        for history_id, date_text, leader_ids_text in histories:
+            self.insert_squad_leader(cursor, history_id, date_text, parse_leader_ids(leader_ids_text))
+        if histories:
+            self.logging_message("history_backfill", f"조장 이력이 변환되었습니다. ({len(histories)} 건)",
+                                 payload={"count": len(histories)})
+
+    def backfill_squad_member(self, cursor):
+        # 기존 team_data(이름 JSON)를 squad_member 테이블로 옮김 (그룹 안에서 이름이 겹치거나 없는 사용자는 제외)
+        cursor.execute("select id, team_data, leader_ids, group_id from team_history "
+                       "where id not in (select distinct history_id from squad_member)")
+        histories = cursor.fetchall()
+        if not histories:
+            return
+
+        name_ids = self.select_name_ids(cursor)
+        for history_id, team_data, leader_ids_text, group_id in histories:
+            self.insert_squad_member(cursor, history_id, self.squad_user_ids(name_ids, group_id, team_data),
+                                     parse_leader_ids(leader_ids_text))
+        self.logging_message("history_backfill", f"조편성 이력이 변환되었습니다. ({len(histories)} 건)",
+                             payload={"count": len(histories), "table": "squad_member"})
+
+    def select_name_ids(self, cursor):
+        # {(group_id, 이름): [id, ...]}
+        cursor.execute("select id, name, group_id from users")
+        name_ids = dict()
+        for user_id, name, group_id in cursor.fetchall():
+            name_ids.setdefault((group_id, name), []).append(user_id)
+        return name_ids
+
+    @staticmethod
+    def squad_user_ids(name_ids, group_id, team_data):
+        # team_data(이름 JSON)를 사용자 id 목록으로 (그룹 안에서 이름이 겹치거나 없으면 None)
+        return [[name_ids[(group_id, x)][0] if x and len(name_ids.get((group_id, x), ())) == 1 else None
+                 for x in squad] for squad in json.loads(team_data)]
+
+    def insert_squad_member(self, cursor, history_id, squads, leader_ids):
+        # squads: 화면에 표시하는 순서의 사용자 id 목록 (빈 칸은 None), squad_no 는 1 부터
+        leader_ids = set(leader_ids)
+        cursor.executemany("INSERT INTO squad_member (history_id, squad_no, user_id, is_leader, position) "
+                           "VALUES (?, ?, ?, ?, ?)",
+                           [(history_id, squad_no, user_id, int(user_id in leader_ids), position)
+                            for squad_no, squad in enumerate(squads, start=1)
+                            for position, user_id in enumerate(squad) if user_id is not None])
+
+    def insert_squad_leader(self, cursor, history_id, date_text, leader_ids):
+        cursor.executemany("INSERT INTO squad_leader (history_id, user_id, date_text) VALUES (?, ?, ?)",
+                           [(history_id, user_id, date_text) for user_id in leader_ids])
+
+    def select_groups(self):
         cursor = self.connect.cursor()
-        if force:
-            self.logging_message(cursor, message=f"데이터가 초기화 되었습니다.")
-            cursor.execute(f"delete from users")
+        cursor.execute("select id, name, team_member, leader_cycle from squad_group order by id")
+        groups = cursor.fetchall()
+        cursor.close()
+        return groups
 
-        cursor.execute(f"select 1 from users")
-        exists_user = cursor.fetchone()
+    def select_group_settings(self, group_id):
+        # (조 수, 조장 주기), 그룹에 설정하지 않은 값은 settings 의 값을 사용
+        cursor = self.connect.cursor()
+        cursor.execute("select team_member, leader_cycle from squad_group where id = ?", (group_id,))
+        group = cursor.fetchone()
+        cursor.close()
+        if group is None:
+            raise ValueError(f"그룹이 없습니다. ({group_id})")
+        team_member, leader_cycle = group
+        return team_member or Cache.team_member, leader_cycle or Cache.leader_cycle
 
-        if exists_user is None:
-            initial_users = list()
-            for name, init_data in data.items():
-                last_date, enable_date, fixed_squad = init_data
-                initial_users.append((name,
-                                      last_date or (datetime.now() - timedelta(days=datetime.now().weekday())).strftime(
-                                          "%Y-%m-%d"), enable_date, fixed_squad))
-            self.insert_users(initial_users)
+    def insert_group(self, name, team_member=None, leader_cycle=None):
+        cursor = self.connect.cursor()
+        cursor.execute("INSERT INTO squad_group (name, team_member, leader_cycle) VALUES (?, ?, ?)",
+                       (name, team_member, leader_cycle))
+        group_id = cursor.lastrowid
+        self.logging_message("group_insert", f"그룹이 추가되었습니다. ({name})",
+                             payload={"group_id": group_id, "team_member": team_member, "leader_cycle": leader_cycle})
+        self.commit()
         cursor.close()
+        return group_id
+
+    def update_group(self, group_id, **kwargs):
+        values = {x: y for x, y in kwargs.items() if x in ("name", "team_member", "leader_cycle")}
+        if not values:
+            return
+        cursor = self.connect.cursor()
+        cursor.execute(f"UPDATE squad_group SET {', '.join(f'{x} = ?' for x in values)} WHERE id = ?",
+                       list(values.values()) + [group_id])
+        self.logging_message("group_update", f"그룹 설정이 변경되었습니다. ({group_id})",
+                             payload=dict(values, group_id=group_id))
+        self.commit()
+        cursor.close()
+        if group_id == self.group_id:
+            self.team_number, self.leader_cycle = self.select_group_settings(group_id)
+
+    def use_group(self, group_id):
+        """이후의 사용자/조편성 조회와 생성을 group_id 그룹 기준으로 처리"""
+        self.team_number, self.leader_cycle = self.select_group_settings(group_id)
+        self.group_id = group_id
+        self.history_cache.clear()
+        self.pair_matrix = None
+
+    def initial_data(self, data, force=False):
+        with self.transaction():
+            cursor = self.connect.cursor()
+            if force:
+                self.logging_message("users_reset", f"데이터가 초기화 되었습니다.")
+                cursor.execute(f"delete from users where group_id = {self.group_id}")
+
+            cursor.execute(f"select 1 from users where group_id = {self.group_id}")
+            exists_user = cursor.fetchone()
+
+            if exists_user is None:
+                this_week_date = (datetime.now() - timedelta(days=datetime.now().weekday())).strftime("%Y-%m-%d")
+                initial_users = list()
+                for name, init_data in data.items():
+                    last_date, enable_date, fixed_squad = init_data
+                    initial_users.append((name, last_date or this_week_date, enable_date, fixed_squad))
+                self.insert_users(initial_users)
+            cursor.close()
 
     def select_users(self, enable_leader=None):
-        where_clause = ""
+        where_clause = f"where group_id = {self.group_id}"
         if enable_leader is not None:
-            where_clause = f"where enable_leader = {where_clause}"
+            where_clause = f"{where_clause} and enable_leader = {enable_leader}"
 
         cursor = self.connect.cursor()
         cursor.execute(f"select id, name, enable_date, "
-                       f"(select date_text from team_history "
-                       f"where leader_ids like '' || a.id ||',%' "
-                       f"or leader_ids like '%, ' || a.id || ',%' "
-                       f"or leader_ids like '%, ' || a.id || ''"
-                       f"order by date_text desc limit 1) as recent_date, "
+                       f"(select max(date_text) from squad_leader where user_id = a.id) as recent_date, "
                        f"priority "
                        f"from users a {where_clause} order by priority desc, enable_date, recent_date")
         users = cursor.fetchall()
         cursor.close()
         return users
 
+    def select_users_page(self, offset=0, limit=200, order_by=None, descending=False):
+        # 사용자 탭에서 화면에 필요한 만큼만 읽어옴 (정렬 컬럼은 USER_ORDER_COLUMNS 중 하나)
+        # recent_date 는 leader_date 컬럼을 읽으므로 정렬할 때 (group_id, leader_date, id) 인덱스를 사용
+        if order_by in USER_ORDER_COLUMNS:
+            direction = "desc" if descending else "asc"
+            order_clause = f"{USER_ORDER_COLUMNS[order_by]} {direction}, a.id {direction}"
+        else:
+            order_clause = "priority desc, enable_date, a.leader_date, a.id"
+
+        cursor = self.connect.cursor()
+        cursor.execute(f"select id, name, enable_date, leader_date as recent_date, priority "
+                       f"from users a where group_id = ? order by {order_clause} limit ? offset ?",
+                       (self.group_id, limit, offset))
+        users = cursor.fetchall()
+        cursor.close()
+        return users
+
     def select_user(self, user_id):
         cursor = self.connect.cursor()
         cursor.execute(f"select name, enable_date, "
-                       f"(select date_text from team_history "
-                       f"where leader_ids like '' || {user_id} ||',%' "
-                       f"or leader_ids like '%, ' || {user_id} || ',%' "
-                       f"or leader_ids like '%, ' || {user_id} || ''"
-                       f"order by date_text desc limit 1) as recent_date, "
-                       f"priority from users where id = {user_id}")
+                       f"(select max(date_text) from squad_leader where user_id = a.id) as recent_date, "
+                       f"priority, leader_weight from users a where id = {user_id}")
         users = cursor.fetchone()
         cursor.close()
         return users
@@ -114,43 +499,209 @@ class LunchSquadDB:
     def insert_users(self, users):
         cursor = self.connect.cursor()
         cursor.executemany(
-            'INSERT INTO users (name, last_date, enable_date, priority) VALUES (?, ?, ?, ?)', users)
-        self.connect.commit()
-        self.logging_message(cursor, message=f"사용자가 추가되었습니다 ({len(users)} 명)")
+            'INSERT INTO users (name, last_date, enable_date, priority, group_id) VALUES (?, ?, ?, ?, ?)',
+            [tuple(x) + (self.group_id,) for x in users])
+        self.logging_message("users_insert", f"사용자가 추가되었습니다 ({len(users)} 명)",
+                             payload={"count": len(users)})
+        self.commit()
         cursor.close()
 
+    def upsert_users(self, rows, default_last_date=None):
+        """사용자를 추가하거나 변경 (삭제하지 않으므로 조장 이력은 유지)
+
+        rows: (line_no, id, name, enable_date, last_date, priority, group_id, leader_weight) 목록
+        id 가 있는 사용자는 id 로 찾아서 이름까지 변경하고, id 가 없거나 없는 id 이면 group_id 그룹(None 이면 현재 그룹)
+        에서 이름으로 찾습니다. 비어 있는 값(None)은 기존 값을 유지합니다.
+        (추가한 수, 변경한 수, [(line_no, name, 오류 메시지), ...]) 를 반환합니다.
+        """
+        cursor = self.connect.cursor()
+        cursor.execute("select id from squad_group")
+        group_ids = {x[0] for x in cursor.fetchall()}
+        row_ids = [x[1] for x in rows if x[1] is not None]
+        user_ids = {x[0] for x in select_in(cursor, "select id from users where id in ({})", row_ids)}
+        names = [x[2] for x in rows]
+        name_ids = dict()
+        for user_id, name, group_id in select_in(cursor, "select id, name, group_id from users where name in ({})",
+                                                 names):
+            name_ids.setdefault((group_id, name), []).append(user_id)
+
+        inserts, updates, errors = list(), list(), list()
+        for line_no, user_id, name, enable_date, last_date, priority, group_id, leader_weight in rows:
+            if group_id is not None and group_id not in group_ids:
+                errors.append((line_no, name, f"그룹이 없습니다. ({group_id})"))
+                continue
+            if user_id in user_ids:
+                # group_id 가 없으면 (이전 형식의 파일) 기존 그룹을 유지
+                updates.append((name, enable_date, last_date, priority, group_id, leader_weight, user_id))
+                continue
+
+            group_id = self.group_id if group_id is None else group_id
+            matched_ids = name_ids.get((group_id, name), [])
+            if len(matched_ids) > 1:
+                errors.append((line_no, name, "같은 이름의 사용자가 여러 명이라 변경할 수 없습니다."))
+            elif matched_ids:
+                updates.append((name, enable_date, last_date, priority, group_id, leader_weight, matched_ids[0]))
+            elif enable_date is None:
+                errors.append((line_no, name, "새 사용자는 enable_date 가 필요합니다."))
+            else:
+                # 파일의 id 는 그대로 사용 (다른 DB 로 옮겨도 id 가 유지되도록)
+                inserts.append((user_id, name, last_date or default_last_date, enable_date, priority, group_id,
+                                leader_weight))
+
+        # id 를 지정한 사용자를 먼저 추가해야 자동으로 정해지는 id 와 겹치지 않음
+        inserts.sort(key=lambda x: x[0] is None)
+        cursor.executemany("INSERT INTO users (id, name, last_date, enable_date, priority, group_id, leader_weight) "
+                           "VALUES (?, ?, ?, ?, ?, ?, ?)", inserts)
+        cursor.executemany("UPDATE users SET name = ?, enable_date = coalesce(?, enable_date), "
+                           "last_date = coalesce(?, last_date), priority = coalesce(?, priority), "
+                           "group_id = coalesce(?, group_id), leader_weight = coalesce(?, leader_weight) WHERE id = ?",
+                           updates)
+        cursor.close()
+        return len(inserts), len(updates), errors
+
+    def insert_history_rows(self, rows):
+        """내보낸 조편성 이력을 추가 (importer 에서 사용, 같은 그룹에 같은 date_label 이 있으면 제외)
+
+        rows: (line_no, group_id, date_label, date_text, team_data, leader_ids, seed) 목록, group_id 가 None 이면 현재 그룹
+        squad_member 는 그룹 안의 이름으로 사용자를 찾아 만듭니다.
+        (추가한 수, [(line_no, date_label, 오류 메시지), ...]) 를 반환합니다.
+        """
+        cursor = self.connect.cursor()
+        cursor.execute("select id from squad_group")
+        group_ids = {x[0] for x in cursor.fetchall()}
+        labels = [x[2] for x in rows]
+        existing = set(select_in(cursor, "select group_id, date_label from team_history where date_label in ({})",
+                                 labels))
+        name_ids = self.select_name_ids(cursor)
+
+        inserted, errors = 0, list()
+        for line_no, group_id, date_label, date_text, team_data, leader_ids_text, seed in rows:
+            group_id = self.group_id if group_id is None else group_id
+            if group_id not in group_ids:
+                errors.append((line_no, date_label, f"그룹이 없습니다. ({group_id})"))
+                continue
+            if (group_id, date_label) in existing:
+                errors.append((line_no, date_label, "이미 같은 주의 조편성이 있습니다."))
+                continue
+            existing.add((group_id, date_label))
+            cursor.execute("INSERT INTO team_history (date_label, date_text, team_data, leader_ids, seed, group_id) "
+                           "VALUES (?, ?, ?, ?, ?, ?)",
+                           (date_label, date_text, team_data, leader_ids_text, seed, group_id))
+            history_id = cursor.lastrowid
+            leader_ids = parse_leader_ids(leader_ids_text)
+            self.insert_squad_leader(cursor, history_id, date_text, leader_ids)
+            self.insert_squad_member(cursor, history_id, self.squad_user_ids(name_ids, group_id, team_data),
+                                     leader_ids)
+            inserted += 1
+        if inserted:
+            self.history_cache.clear()
+        cursor.close()
+        return inserted, errors
+
+    def insert_log_rows(self, rows):
+        """내보낸 로그를 추가 (importer 에서 사용, duration_ms 외의 값이 모두 같은 로그가 있으면 제외)
+
+        rows: (line_no, created_at, event, text, user_ids, payload, duration_ms) 목록
+        (추가한 수, [(line_no, event, 오류 메시지), ...]) 를 반환합니다.
+        """
+        cursor = self.connect.cursor()
+        created = [x[1] for x in rows]
+        existing = set(select_in(cursor, "select created_at, event, text, user_ids, payload from log "
+                                         "where created_at in ({})", created))
+
+        inserts, errors = list(), list()
+        for line_no, created_at, event, text, user_ids, payload, duration_ms in rows:
+            if (created_at, event, text, user_ids, payload) in existing:
+                errors.append((line_no, event, "이미 같은 로그가 있습니다."))
+                continue
+            existing.add((created_at, event, text, user_ids, payload))
+            inserts.append((text, event, user_ids, payload, duration_ms, created_at))
+        cursor.executemany("INSERT INTO log (text, event, user_ids, payload, duration_ms, created_at) "
+                           "VALUES (?, ?, ?, ?, ?, ?)", inserts)
+        cursor.close()
+        return len(inserts), errors
+
     def update_user(self, user_ids, **kwargs):
         values = ", ".join([f"{x}={repr(y)}" for x, y in kwargs.items() if y is not None])
-        user_ids = ",".join(map(str, user_ids))
+        user_ids_text = ",".join(map(str, user_ids))
 
         cursor = self.connect.cursor()
-        cursor.execute(f"UPDATE users SET {values} WHERE id in ({user_ids})")
-        self.connect.commit()
-        self.logging_message(cursor, message=f"사용자 정보가 변경되었습니다. ({values})")
+        cursor.execute(f"UPDATE users SET {values} WHERE id in ({user_ids_text})")
+        self.logging_message("users_update", f"사용자 정보가 변경되었습니다. ({values})", user_ids=user_ids,
+                             payload={x: y for x, y in kwargs.items() if y is not None})
+        self.commit()
         cursor.close()
 
     def delete_user(self, user_id):
         cursor = self.connect.cursor()
         cursor.execute(f"delete from users where id = {user_id}")
-        self.logging_message(cursor, message=f"사용자 정보가 삭제되었습니다. ({user_id})")
-        self.connect.commit()
+        cursor.execute(f"delete from squad_rule where user_a = {user_id} or user_b = {user_id}")
+        self.logging_message("user_delete", f"사용자 정보가 삭제되었습니다. ({user_id})", user_ids=[user_id])
+        self.commit()
+        cursor.close()
+
+    def select_rules(self, group_id=None):
+        # 그룹의 사용자 사이의 규칙만 (사용자는 하나의 그룹에만 속함)
+        cursor = self.connect.cursor()
+        cursor.execute("select id, rule_type, user_a, user_b from squad_rule "
+                       "where user_a in (select id from users where group_id = ?) order by id",
+                       (self.group_id if group_id is None else group_id,))
+        rules = cursor.fetchall()
+        cursor.close()
+        return rules
+
+    def insert_rule(self, rule_type, user_a, user_b):
+        if rule_type not in RULE_TYPES:
+            raise ValueError(f"알 수 없는 규칙입니다. ({rule_type})")
+
+        cursor = self.connect.cursor()
+        cursor.execute("INSERT INTO squad_rule (rule_type, user_a, user_b) VALUES (?, ?, ?)",
+                       (rule_type, user_a, user_b))
+        rule_id = cursor.lastrowid
+        self.logging_message("rule_insert", f"조편성 규칙이 추가되었습니다. ({rule_type}: {user_a}, {user_b})",
+                             user_ids=[user_a, user_b], payload={"rule_id": rule_id, "rule_type": rule_type})
+        self.commit()
+        cursor.close()
+        return rule_id
+
+    def delete_rule(self, rule_id):
+        cursor = self.connect.cursor()
+        cursor.execute("delete from squad_rule where id = ?", (rule_id,))
+        self.logging_message("rule_delete", f"조편성 규칙이 삭제되었습니다. ({rule_id})", payload={"rule_id": rule_id})
+        self.commit()
         cursor.close()
 
     def select_team_history(self, date_text="", date_label=""):
+        # 한 주를 조회하는 경우는 history_cache 에서 먼저 찾음 (조편성이 없는 주도 보관)
+        if date_text or date_label:
+            return list(self.select_team_history_entry(date_text=date_text, date_label=date_label)["rows"])
+        return self.query_team_history()
+
+    def select_team_squads(self, date_text="", date_label=""):
+        """해당 주의 조편성 (team_data 를 변환한 목록, 없으면 None) - 반환된 목록은 수정하지 말 것"""
+        return HistoryCache.squads(self.select_team_history_entry(date_text=date_text, date_label=date_label))
+
+    def select_team_history_entry(self, date_text="", date_label=""):
+        key = (date_label, date_text)
+        entry = self.history_cache.get(key)
+        if entry is None:
+            entry = self.history_cache.put(key, self.query_team_history(date_text=date_text, date_label=date_label))
+        return entry
+
+    def query_team_history(self, date_text="", date_label=""):
         where_clauses = list()
         if date_label:
             where_clauses.append(f"date_label = '{date_label}'")
         if date_text:
             where_clauses.append(f"date_text = '{date_text}'")
 
-        where_clause = ""
         columns = []
         if where_clauses:
-            where_clause = " and ".join(where_clauses)
-            where_clause = f"where {where_clause}"
             columns = ["team_data", "leader_ids", "date_text"]
         else:
             columns = ["id", "date_label", "leader_ids", "date_text"]
+        where_clauses.append(f"group_id = {self.group_id}")
+        where_clause = f"where {' and '.join(where_clauses)}"
 
         cursor = self.connect.cursor()
         column = ",".join(columns)
@@ -160,114 +711,410 @@ class LunchSquadDB:
 
         return histories
 
-    def insert_team_history(self, date_label, date_text):
+    def insert_team_history(self, date_label, date_text, optimize=None, seed=None):
+        # seed 를 넘기면 해당 seed 로 편성했던 결과를 그대로 다시 만듦 (같은 사용자/이력 기준)
+        self.unsatisfied_rules = list()
         history = self.select_team_history(date_label=date_label)
         if history:
-            team = history[0]
-            return team, None, None
+            team_json_data, _, _ = history[0]
+            return team_json_data, None
+
+        if optimize is None:
+            optimize = Cache.optimize_starts > 1
+        started = time.perf_counter()
+        new_squad, leader_ids, self.unsatisfied_rules, seed = self.generate_team(date_text, optimize=optimize,
+                                                                                 seed=seed)
+        team_json_data = self.save_team_history(date_label, date_text, new_squad, leader_ids, self.unsatisfied_rules,
+                                                seed, self.group_id, payload={"optimize": optimize},
+                                                duration=time.perf_counter() - started)
+        self.commit()
+        return team_json_data, leader_ids
 
-        new_squad, leader_ids = self.generate_team(date_text)
+    def save_team_history(self, date_label, date_text, new_squad, leader_ids, unsatisfied, seed, group_id,
+                          payload=None, duration=None):
+        # new_squad: 사용자 id 목록 (조장이 첫 번째), 커밋은 호출한 쪽에서 처리
         for x in new_squad:
             leader = x.pop(0)
             x.insert(Cache.leader_display_row - 1, leader)
 
-        team_json_data = json.dumps(new_squad, ensure_ascii=False)
         cursor = self.connect.cursor()
+        # team_data 는 화면 표시용 (생성 당시의 이름), 조회/집계는 squad_member 를 사용
+        cursor.execute("select id, name from users where group_id = ?", (group_id,))
+        names = dict(cursor.fetchall())
+        team_json_data = json.dumps([[names.get(x) for x in squad] for squad in new_squad], ensure_ascii=False)
         leader_ids_text = ", ".join(map(str, leader_ids))
         cursor.execute(
-            f"INSERT INTO team_history (date_label, date_text, team_data, leader_ids) VALUES ('{date_label}', '{date_text}', '{team_json_data}', '{leader_ids_text}')")
-        self.logging_message(cursor, message=f"{date_label} 소통런치 조편성이 생성되었습니다.")
-        self.connect.commit()
+            "INSERT INTO team_history (date_label, date_text, team_data, leader_ids, seed, group_id) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (date_label, date_text, team_json_data, leader_ids_text, seed, group_id))
+        history_id = cursor.lastrowid
+        if group_id == self.group_id:
+            self.history_cache.invalidate(date_label=date_label, date_text=date_text)
+        self.insert_squad_leader(cursor, history_id, date_text, leader_ids)
+        self.insert_squad_member(cursor, history_id, new_squad, leader_ids)
+        self.logging_message("team_generate", f"{date_label} 소통런치 조편성이 생성되었습니다.", user_ids=leader_ids,
+                             payload=dict(payload or {}, date_label=date_label, date_text=date_text, seed=seed,
+                                          group_id=group_id), duration=duration)
+        if unsatisfied:
+            rule_ids = ", ".join(str(x[0]) for x in unsatisfied)
+            self.logging_message("team_unsatisfied", f"{date_label} 조편성 규칙을 만족하지 못했습니다. (규칙: {rule_ids})",
+                                 payload={"date_label": date_label, "rule_ids": [x[0] for x in unsatisfied],
+                                          "group_id": group_id})
         cursor.close()
-        return team_json_data, leader_ids
+        return team_json_data
+
+    def select_team_history_page(self, limit=100, before=None, date_from=None, date_to=None):
+        """date_text 최신순으로 limit 개씩 읽어옴 (keyset pagination)
+
+        before: 이전 페이지 마지막 행의 (date_text, id), date_from/date_to: date_text 범위 (포함)
+        """
+        where_clauses = ["group_id = ?"]
+        params = [self.group_id]
+        if before:
+            where_clauses.append("(date_text, id) < (?, ?)")
+            params.extend(before)
+        if date_from:
+            where_clauses.append("date_text >= ?")
+            params.append(date_from)
+        if date_to:
+            where_clauses.append("date_text <= ?")
+            params.append(date_to)
+        where_clause = f"where {' and '.join(where_clauses)}"
+
+        cursor = self.connect.cursor()
+        cursor.execute(f"select id, date_label, leader_ids, date_text from team_history {where_clause} "
+                       f"order by date_text desc, id desc limit ?", params + [limit])
+        histories = cursor.fetchall()
+        cursor.close()
+        return histories
+
+    def select_team_history_range(self, date_from, date_to):
+        """date_text 가 date_from ~ date_to (포함) 인 조편성을 날짜순으로 읽어옴"""
+        cursor = self.connect.cursor()
+        cursor.execute("select date_label, team_data, leader_ids, date_text from team_history "
+                       "where group_id = ? and date_text >= ? and date_text <= ? order by date_text, id",
+                       (self.group_id, date_from, date_to))
+        histories = cursor.fetchall()
+        cursor.close()
+        return histories
+
+    def prefetch_team_history(self, date_from, date_to):
+        """date_from ~ date_to 의 조편성을 한 번에 읽어서 history_cache 를 채움 (조편성이 없는 주도 포함)
+
+        조편성이 있는 주의 date_text 목록을 반환합니다.
+        """
+        return self.fill_history_cache(date_from, date_to, self.select_team_history_range(date_from, date_to))
+
+    def fill_history_cache(self, date_from, date_to, histories):
+        # histories: select_team_history_range() 의 결과 (다른 연결에서 읽은 결과도 가능)
+        for date_label, team_data, leader_ids, date_text in histories:
+            rows = [(team_data, leader_ids, date_text)]
+            self.history_cache.put((date_label, ""), rows)
+            self.history_cache.put(("", date_text), rows)
+
+        exists_weeks = {x[3] for x in histories}
+        exists_labels = {x[0] for x in histories}
+        monday = datetime.strptime(week_start(date_from), "%Y-%m-%d")
+        while monday.strftime("%Y-%m-%d") <= date_to:
+            date_text = monday.strftime("%Y-%m-%d")
+            if date_text not in exists_weeks:
+                self.history_cache.put(("", date_text), [])
+            if week_label(date_text) not in exists_labels:
+                self.history_cache.put((week_label(date_text), ""), [])
+            monday += timedelta(weeks=1)
+        return exists_weeks
+
+    def select_squad_members(self, date_text):
+        """해당 주의 조편성을 사용자 id 로 반환 (조 순서, 조 안에서는 표시 순서)"""
+        cursor = self.connect.cursor()
+        cursor.execute("select m.squad_no, m.user_id, m.is_leader from squad_member m "
+                       "join team_history h on h.id = m.history_id "
+                       "where h.group_id = ? and h.date_text = ? order by m.squad_no, m.position",
+                       (self.group_id, date_text))
+        members = cursor.fetchall()
+        cursor.close()
+        return members
+
+    def select_squad_mates(self, user_id, date_from=None, date_to=None):
+        """user_id 와 같은 조였던 사용자별 횟수 [(user_id, count), ...] (많은 순)"""
+        where_clauses = ["me.user_id = ?"]
+        params = [user_id]
+        if date_from:
+            where_clauses.append("h.date_text >= ?")
+            params.append(date_from)
+        if date_to:
+            where_clauses.append("h.date_text <= ?")
+            params.append(date_to)
+
+        cursor = self.connect.cursor()
+        cursor.execute(f"select mate.user_id, count(*) as together from squad_member me "
+                       f"join team_history h on h.id = me.history_id "
+                       f"join squad_member mate on mate.history_id = me.history_id and mate.squad_no = me.squad_no "
+                       f"and mate.user_id != me.user_id "
+                       f"where {' and '.join(where_clauses)} "
+                       f"group by mate.user_id order by together desc, mate.user_id", params)
+        mates = cursor.fetchall()
+        cursor.close()
+        return mates
+
+    def select_user_history(self, user_id, limit=100, before=None):
+        """user_id 가 참여한 조편성 [(date_label, date_text, squad_no, is_leader), ...] (최신순)
+
+        before: 이전 페이지 마지막 행의 date_text (keyset pagination)
+        """
+        where_clauses = ["m.user_id = ?", "h.group_id = ?"]
+        params = [user_id, self.group_id]
+        if before:
+            where_clauses.append("h.date_text < ?")
+            params.append(before)
+
+        cursor = self.connect.cursor()
+        cursor.execute(f"select h.date_label, h.date_text, m.squad_no, m.is_leader from squad_member m "
+                       f"join team_history h on h.id = m.history_id "
+                       f"where {' and '.join(where_clauses)} order by h.date_text desc limit ?", params + [limit])
+        histories = cursor.fetchall()
+        cursor.close()
+        return histories
+
+    def select_team_seed(self, date_label):
+        cursor = self.connect.cursor()
+        cursor.execute("select seed from team_history where group_id = ? and date_label = ?",
+                       (self.group_id, date_label))
+        seed = cursor.fetchone()
+        cursor.close()
+        return seed[0] if seed else None
 
     def clone_team_history(self, date_label, date_text, clone_data):
+        self.unsatisfied_rules = list()
         history = self.select_team_history(date_text=clone_data)
         if not history:
             return None, None
 
         team_json_data, leader_ids_text, _ = history[0]
         cursor = self.connect.cursor()
-        cursor.execute(
-            f"INSERT INTO team_history (date_label, date_text, team_data, leader_ids) VALUES ('{date_label}', '{date_text}', '{team_json_data}', '{leader_ids_text}')")
-        self.logging_message(cursor, message=f"{date_label} 소통런치 조편성이 복제되었습니다.")
-        self.connect.commit()
+        cursor.execute("INSERT INTO team_history (date_label, date_text, team_data, leader_ids, group_id) "
+                       "VALUES (?, ?, ?, ?, ?)",
+                       (date_label, date_text, team_json_data, leader_ids_text, self.group_id))
+        history_id = cursor.lastrowid
+        self.history_cache.invalidate(date_label=date_label, date_text=date_text)
+        self.insert_squad_leader(cursor, history_id, date_text, parse_leader_ids(leader_ids_text))
+        cursor.execute("INSERT INTO squad_member (history_id, squad_no, user_id, is_leader, position) "
+                       "select ?, squad_no, user_id, is_leader, position from squad_member "
+                       "where history_id = (select id from team_history where group_id = ? and date_text = ? "
+                       "order by id limit 1)", (history_id, self.group_id, clone_data))
+        self.logging_message("team_clone", f"{date_label} 소통런치 조편성이 복제되었습니다.",
+                             user_ids=parse_leader_ids(leader_ids_text),
+                             payload={"date_label": date_label, "date_text": date_text, "source": clone_data})
+        self.commit()
         cursor.close()
 
         return team_json_data, leader_ids_text
 
     def delete_team_history(self, date_label):
-        where_clause = f"where date_label = '{date_label}'"
+        where_clause = f"where date_label = '{date_label}' and group_id = {self.group_id}"
 
         cursor = self.connect.cursor()
+        cursor.execute(f"select date_text from team_history {where_clause}")
+        for date_text, in cursor.fetchall():
+            self.history_cache.invalidate(date_text=date_text)
+            if self.pair_matrix is not None:
+                self.pair_matrix.remove_week(date_text)
+        self.history_cache.invalidate(date_label=date_label)
+        cursor.execute(f"delete from squad_leader where history_id in (select id from team_history {where_clause})")
+        cursor.execute(f"delete from squad_member where history_id in (select id from team_history {where_clause})")
         cursor.execute(f"delete from team_history {where_clause}")
-        self.logging_message(cursor, message=f"{date_label} 소통런치 조편성이 삭제되었습니다.")
-        self.connect.commit()
+        self.logging_message("team_delete", f"{date_label} 소통런치 조편성이 삭제되었습니다.",
+                             payload={"date_label": date_label, "group_id": self.group_id})
+        self.commit()
         cursor.close()
 
-    def generate_team(self, date_text):
+    def select_pair_matrix(self, date_text, user_ids):
+        # date_text 이전 pair_lookback 주 동안 같은 조였던 횟수 (필요한 주만 추가/제거)
+        from pairs import MAX_USERS, PairMatrix
+
+        if not Cache.pair_lookback or len(user_ids) > MAX_USERS:
+            return None
+
+        if self.pair_matrix is None or self.pair_matrix.user_ids != list(user_ids):
+            self.pair_matrix = PairMatrix(user_ids)
+        return self.fill_pair_matrix(self.pair_matrix, date_text, self.group_id)
+
+    def fill_pair_matrix(self, pair_matrix, date_text, group_id):
+        # 그 주의 월요일 이전 pair_lookback 주 (월요일이 아닌 날짜를 넘겨도 그 주의 조편성은 포함하지 않음)
+        date_text = week_start(date_text)
+        start_date = (datetime.strptime(date_text, "%Y-%m-%d") -
+                      timedelta(weeks=Cache.pair_lookback)).strftime("%Y-%m-%d")
         cursor = self.connect.cursor()
+        cursor.execute("select date_text from team_history where group_id = ? and date_text >= ? and date_text < ?",
+                       (group_id, start_date, date_text))
+        window = {x[0] for x in cursor.fetchall()}
+
+        for week in set(pair_matrix.weeks) - window:
+            pair_matrix.remove_week(week)
+
+        missing = sorted(window - set(pair_matrix.weeks))
+        if missing:
+            cursor.execute(f"select h.date_text, m.squad_no, m.user_id from team_history h "
+                           f"join squad_member m on m.history_id = h.id "
+                           f"where h.group_id = ? and h.date_text in ({', '.join('?' * len(missing))}) "
+                           f"order by h.date_text, m.squad_no", [group_id] + missing)
+            weeks = {week: dict() for week in missing}
+            for week, squad_no, user_id in cursor.fetchall():
+                weeks[week].setdefault(squad_no, []).append(user_id)
+            for week, squads in weeks.items():
+                pair_matrix.add_week(week, list(squads.values()))
+        cursor.close()
+        return pair_matrix
 
-        cursor.execute(f"select a.id, name, enable_date, "
-                       f"(select date_text from team_history "
-                       f"where leader_ids like '' || a.id ||',%' "
-                       f"or leader_ids like '%, ' || a.id || ',%' "
-                       f"or leader_ids like '%, ' || a.id || ''"
-                       f"order by date_text desc limit 1) as recent_date, "
-                       f"priority from users a")
+    def select_generation_users(self, group_id, date_text=None):
+        # 조편성에 사용하는 (id, name, enable_date, recent_date, priority) 목록
+        # date_text 를 넘기면 recent_date 는 그 주 이전의 조장 이력만 사용 (나중 주가 있어도 seed 로 같은 조편성을 재현)
+        before = week_start(date_text) if date_text else "9999-12-31"
+        cursor = self.connect.cursor()
+        cursor.execute("select a.id, name, enable_date, "
+                       "(select max(date_text) from squad_leader "
+                       "where user_id = a.id and date_text < ?) as recent_date, "
+                       "priority from users a where group_id = ?", (before, group_id))
         users = cursor.fetchall()
         cursor.close()
-        order_by = {x[1]: x[-1] or 100 for x in users}
-
-        selected_date = datetime.strptime(date_text, "%Y-%m-%d")
-        this_week_date = (selected_date - timedelta(days=selected_date.weekday())).strftime("%Y-%m-%d")
-        candidate_date1 = (selected_date - timedelta(days=selected_date.weekday()) -
-                           timedelta(weeks=Cache.leader_cycle)).strftime("%Y-%m-%d")
-        candidate_date2 = (selected_date - timedelta(days=selected_date.weekday()) -
-                           timedelta(weeks=2)).strftime("%Y-%m-%d")
-
-        candidates1 = [(user_id, name, priority) for user_id, name, enable_date, last_date, priority in users
-                       if enable_date < this_week_date and (last_date is None or last_date <= candidate_date1)]
-        random.shuffle(candidates1)
-        candidates1 = candidates1[:self.team_number]
-
-        candidate1_leader_ids = [x[0] for x in candidates1]
-        candidates2 = [(user_id, name, priority) for user_id, name, enable_date, last_date, priority in users
-                       if enable_date < this_week_date and (last_date is None or last_date <= candidate_date2)
-                       and user_id not in candidate1_leader_ids]
-        random.shuffle(candidates2)
-        candidates = candidates1 + candidates2[:self.team_number - len(candidates1)]
-
-        candidate_leader_ids = [x[0] for x in candidates]
-        all_users = [(user_id, name, priority) for user_id, name, enable_date, last_date, priority in users
-                     if enable_date < this_week_date and user_id not in candidate_leader_ids]
-        random.shuffle(all_users)
-        candidates = list(set(candidates + all_users[:self.team_number - len(candidates)]))
-
-        team_leaders = random.sample(candidates, self.team_number)
-        team_leader_names = [(x[1], x[2]) for x in team_leaders]
-        random.shuffle(team_leader_names)
-        left_members = list(set([(name, priority) for _, name, _, _, priority in users]) -
-                            set(team_leader_names))
-
-        left_users = defaultdict(lambda: list())
-        ordered_priority = list()
-        left_member = list()
-        for x, _priority in left_members:
-            random.seed(time.time_ns())
-            left_users[_priority].append(x)
-            ordered_priority.append(_priority)
-            random.shuffle(left_users[_priority])
-        [left_member.extend(left_users[x]) for x in sorted(set(ordered_priority))]
-        team_leader_names = [x[0] for x in team_leader_names]
-
-        teams = [team_leader_names]
-        for index in range(0, len(left_member), Cache.team_member):
-            teams.append(left_member[index:index + Cache.team_member])
-
-        squad = list(zip_longest(*teams))
-        check_divide_members(squad, ['김도윤', '이민우 팀장'], order_by)
-        return squad, [x[0] for x in team_leaders]
-
-    def logging_message(self, cursor, message):
-        cursor.execute(f"INSERT INTO log (text) VALUES ({repr(message)})")
+        return users
+
+    def select_user_leader_weights(self, group_id):
+        # users.leader_weight 가 있는 사용자만 {user_id: 가중치}
+        cursor = self.connect.cursor()
+        cursor.execute("select id, leader_weight from users where group_id = ? and leader_weight is not null",
+                       (group_id,))
+        leader_weights = dict(cursor.fetchall())
+        cursor.close()
+        return leader_weights
+
+    def select_leader_weights(self, users, group_id):
+        # 조편성에 사용하는 조장 가중치 (한 번도 조장을 하지 않은 사용자는 settings 의 new_leader_weight 를 곱함)
+        return effective_weights(users, self.select_user_leader_weights(group_id), Cache.new_leader_weight)
+
+    def generate_team(self, date_text, optimize=False, seed=None):
+        # 조는 사용자 id 목록으로 반환 (각 조의 첫 번째가 조장)
+        users = self.select_generation_users(self.group_id, date_text)
+        leader_weights = self.select_leader_weights(users, self.group_id)
+        pair_matrix = self.select_pair_matrix(date_text, [x[0] for x in users])
+        if optimize and seed is None:
+            from optimizer import optimize_squad
+
+            squad, leader_ids, unsatisfied, seed, _ = optimize_squad(
+                users, date_text, self.team_number, self.leader_cycle, rules=self.select_rules(),
+                pair_matrix=pair_matrix, starts=max(Cache.optimize_starts, 1), time_budget=Cache.optimize_budget,
+                weights=Cache.objective_weights, workers=Cache.optimize_workers, leader_weights=leader_weights)
+            return squad, leader_ids, unsatisfied, seed
+
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 31)
+        squad, leader_ids, unsatisfied = assign_squad(users, date_text, self.team_number, self.leader_cycle,
+                                                      rules=self.select_rules(), pair_matrix=pair_matrix,
+                                                      rng=random.Random(seed), leader_weights=leader_weights)
+        return squad, leader_ids, unsatisfied, seed
+
+    def replay_team(self, date_text):
+        """저장된 seed 로 date_text 주의 조편성을 다시 계산 (저장된 조편성은 바꾸지 않음, 감사용)
+
+        (seed, 저장된 조, 다시 계산한 조) 를 반환하며 조는 사용자 id 목록입니다. (조장이 첫 번째, 표시 위치 설정과 무관)
+        seed 가 없는 주(복제, 이전 버전에서 만든 조편성)는 ValueError
+        """
+        date_text = week_start(date_text)
+        cursor = self.connect.cursor()
+        cursor.execute("select seed from team_history where group_id = ? and date_text = ? order by id limit 1",
+                       (self.group_id, date_text))
+        history = cursor.fetchone()
+        cursor.close()
+        if history is None or history[0] is None:
+            raise ValueError(f"{date_text} 조편성에 저장된 seed 가 없습니다.")
+
+        stored = dict()
+        for squad_no, user_id, is_leader in self.select_squad_members(date_text):
+            squad = stored.setdefault(squad_no, [])
+            if is_leader:
+                squad.insert(0, user_id)
+            else:
+                squad.append(user_id)
+        squads, _, _, _ = self.generate_team(date_text, seed=history[0])
+        return history[0], list(stored.values()), [[x for x in squad if x is not None] for squad in squads]
+
+    def insert_all_groups_history(self, date_text, workers=None):
+        """모든 그룹의 date_text 주 조편성을 한 번에 생성하고 하나의 커밋으로 저장
+
+        조편성이 없는 그룹만 생성하며, 그룹별 계산은 프로세스 풀에서 동시에 실행합니다.
+        {group_id: (team_json_data, leader_ids, unsatisfied_rules, seed, error)} 를 반환합니다.
+        이미 있던 그룹은 leader_ids 가 None, 편성하지 못한 그룹(조장 후보 부족 등)은 team_json_data 가 None 이고
+        error 에 이유가 있습니다. 나머지 그룹은 그대로 저장합니다.
+        """
+        from optimizer import generate_groups
+        from pairs import MAX_USERS, PairMatrix
+
+        date_text = week_start(date_text)
+        date_label = week_label(date_text)
+        started = time.perf_counter()
+
+        results = dict()
+        jobs = list()
+        cursor = self.connect.cursor()
+        for group_id, _, _, _ in self.select_groups():
+            cursor.execute("select team_data, seed from team_history where group_id = ? and date_label = ?",
+                           (group_id, date_label))
+            history = cursor.fetchone()
+            if history:
+                results[group_id] = (history[0], None, [], history[1], None)
+                continue
+
+            users = self.select_generation_users(group_id, date_text)
+            if not users:
+                continue
+            team_number, leader_cycle = self.select_group_settings(group_id)
+            pair_matrix = None
+            if Cache.pair_lookback and len(users) <= MAX_USERS:
+                pair_matrix = self.fill_pair_matrix(PairMatrix([x[0] for x in users]), date_text, group_id)
+            seed = random.SystemRandom().randrange(2 ** 31)
+            jobs.append((group_id, users, date_text, team_number, leader_cycle, self.select_rules(group_id),
+                         pair_matrix, seed, self.select_leader_weights(users, group_id)))
+        cursor.close()
+
+        with self.transaction():
+            failed = dict()
+            for group_id, seed, result, error in generate_groups(jobs, workers=workers):
+                if result is None:
+                    failed[group_id] = error
+                    results[group_id] = (None, None, [], seed, error)
+                    continue
+                squad, leader_ids, unsatisfied = result
+                team_json_data = self.save_team_history(date_label, date_text, squad, leader_ids, unsatisfied, seed,
+                                                        group_id, payload={"all_groups": True})
+                if leader_ids:
+                    self.update_user(leader_ids, last_date=date_text)
+                results[group_id] = (team_json_data, leader_ids, unsatisfied, seed, None)
+            if jobs:
+                self.logging_message("team_generate_groups", f"{date_label} 전체 그룹 조편성이 생성되었습니다.",
+                                     payload={"date_text": date_text, "failed": failed,
+                                              "groups": [x[0] for x in jobs if x[0] not in failed]},
+                                     duration=time.perf_counter() - started)
+        return results
+
+    def select_export_state(self, name):
+        # 마지막으로 내보낸 id (증분 내보내기)
+        cursor = self.connect.cursor()
+        cursor.execute("select last_id from export_state where name = ?", (name,))
+        state = cursor.fetchone()
+        cursor.close()
+        return state[0] if state else 0
+
+    def update_export_state(self, name, last_id):
+        cursor = self.connect.cursor()
+        cursor.execute("INSERT INTO export_state (name, last_id) VALUES (?, ?) "
+                       "ON CONFLICT (name) DO UPDATE SET last_id = excluded.last_id, exported_at = CURRENT_TIMESTAMP",
+                       (name, last_id))
+        self.commit()
+        cursor.close()
+
+    def logging_message(self, event, message, user_ids=(), payload=None, duration=None):
+        self.audit.write(event, message, user_ids=user_ids, payload=payload, duration=duration)
+
+    def close(self):
+        self.flush_log(force=True)
+        self.connect.close()
@@ -0,0 +1,85 @@
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+from itertools import zip_longest
+
+from leaders import LeaderQueue
+from solver import SquadSolver
+
+
+def week_start(date_text):
+    selected_date = datetime.strptime(date_text, "%Y-%m-%d")
+    return (selected_date - timedelta(days=selected_date.weekday())).strftime("%Y-%m-%d")
+
+
+def week_label(date_text):
+    # TeamCreationTab.get_week_number 와 같은 규칙 (월의 첫 번째 월요일부터 1주차)
+    selected_date = datetime.strptime(date_text, "%Y-%m-%d")
+    first_monday = selected_date.replace(day=1)
+    while first_monday.weekday() != 0:
+        first_monday += timedelta(days=1)
+
+    if first_monday > selected_date:
+        first_monday = (selected_date.replace(day=1) - timedelta(days=1)).replace(day=1)
+        while first_monday.weekday() != 0:
+            first_monday += timedelta(days=1)
+
+    week_number = (selected_date - first_monday).days // 7 + 1
+    return f"{first_monday.year}년 {first_monday.month}월 {week_number}주차"
+
+
+def assign_squad(users, date_text, team_number, leader_cycle, rules=(), pair_matrix=None, rng=None,
+                 leader_weights=None):
+    """users: (id, name, enable_date, recent_date, priority) 목록, rules: (id, rule_type, user_a, user_b) 목록
+
+    pair_matrix 가 있으면 최근에 같은 조였던 사용자끼리 다시 만나지 않도록 조원을 교환합니다.
+    rng(random.Random)를 넘기면 같은 입력에 대해 같은 결과를 만듭니다.
+    leader_weights({user_id: 가중치}) 가 있으면 조장 순서에 반영합니다. (leaders.LeaderQueue)
+
+    조 목록(id), 조장 id 목록, 만족하지 못한 규칙 목록을 반환합니다.
+    """
+    rng = rng or random.Random()
+    order_by = {x[0]: x[-1] or 100 for x in users}
+
+    # 순위(leader_cycle 주, 2 주 기준) 안에서 (기다린 주 x 가중치) 가 큰 사용자부터 조장을 고름
+    leader_queue = LeaderQueue.from_users(users, date_text, leader_cycle, leader_weights=leader_weights, rng=rng)
+    if len(leader_queue) < team_number:
+        raise ValueError(f"조장이 될 수 있는 사용자가 부족합니다. ({len(leader_queue)} < {team_number})")
+    team_leader_ids = leader_queue.pop(team_number)
+    rng.shuffle(team_leader_ids)
+    leader_id_set = set(team_leader_ids)
+    left_members = [(user_id, priority) for user_id, _, _, _, priority in users if user_id not in leader_id_set]
+
+    left_users = defaultdict(lambda: list())
+    left_member = list()
+    for x, _priority in left_members:
+        left_users[_priority].append(x)
+    for _priority in sorted(left_users):
+        rng.shuffle(left_users[_priority])
+        left_member.extend(left_users[_priority])
+
+    teams = [team_leader_ids]
+    for index in range(0, len(left_member), team_number):
+        teams.append(left_member[index:index + team_number])
+
+    squad = [list(x) for x in zip_longest(*teams)]
+    if pair_matrix is not None:
+        pair_matrix.improve(squad, priorities=order_by, rng=rng)
+    unsatisfied = SquadSolver(squad, rules, priorities=order_by, rng=rng).solve()
+
+    for x in squad:
+        x[1:] = sorted(x[1:], key=lambda _x: order_by.get(_x, 100))
+    return squad, list(team_leader_ids), unsatisfied
+
+
+def squad_names(squad, users):
+    names = {x[0]: x[1] for x in users}
+    return [[names.get(user_id) for user_id in x] for x in squad]
+
+
+def generate_squad(users, date_text, team_number, leader_cycle, rules=(), pair_matrix=None, rng=None,
+                   leader_weights=None):
+    """assign_squad 결과를 이름 목록으로 변환해서 반환합니다."""
+    squad, leader_ids, unsatisfied = assign_squad(users, date_text, team_number, leader_cycle, rules=rules,
+                                                  pair_matrix=pair_matrix, rng=rng, leader_weights=leader_weights)
+    return squad_names(squad, users), leader_ids, unsatisfied
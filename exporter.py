@@ -0,0 +1,132 @@
+"""사용자, 조편성 이력, 로그를 CSV / JSONL 로 내보내기
+
+커서에서 batch_size 개씩 읽어서 바로 파일에 쓰므로 이력이 많아도 메모리 사용량이 일정합니다.
+compress=True 이면 zstandard 로 압축 (.zst) 하고, 내보낸 파일은 importer 로 다시 가져올 수 있습니다.
+사용자는 현재 그룹만, 조편성 이력과 로그는 전체를 내보냅니다.
+incremental=True 이면 지난번에 내보낸 뒤 추가된 이력/로그만 내보냅니다. (export_state 테이블)
+"""
+import csv
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+from importer import open_text
+
+FORMATS = ("csv", "jsonl")
+
+# 테이블별 (조회 쿼리, 컬럼, 날짜 컬럼, 그룹 컬럼)
+EXPORT_TABLES = {
+    "users": (
+        "select id, name, enable_date, "
+        "coalesce((select max(date_text) from squad_leader where user_id = a.id), last_date) as last_date, "
+        "priority, group_id, leader_weight from users a",
+        ("id", "name", "enable_date", "last_date", "priority", "group_id", "leader_weight"),
+        None,
+        "group_id",
+    ),
+    "team_history": (
+        "select id, group_id, date_label, date_text, leader_ids, seed, team_data from team_history",
+        ("id", "group_id", "date_label", "date_text", "leader_ids", "seed", "team_data"),
+        "date_text",
+        None,
+    ),
+    "log": (
+        "select id, created_at, event, text, user_ids, payload, duration_ms from log",
+        ("id", "created_at", "event", "text", "user_ids", "payload", "duration_ms"),
+        "created_at",
+        None,
+    ),
+}
+
+
+def write_rows(file, file_format, columns, batches):
+    count = 0
+    if file_format == "csv":
+        writer = csv.writer(file)
+        writer.writerow(columns)
+        for rows in batches:
+            writer.writerows(rows)
+            count += len(rows)
+    else:
+        for rows in batches:
+            for row in rows:
+                data = dict(zip(columns, row))
+                if data.get("team_data") is not None:
+                    data["team_data"] = json.loads(data["team_data"])
+                file.write(json.dumps(data, ensure_ascii=False) + "\n")
+            count += len(rows)
+    return count
+
+
+def export_table(db, table, path, file_format="csv", date_from=None, date_to=None, incremental=False,
+                 batch_size=1000):
+    """table 을 path 로 내보내고 (행 수, 마지막 id) 를 반환합니다."""
+    query, columns, date_column, group_column = EXPORT_TABLES[table]
+    where_clauses = list()
+    params = list()
+    if group_column:
+        where_clauses.append(f"{group_column} = ?")
+        params.append(db.group_id)
+    if date_column and date_from:
+        where_clauses.append(f"{date_column} >= ?")
+        params.append(date_from)
+    if date_column and date_to:
+        # created_at 은 시간까지 있으므로 다음 날 0시 전까지
+        where_clauses.append(f"{date_column} < ?")
+        params.append((datetime.strptime(date_to, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d"))
+    if incremental:
+        where_clauses.append("id > ?")
+        params.append(db.select_export_state(table))
+    where_clause = f" where {' and '.join(where_clauses)}" if where_clauses else ""
+
+    cursor = db.connect.cursor()
+    cursor.execute(f"{query}{where_clause} order by id", params)
+    last_id = [None]
+
+    def batches():
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            last_id[0] = rows[-1][0]
+            yield rows
+
+    try:
+        with open_text(path, "w", newline="" if file_format == "csv" else None) as file:
+            count = write_rows(file, file_format, columns, batches())
+    finally:
+        cursor.close()
+    return count, last_id[0]
+
+
+def export_data(db, output_dir="./export", tables=("users", "team_history", "log"), file_format="csv",
+                compress=False, date_from=None, date_to=None, incremental=False, batch_size=1000):
+    """tables 를 output_dir 에 테이블별 파일로 내보내고 결과 목록을 반환합니다.
+
+    incremental 은 team_history 와 log 에만 적용됩니다. (사용자는 항상 전체)
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f"지원하지 않는 형식입니다. ({file_format})")
+    if incremental and (date_from or date_to):
+        # 기간 밖의 행은 id 가 작아도 건너뛰므로 마지막 id 를 기록하면 다음 증분에서 영영 빠짐
+        raise ValueError("증분 내보내기는 기간(--from, --to)과 함께 사용할 수 없습니다.")
+
+    started = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    current_time = str(int(datetime.now().timestamp() * 1000))
+    results = list()
+    for table in tables:
+        path = os.path.join(output_dir, f"{table}_{current_time}.{file_format}" + (".zst" if compress else ""))
+        table_incremental = incremental and table != "users"
+        count, last_id = export_table(db, table, path, file_format=file_format, date_from=date_from,
+                                      date_to=date_to, incremental=table_incremental, batch_size=batch_size)
+        if table_incremental and last_id is not None:
+            db.update_export_state(table, last_id)
+        results.append({"table": table, "path": path, "rows": count, "last_id": last_id})
+
+    db.logging_message("data_export", f"데이터를 내보냈습니다. ({', '.join(x['table'] for x in results)})",
+                       payload={"files": results, "incremental": incremental},
+                       duration=time.perf_counter() - started)
+    db.commit()
+    return results
@@ -0,0 +1,51 @@
+import json
+from collections import OrderedDict
+
+
+class HistoryCache:
+    """주(date_label 또는 date_text) 단위로 조편성 이력 조회 결과를 보관하는 LRU 캐시
+
+    조편성이 없는 주도 빈 결과로 보관하고 (negative cache), 이력을 쓰거나 지울 때
+    해당 주만 invalidate() 합니다. squads 는 처음 요청할 때 JSON 을 한 번만 변환해 둡니다.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, rows):
+        if self.maxsize <= 0:
+            return {"rows": rows}
+        entry = {"rows": rows}
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return entry
+
+    @staticmethod
+    def squads(entry):
+        # 변환한 목록을 같이 쓰므로 호출한 쪽에서 수정하면 안 됨
+        if "squads" not in entry:
+            entry["squads"] = json.loads(entry["rows"][0][0]) if entry["rows"] else None
+        return entry["squads"]
+
+    def invalidate(self, date_label=None, date_text=None):
+        # key 는 (date_label, date_text) 이고 둘 중 하나만 채워진 경우가 많으므로 둘 다 비교
+        keys = [x for x in self.entries if (date_label and x[0] == date_label) or (date_text and x[1] == date_text)]
+        for key in keys:
+            del self.entries[key]
+
+    def clear(self):
+        self.entries.clear()
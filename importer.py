@@ -0,0 +1,380 @@
+"""사용자 명단, 조편성 이력, 로그 가져오기 (YAML / CSV / JSONL)
+
+파일을 읽어 chunk_size 개씩 추가/변경합니다. id 가 있으면 id 로, 없으면 그룹 안의 이름으로 기존 사용자를 찾고
+(id 로 찾으면 이름도 변경), group_id 가 있으면 해당 그룹으로 가져옵니다. (없으면 현재 그룹)
+전체를 하나의 트랜잭션으로 처리하고 기존 사용자를 지우지 않으므로 조장 이력이 유지됩니다.
+파일은 한 줄(YAML 은 최상위 항목 하나)씩 읽지만, 파일 안의 중복을 찾기 위해 읽은 사용자의 id/이름은
+끝까지 메모리에 보관합니다. (사용자 수에 비례, 이력/로그는 보관하지 않음)
+
+    YAML (users.txt): 이름: ['enable_date', 'last_date', 출력그룹]
+    CSV: name,enable_date,last_date,priority[,id,group_id,leader_weight] (첫 줄은 헤더, exporter 의 users 파일)
+    JSONL: {"name": ..., "enable_date": ..., "last_date": ..., "priority": ..., "id": ..., "group_id": ...}
+
+조편성 이력(team_history)과 로그(log)는 exporter 로 내보낸 CSV / JSONL 파일을 추가만 합니다.
+이미 있는 이력(같은 그룹, 같은 date_label)과 로그(duration_ms 외의 값이 모두 같은 로그)는 제외합니다.
+
+파일 이름이 .zst 로 끝나면 zstandard 로 압축을 풀면서 읽습니다. (exporter 로 내보낸 파일)
+"""
+import csv
+import io
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import yaml
+
+from database import parse_leader_ids
+
+FORMATS = ("yaml", "csv", "jsonl")
+TABLES = ("users", "team_history", "log")
+YAML_COLUMNS = ("name", "enable_date", "last_date", "priority")
+
+
+class FileFormatError(ValueError):
+    """파일을 끝까지 읽을 수 없는 오류 (YAML 문법 오류 등), 그때까지 가져온 내용도 취소"""
+
+    def __init__(self, line_no, message):
+        super().__init__(message)
+        self.line_no = line_no
+
+
+class ImportReport:
+    def __init__(self, path):
+        self.path = path
+        self.total = 0
+        self.inserted = 0
+        self.updated = 0
+        self.errors = list()
+
+    def add_error(self, line_no, name, message):
+        self.errors.append((line_no, name, message))
+
+    def sorted_errors(self):
+        return sorted(self.errors, key=lambda x: x[0])
+
+    def as_dict(self):
+        return {
+            "path": self.path,
+            "total": self.total,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "skipped": len(self.errors),
+            "errors": [{"line": x[0], "name": x[1], "message": x[2]} for x in self.sorted_errors()],
+        }
+
+    def counts(self):
+        return f"전체 {self.total} 건: 추가 {self.inserted}, 변경 {self.updated}, 제외 {len(self.errors)}"
+
+    def summary(self, max_errors=10):
+        lines = [self.counts()]
+        lines.extend(f"{x[0]} 번째 줄 ({x[1]}): {x[2]}" for x in self.sorted_errors()[:max_errors])
+        if len(self.errors) > max_errors:
+            lines.append(f"... 외 {len(self.errors) - max_errors} 건")
+        return "\n".join(lines)
+
+
+def open_text(path, mode="r", newline=None):
+    """텍스트 파일을 열고, .zst 파일이면 zstandard 로 압축/해제하면서 읽고 씀 (zstandard 는 필요할 때만 import)"""
+    if not path.lower().endswith(".zst"):
+        return open(path, mode, encoding="utf-8", newline=newline)
+
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("압축 파일을 사용하려면 zstandard 패키지가 필요합니다. (pip install zstandard)") from None
+    raw = open(path, mode + "b")
+    if mode == "r":
+        stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    else:
+        stream = zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+    return io.TextIOWrapper(stream, encoding="utf-8", newline=newline)
+
+
+def detect_format(path):
+    if path.lower().endswith(".zst"):
+        path = path[:-4]
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    return "yaml"
+
+
+def compose_yaml_node(loader, event, events):
+    """event 부터 한 값(스칼라/리스트/매핑)의 이벤트만 읽어 노드로 만듦 (yaml.Composer 와 같은 태그 해석)"""
+    if isinstance(event, yaml.ScalarEvent):
+        tag = event.tag if event.tag not in (None, "!") else loader.resolve(yaml.ScalarNode, event.value,
+                                                                            event.implicit)
+        return yaml.ScalarNode(tag, event.value, event.start_mark, event.end_mark, style=event.style)
+    if isinstance(event, yaml.SequenceStartEvent):
+        tag = event.tag if event.tag not in (None, "!") else loader.resolve(yaml.SequenceNode, None, event.implicit)
+        items = list()
+        for child in events:
+            if isinstance(child, yaml.SequenceEndEvent):
+                return yaml.SequenceNode(tag, items, event.start_mark, child.end_mark, flow_style=event.flow_style)
+            items.append(compose_yaml_node(loader, child, events))
+    if isinstance(event, yaml.MappingStartEvent):
+        tag = event.tag if event.tag not in (None, "!") else loader.resolve(yaml.MappingNode, None, event.implicit)
+        pairs = list()
+        for child in events:
+            if isinstance(child, yaml.MappingEndEvent):
+                return yaml.MappingNode(tag, pairs, event.start_mark, child.end_mark, flow_style=event.flow_style)
+            pairs.append((compose_yaml_node(loader, child, events), compose_yaml_node(loader, next(events), events)))
+    # 앵커/별칭(&, *)은 앞의 노드를 모두 기억해야 하므로 지원하지 않음
+    raise yaml.MarkedYAMLError(problem="앵커/별칭은 사용할 수 없습니다.", problem_mark=event.start_mark)
+
+
+def read_yaml_rows(file):
+    # users.txt 는 하나의 YAML 문서 (flow/block 형식 모두 가능)
+    # 파일 전체의 노드를 만들지 않도록 yaml.parse 이벤트를 읽으면서 최상위 항목(이름: [...])을 하나씩 변환
+    loader = yaml.SafeLoader("")
+    events = yaml.parse(file, Loader=yaml.SafeLoader)
+    line_no = 1
+    try:
+        for event in events:
+            line_no = event.start_mark.line + 1
+            if isinstance(event, (yaml.StreamStartEvent, yaml.DocumentStartEvent)):
+                continue
+            if not isinstance(event, yaml.MappingStartEvent):
+                if not isinstance(event, (yaml.StreamEndEvent, yaml.DocumentEndEvent)):
+                    yield line_no, "'이름: [enable_date, last_date, 출력그룹]' 형식이 아닙니다."
+                return
+            break
+
+        for event in events:
+            line_no = event.start_mark.line + 1
+            if isinstance(event, yaml.MappingEndEvent):
+                return
+            key_node = compose_yaml_node(loader, event, events)
+            value_node = compose_yaml_node(loader, next(events), events)
+            try:
+                name = loader.construct_object(key_node, deep=True)
+                values = loader.construct_object(value_node, deep=True)
+            except yaml.YAMLError as e:
+                yield line_no, f"YAML 형식이 아닙니다. ({getattr(e, 'problem', None) or e})"
+                continue
+            finally:
+                # construct_object 는 만든 객체를 노드별로 기억하므로 항목마다 비움
+                loader.constructed_objects.clear()
+            values = list(values) if isinstance(values, (list, tuple)) else [values]
+            yield line_no, dict(zip(YAML_COLUMNS, [name] + values[:3]))
+    except yaml.YAMLError as e:
+        # 문법 오류 뒤의 항목은 읽을 수 없으므로 파일의 일부만 가져오지 않도록 앞의 항목까지 취소
+        mark = getattr(e, "problem_mark", None)
+        raise FileFormatError(mark.line + 1 if mark else line_no,
+                              f"YAML 형식이 아닙니다. ({getattr(e, 'problem', None) or e})") from e
+
+
+def read_rows(path, file_format=None):
+    """(줄 번호, {name, enable_date, last_date, priority, ...} 또는 오류 메시지) 를 한 줄씩 반환"""
+    file_format = file_format or detect_format(path)
+    with open_text(path, "r", newline="" if file_format == "csv" else None) as file:
+        if file_format == "csv":
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, row
+        elif file_format == "jsonl":
+            for line_no, line in enumerate(file, start=1):
+                if line.strip():
+                    try:
+                        yield line_no, json.loads(line)
+                    except ValueError as e:
+                        yield line_no, f"JSON 형식이 아닙니다. ({e})"
+        else:
+            yield from read_yaml_rows(file)
+
+
+def parse_date(value, column):
+    if value is None or value == "":
+        return None
+    value = str(value).strip()
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"{column} 는 YYYY-MM-DD 형식이어야 합니다. ({value})") from None
+    return value
+
+
+def parse_number(value, column, number_type=int):
+    if value is None or value == "":
+        return None
+    try:
+        return number_type(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{column} 는 숫자여야 합니다. ({value})") from None
+
+
+def validate_row(data):
+    """검증한 (id, name, enable_date, last_date, priority, group_id, leader_weight) 를 반환, 잘못된 값이면 ValueError
+
+    파일에 없는 컬럼은 None 입니다.
+    """
+    if not isinstance(data, dict):
+        raise ValueError(data if isinstance(data, str) else "형식이 잘못되었습니다.")
+
+    name = str(data.get("name") or "").strip()
+    if not name:
+        raise ValueError("이름이 없습니다.")
+
+    priority = parse_number(data.get("priority"), "priority")
+    enable_date = parse_date(data.get("enable_date"), "enable_date")
+    last_date = parse_date(data.get("last_date"), "last_date")
+    user_id = parse_number(data.get("id"), "id")
+    group_id = parse_number(data.get("group_id"), "group_id")
+    leader_weight = parse_number(data.get("leader_weight"), "leader_weight", float)
+    return user_id, name, enable_date, last_date, priority, group_id, leader_weight
+
+
+def import_users(db, path, file_format=None, chunk_size=500):
+    """path 의 사용자를 id (없으면 그룹 안의 이름) 기준으로 추가/변경하고 ImportReport 를 반환합니다."""
+    started = time.perf_counter()
+    report = ImportReport(path)
+    default_last_date = (datetime.now() - timedelta(days=datetime.now().weekday())).strftime("%Y-%m-%d")
+    seen_keys = set()
+
+    def flush(chunk):
+        inserted, updated, errors = db.upsert_users(chunk, default_last_date=default_last_date)
+        report.inserted += inserted
+        report.updated += updated
+        for error in errors:
+            report.add_error(*error)
+
+    try:
+        with db.transaction():
+            chunk = list()
+            for line_no, data in read_rows(path, file_format):
+                report.total += 1
+                try:
+                    row = validate_row(data)
+                except ValueError as e:
+                    report.add_error(line_no, data.get("name") if isinstance(data, dict) else None, str(e))
+                    continue
+                user_id, name, _, _, _, group_id, _ = row
+                # id 가 있으면 같은 id, 없으면 같은 그룹의 같은 이름이 두 번 나오면 제외
+                key = ("id", user_id) if user_id is not None else ("name", group_id or db.group_id, name)
+                if key in seen_keys:
+                    report.add_error(line_no, name,
+                                     f"파일 안에 같은 {'id' if user_id is not None else '이름'}가 있습니다.")
+                    continue
+                seen_keys.add(key)
+
+                chunk.append((line_no,) + row)
+                if len(chunk) >= chunk_size:
+                    flush(chunk)
+                    chunk = list()
+            if chunk:
+                flush(chunk)
+    except FileFormatError as e:
+        report = ImportReport(path)
+        report.total = 1
+        report.add_error(e.line_no, None, str(e))
+
+    db.logging_message("users_import", f"사용자를 가져왔습니다. ({report.counts()})",
+                       payload={"path": path, "total": report.total, "inserted": report.inserted,
+                                "updated": report.updated, "skipped": len(report.errors)},
+                       duration=time.perf_counter() - started)
+    return report
+
+
+def validate_history_row(data):
+    """검증한 (group_id, date_label, date_text, team_data, leader_ids, seed) 를 반환, 잘못된 값이면 ValueError"""
+    if not isinstance(data, dict):
+        raise ValueError(data if isinstance(data, str) else "형식이 잘못되었습니다.")
+
+    date_label = str(data.get("date_label") or "").strip()
+    if not date_label:
+        raise ValueError("date_label 이 없습니다.")
+    date_text = parse_date(data.get("date_text"), "date_text")
+    if date_text is None:
+        raise ValueError("date_text 가 없습니다.")
+
+    # CSV 는 JSON 문자열, JSONL 은 목록 (exporter 의 write_rows)
+    team_data = data.get("team_data")
+    try:
+        squads = json.loads(team_data) if isinstance(team_data, str) else team_data
+    except ValueError:
+        squads = None
+    if not isinstance(squads, list) or not all(isinstance(x, list) for x in squads):
+        raise ValueError("team_data 는 조별 이름 목록(JSON)이어야 합니다.")
+
+    leader_ids_text = "" if data.get("leader_ids") is None else str(data.get("leader_ids"))
+    try:
+        parse_leader_ids(leader_ids_text)
+    except ValueError:
+        raise ValueError(f"leader_ids 는 쉼표로 구분한 숫자여야 합니다. ({leader_ids_text})") from None
+
+    group_id = parse_number(data.get("group_id"), "group_id")
+    seed = parse_number(data.get("seed"), "seed")
+    return group_id, date_label, date_text, json.dumps(squads, ensure_ascii=False), leader_ids_text, seed
+
+
+def validate_log_row(data):
+    """검증한 (created_at, event, text, user_ids, payload, duration_ms) 를 반환, 잘못된 값이면 ValueError"""
+    if not isinstance(data, dict):
+        raise ValueError(data if isinstance(data, str) else "형식이 잘못되었습니다.")
+
+    created_at = str(data.get("created_at") or "").strip()
+    try:
+        datetime.strptime(created_at[:10], "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"created_at 은 YYYY-MM-DD HH:MM:SS 형식이어야 합니다. ({created_at})") from None
+    text = data.get("text")
+    if not text:
+        raise ValueError("text 가 없습니다.")
+
+    # CSV 에서는 빈 값이 "" 이므로 None 으로
+    event, user_ids, payload = (data.get(x) or None for x in ("event", "user_ids", "payload"))
+    if isinstance(payload, (dict, list)):
+        payload = json.dumps(payload, ensure_ascii=False)
+    duration_ms = parse_number(data.get("duration_ms"), "duration_ms", float)
+    return created_at, event, text, user_ids, payload, duration_ms
+
+
+# table: (검증 함수, DB 에 추가하는 함수 이름, 오류에 표시할 컬럼, 로그 메시지)
+IMPORT_TABLES = {
+    "team_history": (validate_history_row, "insert_history_rows", "date_label", "조편성 이력을 가져왔습니다."),
+    "log": (validate_log_row, "insert_log_rows", "event", "로그를 가져왔습니다."),
+}
+
+
+def import_table(db, table, path, file_format=None, chunk_size=500):
+    """exporter 로 내보낸 team_history / log 파일을 추가하고 ImportReport 를 반환합니다. (users 는 import_users)"""
+    if table == "users":
+        return import_users(db, path, file_format=file_format, chunk_size=chunk_size)
+    validate, insert_name, label_column, message = IMPORT_TABLES[table]
+    file_format = file_format or detect_format(path)
+    if file_format == "yaml":
+        raise ValueError(f"{table} 는 CSV 또는 JSONL 파일만 가져올 수 있습니다.")
+
+    started = time.perf_counter()
+    report = ImportReport(path)
+
+    def flush(chunk):
+        inserted, errors = getattr(db, insert_name)(chunk)
+        report.inserted += inserted
+        for error in errors:
+            report.add_error(*error)
+
+    with db.transaction():
+        chunk = list()
+        for line_no, data in read_rows(path, file_format):
+            report.total += 1
+            try:
+                row = validate(data)
+            except ValueError as e:
+                report.add_error(line_no, data.get(label_column) if isinstance(data, dict) else None, str(e))
+                continue
+            chunk.append((line_no,) + row)
+            if len(chunk) >= chunk_size:
+                flush(chunk)
+                chunk = list()
+        if chunk:
+            flush(chunk)
+
+        db.logging_message(f"{table}_import", f"{message[:-1]} ({report.counts()})",
+                           payload={"path": path, "total": report.total, "inserted": report.inserted,
+                                    "skipped": len(report.errors)},
+                           duration=time.perf_counter() - started)
+    return report
@@ -0,0 +1,74 @@
+import heapq
+import random
+from datetime import date, datetime, timedelta
+
+# 가중치가 없는 사용자 (users.leader_weight 가 NULL)
+DEFAULT_WEIGHT = 1.0
+
+
+def weighted_wait(recent_date, this_week, weight):
+    """마지막 조장 이후 지난 주 수 x 가중치 (한 번도 안 했으면 None), this_week 는 해당 주 월요일(date)"""
+    if not recent_date:
+        return None
+    return (this_week - date.fromisoformat(recent_date[:10])).days / 7 * weight
+
+
+def leader_tier(wait, leader_cycle):
+    """0: leader_cycle 주 이상 기다림 (또는 한 번도 안 함), 1: 2 주 이상, 2: 나머지"""
+    if wait is None or wait >= leader_cycle:
+        return 0
+    return 1 if wait >= 2 else 2
+
+
+def effective_weights(users, leader_weights=None, new_leader_weight=1.0):
+    """사용자별 가중치에 한 번도 조장을 하지 않은 사용자의 가중치(new_leader_weight)를 곱함"""
+    leader_weights = leader_weights or {}
+    return {x[0]: leader_weights.get(x[0], DEFAULT_WEIGHT) * (new_leader_weight if not x[3] else 1.0)
+            for x in users}
+
+
+class LeaderQueue:
+    """조장 후보 우선순위 큐
+
+    (순위, -기다린 주 x 가중치, 가중치 난수 키) 가 작은 사용자부터 꺼냅니다. 순위(assign_squad 의 1/2/3 순위와
+    같은 기준)는 상한으로만 사용하고, 같은 순위 안에서는 마지막 조장 이후 (한 번도 안 했으면 조장 가능해진 뒤)
+    오래 기다린 사용자부터 고릅니다. 기다린 주가 같으면 rate = 가중치 인 지수 분포 난수로 가중치에 비례해 고릅니다.
+    (가중치 2 는 같은 주를 기다려도 2 배로 계산, 0 은 조장 제외)
+    heapify O(n) 후 k 명을 꺼내는 데 O(k log n) 입니다.
+    """
+
+    def __init__(self, rng=None):
+        self.rng = rng or random.Random()
+        self.heap = list()
+
+    @classmethod
+    def from_users(cls, users, date_text, leader_cycle, leader_weights=None, rng=None):
+        """users: (id, name, enable_date, recent_date, priority) 목록, leader_weights: {user_id: 가중치}"""
+        queue = cls(rng)
+        selected_date = datetime.strptime(date_text, "%Y-%m-%d").date()
+        this_week = selected_date - timedelta(days=selected_date.weekday())
+        this_week_date = this_week.isoformat()
+        leader_weights = leader_weights or {}
+        expovariate = queue.rng.expovariate
+        # 같은 주에 조장을 한 사용자가 많으므로 날짜별로 기다린 주를 한 번만 계산
+        waits = dict()
+
+        for user_id, _, enable_date, recent_date, _ in users:
+            weight = leader_weights.get(user_id, DEFAULT_WEIGHT)
+            if enable_date >= this_week_date or weight <= 0:
+                continue
+            since = recent_date or enable_date
+            wait = waits.get(since)
+            if wait is None:
+                wait = waits[since] = weighted_wait(since, this_week, 1.0)
+            wait *= weight
+            tier = leader_tier(wait if recent_date else None, leader_cycle)
+            queue.heap.append((tier, -wait, expovariate(weight), user_id))
+        heapq.heapify(queue.heap)
+        return queue
+
+    def pop(self, count):
+        return [heapq.heappop(self.heap)[3] for _ in range(min(count, len(self.heap)))]
+
+    def __len__(self):
+        return len(self.heap)
@@ -1,17 +1,26 @@
+import multiprocessing
 import os
-import os
-import shutil
 import sys
 from datetime import datetime
 
-import yaml
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QTabWidget, QWidget, QVBoxLayout, QAction)
+import startup_profile
+
+# 시작 시간 측정은 다른 모듈을 불러오기 전에 시작해야 함 (LUNCH_SQUAD_PROFILE 또는 --profile-startup)
+if __name__ == '__main__':
+    sys.argv = startup_profile.start()
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QTabWidget, QWidget, QVBoxLayout, QAction, QComboBox,
+                             QHBoxLayout, QLabel)
 
+from config import Cache, load_settings
 from database import LunchSquadDB
-from tabs.squad_settings import SquadSettingsTab
+from tabs.lazy_tab import LazyTab
 from tabs.team_creation import TeamCreationTab
-from tabs.user_settings import UserSettingsTab
-from utils import show_dialog, Cache
+from utils import show_dialog
+
+# 첫 화면에 필요 없는 모듈(exporter, importer, 나머지 탭)은 사용할 때 import
+startup_profile.mark("imports")
 
 
 class MainWindow(QMainWindow):
@@ -39,63 +48,163 @@ class MainWindow(QMainWindow):
         import_action = QAction("사용자 가져오기", self)
         import_action.triggered.connect(self.import_users)  # 연결된 동작
 
+        # "전체 그룹 조편성" 액션 추가
+        generate_groups_action = QAction("전체 그룹 이번 주 조편성", self)
+        generate_groups_action.triggered.connect(self.generate_all_groups)
+
         # 파일 메뉴에 액션 추가
         file_menu.addAction(export_action)
         file_menu.addAction(import_action)
+        file_menu.addAction(generate_groups_action)
+
+        # "Debug" 메뉴: SQL 문별 실행 통계 (settings 의 query_stats 가 꺼져 있으면 창에서 켬)
+        debug_menu = menu_bar.addMenu("Debug")
+        query_stats_action = QAction("쿼리 통계", self)
+        query_stats_action.triggered.connect(self.show_query_stats)
+        debug_menu.addAction(query_stats_action)
 
         # 상단에 탭 위젯 추가
         self.tabs = QTabWidget(self)
         self.widget.setLayout(QVBoxLayout())
-        self.widget.layout().addWidget(self.tabs)
 
-        try:
-            with open("./settings.txt", "r", encoding="utf-8") as file:
-                data = yaml.safe_load(file)
-        except FileNotFoundError:
-            data = {}
-
-        Cache.team_member = data.get("team_member", 4)
-        Cache.leader_display_row = data.get("leader_display_row", 3)
-        Cache.leader_cycle = data.get("leader_cycle", 3)
+        with startup_profile.phase("settings"):
+            load_settings("./settings.txt")
 
         running_db = "lunch_squad.dat"
-        self.db = LunchSquadDB(running_db)
+        with startup_profile.phase("db_open"):
+            self.db = LunchSquadDB(running_db, profile_phase=startup_profile.phase)
+
+        # 그룹(부서) 선택 (그룹이 하나뿐이면 숨김)
+        self.group_layout = QHBoxLayout()
+        self.group_label = QLabel("그룹")
+        self.group_combo = QComboBox()
+        for group_id, name, _, _ in self.db.select_groups():
+            self.group_combo.addItem(name, group_id)
+        self.group_combo.currentIndexChanged.connect(self.on_group_changed)
+        self.group_layout.addWidget(self.group_label)
+        self.group_layout.addWidget(self.group_combo)
+        self.group_layout.addStretch()
+        self.group_label.setVisible(self.group_combo.count() > 1)
+        self.group_combo.setVisible(self.group_combo.count() > 1)
+        self.widget.layout().addLayout(self.group_layout)
+        self.widget.layout().addWidget(self.tabs)
 
-        # 탭 추가
-        self.tab1 = TeamCreationTab(self.db)
-        self.tab2 = UserSettingsTab(self.db)
-        self.tab3 = SquadSettingsTab(self.db)
+        # 모아 둔 로그를 주기적으로 기록
+        self.log_timer = QTimer(self)
+        self.log_timer.timeout.connect(self.db.flush_log)
+        self.log_timer.start(int(Cache.log_flush_interval * 1000))
+
+        # 탭 추가 (각 탭은 처음 선택될 때 만들어짐)
+        self.tab1 = LazyTab(lambda: TeamCreationTab(self.db))
+        self.tab2 = LazyTab(self.create_user_settings_tab)
+        self.tab3 = LazyTab(self.create_squad_settings_tab)
         self.tabs.addTab(self.tab1, "소통런치 조편성")
         self.tabs.addTab(self.tab2, "사용자 설정")
         self.tabs.addTab(self.tab3, "조편성 설정")
+        self.tabs.currentChanged.connect(self.on_tab_changed)
+        with startup_profile.phase("tab:소통런치 조편성"):
+            self.tab1.load()
         self.setWindowTitle("소통런치 조편성 프로그램")
+        self.painted = False
+
+    def create_user_settings_tab(self):
+        from tabs.user_settings import UserSettingsTab
+        return UserSettingsTab(self.db)
+
+    def create_squad_settings_tab(self):
+        from tabs.squad_settings import SquadSettingsTab
+        return SquadSettingsTab(self.db)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.painted:
+            self.painted = True
+            # 첫 화면이 그려진 뒤 나머지 탭을 미리 불러옴 (settings: prefetch_tabs)
+            if Cache.prefetch_tabs:
+                QTimer.singleShot(0, self.prefetch_tab)
+        if startup_profile.enabled():
+            # 첫 화면이 그려진 뒤 측정을 끝냄 (미리 불러오는 탭은 측정하지 않음)
+            startup_profile.mark("first_paint")
+            QTimer.singleShot(0, self.finish_startup_profile)
+
+    def finish_startup_profile(self):
+        startup_profile.finish()
+        if startup_profile.quit_after_startup():
+            self.close()
+
+    def on_tab_changed(self, index):
+        self.tabs.widget(index).load()
+
+    def on_group_changed(self, index):
+        # 선택한 그룹 기준으로 탭을 다시 만듦
+        self.db.use_group(self.group_combo.itemData(index))
+        for tab_index in range(self.tabs.count()):
+            self.tabs.widget(tab_index).reset()
+        self.tabs.currentWidget().load()
+
+    def generate_all_groups(self):
+        date_text = datetime.now().strftime("%Y-%m-%d")
+        results = self.db.insert_all_groups_history(date_text, workers=Cache.optimize_workers)
+        created = [self.group_combo.itemText(self.group_combo.findData(x)) for x, y in results.items()
+                   if y[1] is not None]
+        failed = [f"{self.group_combo.itemText(self.group_combo.findData(x))}: {y[4]}" for x, y in results.items()
+                  if y[4] is not None]
+        self.on_group_changed(self.group_combo.currentIndex())
+        message = f"완료되었습니다.\n(생성: {', '.join(created) or '없음'})"
+        if failed:
+            message += "\n\n조편성하지 못한 그룹:\n" + "\n".join(failed)
+        show_dialog("전체 그룹 조편성", message)
+
+    def show_query_stats(self):
+        from tabs.query_stats_dialog import QueryStatsDialog
+        QueryStatsDialog(self.db, self).exec_()
+
+    def prefetch_tab(self):
+        # 한 번에 하나씩 불러와서 화면이 멈추지 않도록 함
+        for index in range(self.tabs.count()):
+            tab = self.tabs.widget(index)
+            if not tab.is_loaded():
+                with startup_profile.phase(f"tab:{self.tabs.tabText(index)}"):
+                    tab.load()
+                QTimer.singleShot(0, self.prefetch_tab)
+                break
+
+    def closeEvent(self, event):
+        self.db.close()
+        super().closeEvent(event)
 
     def export_users(self):
-        users = self.db.select_users()
-        current_time = str(int(datetime.now().timestamp() * 1000))
-        filename = f"users_{current_time}.txt"
+        # users.csv 로 이름을 바꾸면 '사용자 가져오기' 로 다시 가져올 수 있음
+        import exporter
 
-        export_data = list()
-        for x in users:
-            export_data.append(f"{x[1]}: {list(x[2:])}")
-
-        with open(f"./{filename}", "w") as file:
-            file.write("\n".join(export_data))
+        current_time = str(int(datetime.now().timestamp() * 1000))
+        filename = f"users_{current_time}.csv"
+        exporter.export_table(self.db, "users", f"./{filename}")
         show_dialog("사용자 내보내기", f"완료되었습니다.\n(file: {filename})")
 
     def import_users(self):
-        try:
-            with open("./users.txt", "r") as file:
-                users = yaml.safe_load(file)
-            self.db.initial_data(users, force=True)
-            show_dialog("사용자 가져오기", f"완료되었습니다.")
-        except FileNotFoundError:
-            show_dialog("사용자 가져오기", f"users.json 파일이 없습니다. 파일을 생성하시거나 요청해주세요.\n"
-                                    '{"이름": ["조장가능날짜", "마지막조장날짜", 출력그룹(number)]')
+        # users.txt (YAML), users.csv, users.jsonl 중 있는 파일을 가져옴 (기존 사용자는 id, 없으면 이름 기준으로 변경)
+        import importer
+
+        path = next((x for x in ("./users.txt", "./users.csv", "./users.jsonl") if os.path.exists(x)), None)
+        if path is None:
+            show_dialog("사용자 가져오기", f"users.txt 파일이 없습니다. 파일을 생성하시거나 요청해주세요.\n"
+                                    "이름: ['조장가능날짜', '마지막조장날짜', 출력그룹(number)]")
+            return
+
+        report = importer.import_users(self.db, path)
+        if self.tab2.is_loaded():
+            self.tab2.load().load_user_data()
+        show_dialog("사용자 가져오기", f"완료되었습니다. ({path})\n{report.summary()}")
 
 
 if __name__ == '__main__':
-    application = QApplication(sys.argv)
-    window = MainWindow()
-    window.show()
+    # 조편성 최적화(ProcessPoolExecutor)를 PyInstaller/Nuitka 실행 파일에서 사용하기 위해 필요
+    multiprocessing.freeze_support()
+    with startup_profile.phase("qapplication"):
+        application = QApplication(sys.argv)
+    with startup_profile.phase("main_window"):
+        window = MainWindow()
+    with startup_profile.phase("show"):
+        window.show()
     sys.exit(application.exec_())
@@ -0,0 +1,58 @@
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from statistics import pvariance
+
+# 조편성 평가 함수 (값이 작을수록 좋은 편성)
+OBJECTIVES = dict()
+
+
+@dataclass
+class SquadContext:
+    users: dict
+    date_text: str
+    pair_matrix: object = None
+
+
+def register_objective(name):
+    def decorator(func):
+        OBJECTIVES[name] = func
+        return func
+
+    return decorator
+
+
+@register_objective("leader_rotation")
+def leader_rotation(squad, context):
+    # 최근에 조장을 했던 사용자가 다시 조장이 될수록 커짐
+    selected_date = datetime.strptime(context.date_text, "%Y-%m-%d")
+    score = 0.0
+    for x in squad:
+        recent_date = context.users[x[0]][3] if x[0] in context.users else None
+        if recent_date:
+            weeks = (selected_date - datetime.strptime(recent_date, "%Y-%m-%d")).days / 7
+            score += 1 / max(weeks, 1)
+    return score
+
+
+@register_objective("display_group_balance")
+def display_group_balance(squad, context):
+    # 출력 그룹별 인원이 조마다 고르게 나뉘었는지 (그룹별 분산의 합)
+    group_counts = [Counter(context.users[user_id][4] for user_id in x if user_id in context.users) for x in squad]
+    groups = set().union(*group_counts) if group_counts else set()
+    return sum(pvariance([x[group] for x in group_counts]) for group in groups) if len(squad) > 1 else 0.0
+
+
+@register_objective("squad_size_variance")
+def squad_size_variance(squad, context):
+    sizes = [sum(1 for user_id in x if user_id is not None) for x in squad]
+    return pvariance(sizes) if len(sizes) > 1 else 0.0
+
+
+@register_objective("repeat_pairs")
+def repeat_pairs(squad, context):
+    return context.pair_matrix.score(squad) if context.pair_matrix is not None else 0
+
+
+def score_squad(squad, context, weights):
+    return sum(weight * OBJECTIVES[name](squad, context) for name, weight in weights.items() if weight)
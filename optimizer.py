@@ -0,0 +1,97 @@
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from engine import assign_squad
+from objectives import SquadContext, score_squad
+
+# 만족하지 못한 규칙 1개당 더하는 점수 (다른 평가 항목보다 항상 우선)
+UNSATISFIED_PENALTY = 1000
+
+_worker = dict()
+
+
+def init_worker(users, date_text, team_number, leader_cycle, rules, pair_matrix, weights, leader_weights=None):
+    _worker.update(users=users, date_text=date_text, team_number=team_number, leader_cycle=leader_cycle,
+                   rules=rules, pair_matrix=pair_matrix, weights=weights, leader_weights=leader_weights,
+                   context=SquadContext({x[0]: x for x in users}, date_text, pair_matrix))
+
+
+def run_start(seed):
+    squad, leader_ids, unsatisfied = assign_squad(_worker["users"], _worker["date_text"], _worker["team_number"],
+                                                  _worker["leader_cycle"], rules=_worker["rules"],
+                                                  pair_matrix=_worker["pair_matrix"], rng=random.Random(seed),
+                                                  leader_weights=_worker["leader_weights"])
+    score = score_squad(squad, _worker["context"], _worker["weights"]) + UNSATISFIED_PENALTY * len(unsatisfied)
+    return score, seed, squad, leader_ids, unsatisfied
+
+
+def optimize_squad(users, date_text, team_number, leader_cycle, rules=(), pair_matrix=None, starts=8,
+                   time_budget=2.0, weights=None, workers=None, base_seed=None, leader_weights=None):
+    """서로 다른 seed 로 여러 번 조편성을 만들어 평가 점수가 가장 낮은 결과를 (사용자 id 목록으로) 반환합니다.
+
+    time_budget(초)이 지나면 끝나지 않은 시도는 버리며, 같은 입력과 seed 로 assign_squad 를 실행하면
+    같은 결과를 다시 만들 수 있습니다.
+    """
+    deadline = time.monotonic() + time_budget
+    weights = weights or {"repeat_pairs": 1.0, "leader_rotation": 1.0, "display_group_balance": 1.0}
+    base_seed = random.SystemRandom().randrange(2 ** 31) if base_seed is None else base_seed
+    seeds = [(base_seed + x) % 2 ** 31 for x in range(starts)]
+    initargs = (users, date_text, team_number, leader_cycle, list(rules), pair_matrix, weights, leader_weights)
+
+    workers = min(workers or os.cpu_count() or 1, starts)
+    best = None
+    if workers <= 1:
+        # 프로세스 없이 순서대로 실행 (시간이 지나면 남은 seed 는 시도하지 않음)
+        init_worker(*initargs)
+        for seed in seeds:
+            if best is not None and time.monotonic() >= deadline:
+                break
+            result = run_start(seed)
+            if best is None or result[:2] < best[:2]:
+                best = result
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=initargs)
+        try:
+            pending = {executor.submit(run_start, seed) for seed in seeds}
+            while pending:
+                # 시간이 지나도 결과가 하나도 없으면 첫 번째 결과는 기다림
+                timeout = max(deadline - time.monotonic(), 0) if best is not None else None
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    result = future.result()
+                    if best is None or result[:2] < best[:2]:
+                        best = result
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    score, seed, squad, leader_ids, unsatisfied = best
+    return squad, leader_ids, unsatisfied, seed, score
+
+
+def run_group(job):
+    # 한 그룹을 편성할 수 없어도 (조장 후보 부족 등) 다른 그룹은 계속 처리하도록 오류 메시지를 결과로 반환
+    group_id, users, date_text, team_number, leader_cycle, rules, pair_matrix, seed, leader_weights = job
+    try:
+        result = assign_squad(users, date_text, team_number, leader_cycle, rules=rules, pair_matrix=pair_matrix,
+                              rng=random.Random(seed), leader_weights=leader_weights)
+    except ValueError as e:
+        return group_id, seed, None, str(e)
+    return group_id, seed, result, None
+
+
+def generate_groups(jobs, workers=None):
+    """그룹별 조편성을 프로세스 풀에서 동시에 실행하고 jobs 순서대로 (group_id, seed, assign_squad 결과, 오류) 를 반환
+
+    편성하지 못한 그룹은 assign_squad 결과가 None, 오류는 ValueError 메시지입니다.
+
+    jobs: (group_id, users, date_text, team_number, leader_cycle, rules, pair_matrix, seed, leader_weights) 목록
+    """
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        return [run_group(x) for x in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run_group, jobs))
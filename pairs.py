@@ -0,0 +1,115 @@
+import random
+
+import numpy as np
+
+# 행렬 크기가 n^2 이므로 이보다 인원이 많으면 사용하지 않음 (반복 만남 점수 없이 편성)
+# 4000 명: uint16 행렬 32 MB, improve 의 float32 복사본 64 MB, 최적화 프로세스마다 행렬 복사본 32 MB
+MAX_USERS = 4000
+
+
+class PairMatrix:
+    """사용자 x 사용자 같은 조 횟수 행렬
+
+    주(date_text) 단위로 조편성을 더하고 빼면서 look-back 기간 만큼의 이력만 유지한다.
+    """
+
+    def __init__(self, user_ids):
+        self.user_ids = list(user_ids)
+        self.index = {user_id: index for index, user_id in enumerate(self.user_ids)}
+        self.counts = np.zeros((len(self.user_ids), len(self.user_ids)), dtype=np.uint16)
+        self.weeks = dict()
+
+    def squad_indexes(self, squad):
+        return np.array([self.index[x] for x in squad if x in self.index], dtype=np.intp)
+
+    def update_week(self, squads, added):
+        for squad in squads:
+            indexes = self.squad_indexes(squad)
+            if added:
+                self.counts[np.ix_(indexes, indexes)] += np.uint16(1)
+            else:
+                self.counts[np.ix_(indexes, indexes)] -= np.uint16(1)
+            self.counts[indexes, indexes] = 0
+
+    def add_week(self, date_text, squads):
+        if date_text in self.weeks:
+            self.remove_week(date_text)
+        self.update_week(squads, True)
+        self.weeks[date_text] = squads
+
+    def remove_week(self, date_text):
+        squads = self.weeks.pop(date_text, None)
+        if squads is not None:
+            self.update_week(squads, False)
+
+    def score(self, squads):
+        """조 안에서 이미 같은 조였던 횟수의 합"""
+        total = 0
+        for squad in squads:
+            indexes = self.squad_indexes(squad)
+            total += int(self.counts[np.ix_(indexes, indexes)].sum()) // 2
+        return total
+
+    def improve(self, squads, priorities=None, rng=None, max_iter=300, sample_size=256):
+        """같은 출력 그룹의 조원끼리 교환해서 반복 만남을 줄임 (조장 자리는 고정)
+
+        교환 이득은 사용자 x 조 친밀도 행렬 C 로 한 번에 계산한다.
+        u(su) <-> v(sv) 교환 시 변화량 = C[u, sv] - C[u, su] + C[v, su] - C[v, sv] - 2 * M[u, v]
+        """
+        priorities = priorities or {}
+        rng = rng or random
+
+        positions = [(squad_index, member_index, user_id)
+                     for squad_index, squad in enumerate(squads)
+                     for member_index, user_id in enumerate(squad)
+                     if user_id is not None and user_id in self.index]
+        if not positions:
+            return 0
+
+        matrix_indexes = np.array([self.index[x[2]] for x in positions], dtype=np.intp)
+        counts = self.counts[np.ix_(matrix_indexes, matrix_indexes)].astype(np.float32)
+        assigned = np.array([x[0] for x in positions], dtype=np.intp)
+        one_hot = np.zeros((len(positions), len(squads)), dtype=np.float32)
+        one_hot[np.arange(len(positions)), assigned] = 1
+        affinity = counts @ one_hot
+
+        tiers = dict()
+        for local_index, (_, member_index, user_id) in enumerate(positions):
+            if member_index != 0:
+                tiers.setdefault(priorities.get(user_id, 100), []).append(local_index)
+        tiers = [x for x in tiers.values() if len(x) > 1]
+
+        swapped = 0
+        misses = 0
+        for iteration in range(max_iter):
+            if not tiers or misses >= len(tiers):
+                break
+            tier = tiers[iteration % len(tiers)]
+            sample = np.array(rng.sample(tier, min(len(tier), sample_size)), dtype=np.intp)
+            sample_squads = assigned[sample]
+
+            cross = affinity[sample][:, sample_squads]
+            own = affinity[sample, sample_squads]
+            delta = cross - own[:, None] + cross.T - own[None, :] - 2 * counts[np.ix_(sample, sample)]
+            delta[sample_squads[:, None] == sample_squads[None, :]] = 0
+
+            best = int(np.argmin(delta))
+            row, column = divmod(best, len(sample))
+            if delta[row, column] >= 0:
+                misses += 1
+                continue
+            misses = 0
+
+            user_a, user_b = sample[row], sample[column]
+            squad_a, squad_b = assigned[user_a], assigned[user_b]
+            affinity[:, squad_a] += counts[:, user_b] - counts[:, user_a]
+            affinity[:, squad_b] += counts[:, user_a] - counts[:, user_b]
+            assigned[user_a], assigned[user_b] = squad_b, squad_a
+
+            position_a, position_b = positions[user_a], positions[user_b]
+            squads[position_a[0]][position_a[1]] = position_b[2]
+            squads[position_b[0]][position_b[1]] = position_a[2]
+            positions[user_a] = (position_b[0], position_b[1], position_a[2])
+            positions[user_b] = (position_a[0], position_a[1], position_b[2])
+            swapped += 1
+        return swapped
@@ -0,0 +1,208 @@
+"""SQL 문별 실행 통계 (LunchSquadDB 의 연결에서 사용)
+
+LunchSquadDB 는 ProfiledConnection 으로 연결합니다. 측정을 켜면 (settings: query_stats, 또는 enable_query_stats())
+cursor 가 ProfiledCursor 로 바뀌고, 값(숫자, 문자열, IN 목록)을 ? 로 바꾼 SQL 문별로 실행 횟수, 전체/최대 시간,
+읽은 행 수를 모읍니다. 한 번 실행(execute + fetch)에 slow_ms 이상 걸린 SQL 은 EXPLAIN QUERY PLAN 결과를 같이 저장하고,
+계획에 테이블 전체를 읽는 SCAN 이 있으면 표시합니다. 측정을 끄면 일반 sqlite3.Cursor 를 사용합니다.
+"""
+import json
+import re
+import sqlite3
+import time
+from datetime import datetime
+from functools import lru_cache
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+WHITESPACE = re.compile(r"\s+")
+EXPLAIN_STATEMENTS = ("select", "with", "insert", "update", "delete", "replace")
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql):
+    """같은 모양의 SQL 을 하나로 모으기 위해 공백을 줄이고 값을 ? 로 바꿈 (f-string 으로 만든 SQL 포함)"""
+    sql = WHITESPACE.sub(" ", sql).strip()
+    sql = STRING_LITERAL.sub("?", sql)
+    sql = NUMBER_LITERAL.sub("?", sql)
+    return IN_LIST.sub("(?, ...)", sql)
+
+
+def is_scan(detail):
+    # "SCAN users" 는 테이블 전체, "SCAN users USING INDEX ..." 는 인덱스 전체를 읽음 (상수 행, 서브쿼리 결과는 제외)
+    return detail.startswith("SCAN ") and not detail.startswith(("SCAN CONSTANT ROW", "SCAN (subquery"))
+
+
+class QueryStat:
+    def __init__(self, sql):
+        self.sql = sql
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.plan = None
+        self.plan_ms = None
+
+    def as_dict(self):
+        return {
+            "sql": self.sql,
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0,
+            "rows": self.rows,
+            "plan": self.plan,
+            "plan_ms": self.plan_ms,
+            "full_scan": any(is_scan(x) for x in self.plan or ()),
+        }
+
+
+class QueryStats:
+    def __init__(self, slow_ms=20.0):
+        self.slow_ms = slow_ms
+        self.statements = dict()
+        self.started_at = datetime.now()
+
+    def reset(self):
+        self.statements.clear()
+        self.started_at = datetime.now()
+
+    def stat(self, sql):
+        key = normalize_sql(sql)
+        stat = self.statements.get(key)
+        if stat is None:
+            stat = self.statements[key] = QueryStat(key)
+        return stat
+
+    def is_slow(self, elapsed):
+        return self.slow_ms is not None and elapsed * 1000 >= self.slow_ms
+
+    def as_dict(self, order_by="total_ms"):
+        statements = sorted((x.as_dict() for x in self.statements.values()), key=lambda x: x[order_by],
+                            reverse=True)
+        return {
+            "started_at": self.started_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "slow_ms": self.slow_ms,
+            "count": sum(x["count"] for x in statements),
+            "total_ms": round(sum(x["total_ms"] for x in statements), 3),
+            "full_scans": [x["sql"] for x in statements if x["full_scan"]],
+            "statements": statements,
+        }
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.as_dict(), file, ensure_ascii=False, indent=2)
+        return path
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """execute 부터 다음 execute 전까지 (fetch 포함) 의 시간과 읽은 행 수를 현재 SQL 에 더함"""
+
+    def __init__(self, connection):
+        super().__init__(connection)
+        self.stats = connection.stats
+        self.current = None
+        self.current_sql = None
+        self.current_parameters = None
+        self.current_elapsed = 0.0
+
+    def measure(self, started, rows=0):
+        elapsed = time.perf_counter() - started
+        stat = self.current
+        stat.total += elapsed
+        stat.rows += rows
+        self.current_elapsed += elapsed
+        if self.current_elapsed > stat.max:
+            stat.max = self.current_elapsed
+            if stat.plan is None and self.stats.is_slow(self.current_elapsed):
+                stat.plan = self.explain(self.current_sql, self.current_parameters)
+                stat.plan_ms = round(self.current_elapsed * 1000, 3)
+
+    def explain(self, sql, parameters):
+        if not sql.lstrip()[:7].lower().startswith(EXPLAIN_STATEMENTS):
+            return None
+        cursor = sqlite3.Cursor(self.connection)
+        try:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, parameters)
+            return [x[3] for x in cursor.fetchall()]
+        except sqlite3.Error as e:
+            return [f"EXPLAIN 실패: {e}"]
+        finally:
+            cursor.close()
+
+    def start(self, sql, parameters, count=1):
+        self.current = self.stats.stat(sql)
+        self.current.count += count
+        self.current_sql = sql
+        self.current_parameters = parameters
+        self.current_elapsed = 0.0
+
+    def execute(self, sql, parameters=()):
+        self.start(sql, parameters)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self.measure(started)
+
+    def executemany(self, sql, seq_of_parameters):
+        seq_of_parameters = list(seq_of_parameters)
+        self.start(sql, seq_of_parameters[0] if seq_of_parameters else (), count=len(seq_of_parameters))
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.measure(started)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        if self.current is not None:
+            self.measure(started, int(row is not None))
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        if self.current is not None:
+            self.measure(started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        if self.current is not None:
+            self.measure(started, len(rows))
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            if self.current is not None:
+                self.measure(started)
+            raise
+        if self.current is not None:
+            self.measure(started, 1)
+        return row
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """stats 가 있으면 ProfiledCursor 를, 없으면 일반 sqlite3.Cursor 를 만듦"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = None
+
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = ProfiledCursor if self.stats is not None else sqlite3.Cursor
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        # sqlite3.Connection.execute 는 cursor() 를 거치지 않으므로 직접 만듦
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
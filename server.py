@@ -0,0 +1,297 @@
+"""조편성을 JSON 으로 제공하는 HTTP 서버 (사내 챗봇, 인트라넷 페이지용)
+
+    python -m server --db lunch_squad.dat --port 8080 --token secret
+    curl http://127.0.0.1:8080/api/weeks/current
+    curl http://127.0.0.1:8080/api/users/12/history?limit=20
+    curl -X POST -H "Authorization: Bearer secret" http://127.0.0.1:8080/api/weeks/2026-10-19/generate
+
+읽기: GET /api/groups, /api/weeks/<YYYY-MM-DD | current>, /api/users, /api/users/<id>/history
+쓰기 (토큰 필요): POST /api/weeks/<주>/generate, POST /api/weeks/<주>/clone, DELETE /api/weeks/<주>
+그룹은 ?group=<id 또는 이름> 으로 지정합니다. (기본 그룹)
+
+요청은 gevent greenlet 에서 처리하고, DB 작업은 gevent 스레드 풀에서 실행합니다. 읽기는 읽기 전용 연결 풀에서
+연결을 하나씩 빌려 쓰므로 동시에 실행되고 (sqlite3 는 쿼리 중에 GIL 을 놓음), 쓰기는 하나의 쓰기 연결에서 순서대로
+실행합니다. WAL 이므로 조편성을 생성하는 동안에도 읽기가 막히지 않습니다.
+"""
+# 소켓, threading.local(bottle 의 request/response) 을 greenlet 별로 쓰기 위해 다른 모듈보다 먼저 patch
+from gevent import monkey
+
+monkey.patch_all()
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+from bottle import Bottle, HTTPError, request, response, run
+from gevent.queue import Queue
+from gevent.threadpool import ThreadPool
+
+from config import Cache, load_settings
+from database import DEFAULT_GROUP_ID, LunchSquadDB
+from engine import week_start
+from squad import generate_week, group_result, show_week
+
+JSON_TYPE = "application/json; charset=utf-8"
+MAX_HISTORY_LIMIT = 500
+
+
+class ConnectionPool:
+    """LunchSquadDB 연결 풀
+
+    run() 은 연결을 하나 빌려서 (모두 사용 중이면 greenlet 이 기다림) 스레드 풀에서 func(db, *args) 를 실행합니다.
+    실행 전에 다른 연결의 커밋을 확인해서 읽어 둔 이력을 비우므로 (refresh) 쓰기 연결, 프로그램에서 바꾼 조편성도
+    바로 보입니다. request/response 는 스레드 풀에서 사용할 수 없으므로 func 에는 값만 넘깁니다.
+    """
+
+    def __init__(self, db_name, size, read_only=True):
+        self.connections = [LunchSquadDB(db_name, read_only=read_only, check_same_thread=False) for _ in range(size)]
+        self.idle = Queue()
+        for db in self.connections:
+            self.idle.put(db)
+        self.threadpool = ThreadPool(size)
+
+    @staticmethod
+    def call(db, func, args):
+        # 스레드 풀에서 발생한 예외는 gevent 가 stderr 에 출력하므로 (404 등 포함) 값으로 돌려받아 요청에서 다시 발생
+        try:
+            db.refresh()
+            return func(db, *args), None
+        except Exception as e:
+            return None, e
+
+    def run(self, func, *args):
+        db = self.idle.get()
+        try:
+            result, error = self.threadpool.apply(self.call, (db, func, args))
+        finally:
+            self.idle.put(db)
+        if error is not None:
+            raise error
+        return result
+
+    def close(self):
+        self.threadpool.kill()
+        for db in self.connections:
+            db.close()
+
+
+def use_group(db, group):
+    # group: id 또는 이름 (없으면 기본 그룹), 같은 그룹이면 읽어 둔 이력을 유지
+    group_id = DEFAULT_GROUP_ID
+    if group:
+        group_id = next((x[0] for x in db.select_groups() if group in (str(x[0]), x[1])), None)
+        if group_id is None:
+            raise HTTPError(404, f"그룹이 없습니다. ({group})")
+    if db.group_id != group_id:
+        db.use_group(group_id)
+
+
+def parse_week(week):
+    if week == "current":
+        week = datetime.now().strftime("%Y-%m-%d")
+    try:
+        return week_start(week)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"날짜 형식이 올바르지 않습니다. (YYYY-MM-DD: {week})")
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = [x.strip() for x in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def json_text(data):
+    return json.dumps(data, ensure_ascii=False)
+
+
+def json_error(error):
+    response.content_type = JSON_TYPE
+    return json_text({"status": error.status_code, "error": error.body})
+
+
+def read_groups(db):
+    return [group_result(x) for x in db.select_groups()]
+
+
+def read_week(db, group, date_text):
+    use_group(db, group)
+    return dict(show_week(db, date_text), group_id=db.group_id)
+
+
+def read_users(db, group):
+    use_group(db, group)
+    return [{"id": user_id, "name": name, "enable_date": enable_date, "recent_date": recent_date, "priority": priority}
+            for user_id, name, enable_date, recent_date, priority in db.select_users()]
+
+
+def read_user_history(db, group, user_id, limit, before):
+    use_group(db, group)
+    user = db.select_user(user_id)
+    if user is None:
+        raise HTTPError(404, f"사용자가 없습니다. ({user_id})")
+    name, enable_date, recent_date, priority, leader_weight = user
+    history = [{"date_label": date_label, "date_text": date_text, "squad_no": squad_no, "is_leader": bool(is_leader)}
+               for date_label, date_text, squad_no, is_leader in db.select_user_history(user_id, limit, before)]
+    return {
+        "user": {"id": user_id, "name": name, "enable_date": enable_date, "recent_date": recent_date,
+                 "priority": priority, "leader_weight": leader_weight},
+        "history": history,
+        # 다음 페이지는 ?before=<next_before>
+        "next_before": history[-1]["date_text"] if len(history) == limit else None,
+    }
+
+
+def write_generate(db, group, date_text, clone_from, seed):
+    use_group(db, group)
+    try:
+        return dict(generate_week(db, date_text, clone_from=clone_from, seed=seed), group_id=db.group_id)
+    except ValueError as e:
+        raise HTTPError(409, str(e))
+
+
+def write_delete(db, group, date_text):
+    use_group(db, group)
+    # 프로그램과 같이 이번 주 이후의 조편성만 삭제 (지난 조편성은 조장 이력으로 사용)
+    this_week = week_start(datetime.now().strftime("%Y-%m-%d"))
+    if date_text < this_week:
+        raise HTTPError(409, f"지난 주 조편성은 삭제할 수 없습니다. ({date_text})")
+    result = show_week(db, date_text)
+    if not result["squads"]:
+        raise HTTPError(404, f"{date_text} 조편성이 없습니다.")
+    db.delete_team_history(result["date_label"])
+    return {"date_label": result["date_label"], "date_text": date_text, "group_id": db.group_id, "deleted": True}
+
+
+class SquadServer:
+    """읽기 전용 연결 풀(pool_size 개)과 쓰기 연결(1 개)로 요청을 처리하는 bottle 앱
+
+    token 이 없으면 쓰기 요청은 모두 거부합니다.
+    """
+
+    def __init__(self, db_name, pool_size=8, token=None):
+        # 쓰기 연결을 먼저 열어서 스키마를 변환한 뒤 읽기 전용 연결을 엶
+        self.writer = ConnectionPool(db_name, 1, read_only=False)
+        self.readers = ConnectionPool(db_name, pool_size)
+        self.token = token
+
+        self.app = Bottle()
+        self.app.default_error_handler = json_error
+        self.app.get("/api/groups", callback=self.get_groups)
+        self.app.get("/api/weeks/<week>", callback=self.get_week)
+        self.app.get("/api/users", callback=self.get_users)
+        self.app.get("/api/users/<user_id:int>/history", callback=self.get_user_history)
+        self.app.post("/api/weeks/<week>/generate", callback=self.post_generate)
+        self.app.post("/api/weeks/<week>/clone", callback=self.post_clone)
+        self.app.delete("/api/weeks/<week>", callback=self.delete_week)
+
+    def close(self):
+        self.readers.close()
+        self.writer.close()
+
+    def check_token(self):
+        if not self.token:
+            raise HTTPError(403, "쓰기 토큰이 설정되지 않았습니다. (--token, LUNCH_SQUAD_TOKEN, settings: server_token)")
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), self.token.encode()):
+            raise HTTPError(401, "토큰이 올바르지 않습니다.")
+
+    @staticmethod
+    def request_body():
+        try:
+            return request.json or {}
+        except (HTTPError, ValueError):
+            raise HTTPError(400, "JSON 형식이 올바르지 않습니다.")
+
+    @staticmethod
+    def json_response(data, status=200):
+        response.status = status
+        response.content_type = JSON_TYPE
+        return json_text(data)
+
+    def get_groups(self):
+        return self.json_response(self.readers.run(read_groups))
+
+    def get_week(self, week):
+        # 조편성은 한 주에 한 번 바뀌므로 본문의 해시를 ETag 로 사용 (같으면 304, 본문 없이 응답)
+        body = json_text(self.readers.run(read_week, request.query.group, parse_week(week)))
+        etag = f'"{hashlib.sha1(body.encode("utf-8")).hexdigest()[:20]}"'
+        response.set_header("ETag", etag)
+        response.set_header("Cache-Control", "no-cache")
+        if etag_matches(request.headers.get("If-None-Match"), etag):
+            response.status = 304
+            return ""
+        response.content_type = JSON_TYPE
+        return body
+
+    def get_users(self):
+        return self.json_response(self.readers.run(read_users, request.query.group))
+
+    def get_user_history(self, user_id):
+        try:
+            limit = int(request.query.limit or 100)
+        except ValueError:
+            raise HTTPError(400, f"limit 은 숫자여야 합니다. ({request.query.limit})")
+        if not 1 <= limit <= MAX_HISTORY_LIMIT:
+            raise HTTPError(400, f"limit 은 1 ~ {MAX_HISTORY_LIMIT} 이어야 합니다.")
+        before = parse_week(request.query.before) if request.query.before else None
+        return self.json_response(self.readers.run(read_user_history, request.query.group, user_id, limit, before))
+
+    def post_generate(self, week):
+        self.check_token()
+        seed = self.request_body().get("seed")
+        if seed is not None and not isinstance(seed, int):
+            raise HTTPError(400, f"seed 는 정수여야 합니다. ({seed})")
+        result = self.writer.run(write_generate, request.query.group, parse_week(week), None, seed)
+        return self.json_response(result, 201 if result["created"] else 200)
+
+    def post_clone(self, week):
+        # source: 복제할 주 (기본: 지난 주)
+        self.check_token()
+        date_text = parse_week(week)
+        source = self.request_body().get("source")
+        if source is None:
+            source = (datetime.strptime(date_text, "%Y-%m-%d") - timedelta(weeks=1)).strftime("%Y-%m-%d")
+        result = self.writer.run(write_generate, request.query.group, date_text, parse_week(source), None)
+        return self.json_response(result, 201 if result["created"] else 200)
+
+    def delete_week(self, week):
+        self.check_token()
+        return self.json_response(self.writer.run(write_delete, request.query.group, parse_week(week)))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="server", description="소통런치 조편성 HTTP 서버")
+    parser.add_argument("--db", default="lunch_squad.dat", help="SQLite 데이터 파일")
+    parser.add_argument("--settings", default="./settings.txt", help="설정 파일 (yaml)")
+    parser.add_argument("--host", default="127.0.0.1", help="다른 PC 에서 접속하려면 0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--pool-size", type=int, default=8, help="읽기 전용 연결 수 (동시에 실행하는 읽기 요청 수)")
+    parser.add_argument("--token", help="쓰기 요청 토큰 (기본: LUNCH_SQUAD_TOKEN 환경 변수, settings 의 server_token)")
+    parser.add_argument("--access-log", action="store_true", help="요청마다 접속 로그를 출력")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    load_settings(args.settings)
+    # gevent 스레드 풀에서는 프로세스를 만들 수 없으므로 최적화 시도는 쓰기 스레드에서 순서대로 실행
+    Cache.optimize_workers = 1
+    token = args.token or os.environ.get("LUNCH_SQUAD_TOKEN") or Cache.server_token
+    server = SquadServer(args.db, pool_size=args.pool_size, token=token)
+    sys.stderr.write(f"http://{args.host}:{args.port}/api/weeks/current ({args.db}, 읽기 연결 {args.pool_size} 개, "
+                     f"쓰기 {'허용' if token else '거부'})\n")
+    try:
+        run(server.app, server="gevent", host=args.host, port=args.port, quiet=not args.access_log)
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
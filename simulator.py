@@ -0,0 +1,250 @@
+"""조장 순환 시뮬레이션 (DB 에 저장하지 않고 N 주 x M 개 seed 를 메모리에서 실행)
+
+    python -m squad simulate --weeks 52 --seeds 1000 --leader-cycle 2 3 4 --team-member 4 5
+
+assign_squad 의 조장 선택 규칙(leaders.LeaderQueue)을 그대로 따릅니다.
+    1 순위: 마지막 조장 이후 (지난 주 x 가중치) 가 leader_cycle 이상인 사용자 (또는 한 번도 안 한 사용자)
+    2 순위: (지난 주 x 가중치) 가 2 이상인 사용자
+    3 순위: 나머지 사용자 (enable_date 가 지난 사용자만, 가중치 0 은 제외)
+같은 순위 안에서는 (기다린 주 x 가중치) 가 큰 사용자부터 (한 번도 안 했으면 조장 가능해진 날부터 기다린 주),
+같으면 rate = 가중치 인 지수 분포 난수가 작은 사용자부터 뽑으므로 (순위, -기다린 주 x 가중치, 난수) 순으로
+정렬해서 앞의 team_number 명을 고르는 것과 같습니다.
+모든 seed 를 (seed x 사용자) numpy 배열로 한 주씩 같이 진행하고, seed 가 많으면 batch_size 개씩 나눠
+(workers 를 주면 프로세스 풀에서) 실행합니다. exact=True 이면 engine.assign_squad 를 주마다 그대로 실행합니다. (검증용, 느림)
+
+조원 배치(출력 그룹, 규칙, 반복 만남)는 다음 주 조장 선택에 영향이 없으므로 빠른 시뮬레이션에서는 생략합니다.
+"""
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from engine import assign_squad, week_start
+from leaders import DEFAULT_WEIGHT, effective_weights
+
+NEVER = -10 ** 6
+MAX_GAP = 520
+
+
+def week_offset(date_text, start, ceil=False):
+    """start(월요일)부터 date_text 까지의 주 수"""
+    days = (datetime.strptime(date_text[:10], "%Y-%m-%d") - start).days
+    return -(-days // 7) if ceil else days // 7
+
+
+def prepare_roster(users, start_date):
+    """users: (id, name, enable_date, recent_date, priority) 목록
+    -> (처음 조장 가능한 주, 마지막 조장 주, enable_date 의 주 위치(소수)) 배열
+
+    enable_date < 해당 주 월요일 이면 조장 가능, recent_date <= (해당 주 - n 주) 이면 n 주 전 이전에 조장을 한 것으로 봅니다.
+    한 번도 조장을 하지 않은 사용자는 enable_date 부터 기다린 주를 사용합니다. (LeaderQueue 와 같이 일 / 7)
+    """
+    start = datetime.strptime(week_start(start_date), "%Y-%m-%d")
+    enable_weeks = np.array([week_offset(x[2], start) + 1 if x[2] else NEVER for x in users], dtype=np.int32)
+    last_weeks = np.array([week_offset(x[3], start, ceil=True) if x[3] else NEVER for x in users], dtype=np.int32)
+    enable_offsets = np.array([(datetime.strptime(x[2][:10], "%Y-%m-%d") - start).days / 7 if x[2] else NEVER
+                               for x in users], dtype=np.float64)
+    return enable_weeks, last_weeks, enable_offsets
+
+
+def rotation_waits(last, week, weights, enable_offsets):
+    """LeaderQueue 와 같은 (기다린 주 x 가중치) 를 seed x 사용자 배열로 계산"""
+    return np.where(last == NEVER, week - enable_offsets, week - last) * weights
+
+
+def rotation_tiers(last, week, leader_cycle, weights, enable_offsets):
+    """LeaderQueue 와 같은 순위 (0, 1, 2) 와 (기다린 주 x 가중치) 를 seed x 사용자 배열로 계산"""
+    wait = rotation_waits(last, week, weights, enable_offsets)
+    tier = np.where((last == NEVER) | (wait >= leader_cycle), 0, np.where(wait >= 2, 1, 2)).astype(np.int8)
+    return tier, wait
+
+
+class RotationState:
+    """seed x 사용자 배열로 모으는 시뮬레이션 결과"""
+
+    def __init__(self, seeds, user_count):
+        self.counts = np.zeros((seeds, user_count), dtype=np.int32)
+        self.max_wait = np.zeros((seeds, user_count), dtype=np.int32)
+        self.gap_histogram = np.zeros(MAX_GAP + 1, dtype=np.int64)
+        self.tier_counts = np.zeros(3, dtype=np.int64)
+        self.short_weeks = 0
+
+    def record_turns(self, rows, chosen, week, last, enable_weeks, tiers):
+        # 조장 가능해진 뒤 (시뮬레이션 시작 이후) 조장이 되기까지 기다린 주
+        previous = last[rows, chosen]
+        waited = week - np.maximum(np.maximum(previous + 1, enable_weeks[chosen]), 0)
+        self.max_wait[rows, chosen] = np.maximum(self.max_wait[rows, chosen], waited)
+        gaps = week - previous[previous > NEVER]
+        self.gap_histogram += np.bincount(np.minimum(gaps, MAX_GAP), minlength=MAX_GAP + 1)
+        self.tier_counts += np.bincount(tiers, minlength=3)
+        self.counts[rows, chosen] += 1
+        last[rows, chosen] = week
+
+    def finish(self, weeks, last, enable_weeks):
+        # 마지막 조장 이후 시뮬레이션이 끝날 때까지 기다린 주 (한 번도 못 한 사용자 포함)
+        waited = weeks - np.maximum(last + 1, np.maximum(enable_weeks, 0))
+        self.max_wait = np.maximum(self.max_wait, np.maximum(waited, 0))
+        return self
+
+    @staticmethod
+    def merge(states):
+        merged = RotationState(0, 0)
+        merged.counts = np.concatenate([x.counts for x in states])
+        merged.max_wait = np.concatenate([x.max_wait for x in states])
+        merged.gap_histogram = sum(x.gap_histogram for x in states)
+        merged.tier_counts = sum(x.tier_counts for x in states)
+        merged.short_weeks = sum(x.short_weeks for x in states)
+        return merged
+
+
+def simulate_batch(job):
+    enable_weeks, last_weeks, enable_offsets, weights, new_leader_weight, weeks, seeds, team_number, leader_cycle, \
+        seed = job
+    rng = np.random.default_rng(seed)
+    user_count = len(enable_weeks)
+    state = RotationState(seeds, user_count)
+    last = np.repeat(last_weeks[np.newaxis, :], seeds, axis=0)
+    rows = np.arange(seeds)[:, np.newaxis]
+
+    for week in range(weeks):
+        eligible = (enable_weeks <= week) & (weights > 0)
+        eligible_count = int(eligible.sum())
+        if eligible_count < team_number:
+            # 실제 프로그램에서는 조편성이 실패하는 주 (가능한 사용자만 조장으로 처리)
+            state.short_weeks += seeds
+        pick = min(team_number, eligible_count)
+        if pick == 0:
+            continue
+
+        # 한 번도 조장을 하지 않은 사용자는 new_leader_weight 를 곱함 (첫 조장 이후에는 원래 가중치)
+        current_weights = np.where(last == NEVER, weights * new_leader_weight, weights)
+        tier, wait = rotation_tiers(last, week, leader_cycle, current_weights, enable_offsets)
+        with np.errstate(divide="ignore"):
+            ties = rng.exponential(1 / current_weights, size=(seeds, user_count))
+        # 조장이 될 수 없는 사용자는 가장 뒤로
+        order = np.lexsort((ties, -wait, np.where(eligible, tier, 3)), axis=1)
+        chosen = order[:, :pick]
+        state.record_turns(rows, chosen, week, last, enable_weeks, tier[rows, chosen].ravel())
+    return state.finish(weeks, last, enable_weeks)
+
+
+def simulate_exact_seed(job):
+    """engine.assign_squad 를 주마다 실행 (recent_date 만 갱신)"""
+    users, leader_weights, new_leader_weight, start_date, weeks, team_number, leader_cycle, seed = job
+    rng = random.Random(seed)
+    enable_weeks, last_weeks, enable_offsets = prepare_roster(users, start_date)
+    index = {x[0]: position for position, x in enumerate(users)}
+    users = [list(x) for x in users]
+    start = datetime.strptime(week_start(start_date), "%Y-%m-%d")
+
+    state = RotationState(1, len(users))
+    last = last_weeks[np.newaxis, :].copy()
+    rows = np.zeros((1, 1), dtype=np.intp)
+    for week in range(weeks):
+        date_text = (start + timedelta(weeks=week)).strftime("%Y-%m-%d")
+        current_weights = effective_weights(users, leader_weights, new_leader_weight)
+        _, leader_ids, _ = assign_squad([tuple(x) for x in users], date_text, team_number, leader_cycle, rng=rng,
+                                        leader_weights=current_weights)
+        chosen = np.array([[index[x] for x in leader_ids]], dtype=np.intp)
+        tier, _ = rotation_tiers(last, week, leader_cycle, np.array([current_weights[x[0]] for x in users]),
+                                 enable_offsets)
+        state.record_turns(rows, chosen, week, last, enable_weeks, tier[rows, chosen].ravel())
+        for user_id in leader_ids:
+            users[index[user_id]][3] = date_text
+    return state.finish(weeks, last, enable_weeks)
+
+
+def summarize(state, users, weeks, team_number, leader_cycle, enable_weeks, weights, per_user=False):
+    seeds = state.counts.shape[0]
+    years = weeks / 52
+    eligible = (enable_weeks < weeks) & (weights > 0)
+    counts = state.counts[:, eligible]
+    max_wait = state.max_wait[:, eligible]
+    eligible_weeks = weeks - np.maximum(enable_weeks[eligible], 0)
+    fair_counts = team_number * eligible_weeks / max(int(eligible.sum()), 1)
+
+    gaps = np.repeat(np.arange(MAX_GAP + 1), state.gap_histogram)
+    turns = int(state.tier_counts.sum())
+    result = {
+        "team_number": team_number,
+        "leader_cycle": leader_cycle,
+        "weeks": weeks,
+        "seeds": seeds,
+        "users": len(users),
+        "eligible_users": int(eligible.sum()),
+        "short_weeks": state.short_weeks // max(seeds, 1),
+        "leader_count": {
+            "fair_per_year": round(float(fair_counts.mean() / years), 3) if counts.size else 0,
+            "mean_per_year": round(float(counts.mean() / years), 3) if counts.size else 0,
+            "std_per_year": round(float(counts.std() / years), 3) if counts.size else 0,
+            # seed 마다 (가장 많이 한 사용자 - 가장 적게 한 사용자) 의 평균
+            "spread": round(float((counts.max(axis=1) - counts.min(axis=1)).mean()), 3) if counts.size else 0,
+        },
+        "gap_weeks": {
+            "mean": round(float(gaps.mean()), 3) if gaps.size else None,
+            "p50": int(np.percentile(gaps, 50)) if gaps.size else None,
+            "p95": int(np.percentile(gaps, 95)) if gaps.size else None,
+            "max": int(gaps.max()) if gaps.size else None,
+            # leader_cycle 보다 빨리 다시 조장이 된 비율 (1 순위 후보가 부족했던 경우)
+            "early_repeat_rate": round(float((gaps < leader_cycle).mean()), 4) if gaps.size else None,
+        },
+        "tier_rate": {f"tier{index + 1}": round(float(x / turns), 4) if turns else 0
+                      for index, x in enumerate(state.tier_counts)},
+        "starvation": {
+            "max_wait_p50": int(np.percentile(max_wait, 50)) if max_wait.size else None,
+            "max_wait_p95": int(np.percentile(max_wait, 95)) if max_wait.size else None,
+            "max_wait": int(max_wait.max()) if max_wait.size else None,
+            # 시뮬레이션 동안 한 번도 조장을 하지 못한 (seed, 사용자) 비율
+            "never_led_rate": round(float((counts == 0).mean()), 4) if counts.size else None,
+        },
+    }
+    if per_user:
+        result["per_user"] = [{
+            "id": users[index][0],
+            "name": users[index][1],
+            "weight": float(weights[index]),
+            "mean_count": round(float(state.counts[:, index].mean()), 3),
+            "min_count": int(state.counts[:, index].min()),
+            "max_count": int(state.counts[:, index].max()),
+            "max_wait_p95": int(np.percentile(state.max_wait[:, index], 95)),
+            "never_led_rate": round(float((state.counts[:, index] == 0).mean()), 4),
+        } for index in np.flatnonzero(eligible)]
+    return result
+
+
+def simulate_rotation(users, start_date, weeks, seeds, team_number, leader_cycle, seed=None, workers=None,
+                      batch_size=1000, exact=False, per_user=False, leader_weights=None, new_leader_weight=1.0):
+    """start_date 주부터 weeks 주 동안 seeds 번 조장 순환을 시뮬레이션하고 공정성 통계를 반환합니다.
+
+    users 는 select_generation_users 와 같은 (id, name, enable_date, recent_date, priority) 목록이고
+    leader_weights 는 {user_id: 조장 가중치} (users.leader_weight) 입니다.
+    """
+    seed = random.SystemRandom().randrange(2 ** 31) if seed is None else seed
+    leader_weights = leader_weights or {}
+    enable_weeks, last_weeks, enable_offsets = prepare_roster(users, start_date)
+    weights = np.array([leader_weights.get(x[0], DEFAULT_WEIGHT) for x in users], dtype=np.float64)
+    if exact:
+        jobs = [(list(users), leader_weights, new_leader_weight, start_date, weeks, team_number, leader_cycle,
+                 seed + x) for x in range(seeds)]
+        runner = simulate_exact_seed
+    else:
+        batch_size = max(1, min(batch_size, seeds))
+        jobs = [(enable_weeks, last_weeks, enable_offsets, weights, new_leader_weight, weeks,
+                 min(batch_size, seeds - x), team_number, leader_cycle, seed + x) for x in range(0, seeds, batch_size)]
+        runner = simulate_batch
+
+    workers = min(workers or 1, len(jobs))
+    if workers <= 1:
+        states = [runner(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, os.cpu_count() or 1)) as executor:
+            states = list(executor.map(runner, jobs))
+
+    result = summarize(RotationState.merge(states), users, weeks, team_number, leader_cycle, enable_weeks, weights,
+                       per_user=per_user)
+    result["seed"] = seed
+    result["exact"] = exact
+    result["new_leader_weight"] = new_leader_weight
+    return result
@@ -0,0 +1,179 @@
+import random
+from collections import Counter
+
+RULE_APART = "apart"
+RULE_TOGETHER = "together"
+RULE_TYPES = (RULE_APART, RULE_TOGETHER)
+
+
+class SquadSolver:
+    """조편성 규칙(같은 조 금지 / 같은 조 배정)을 만족하도록 조원을 교환하는 local search
+
+    squads 는 [조장, 조원, ...] 형태의 id 목록이며 조장(0번 자리)과 빈 자리(None)는 움직이지 않는다.
+    먼저 '같은 조 배정' 규칙으로 묶인 사용자들을 한 조로 모으고(greedy),
+    남은 위반 규칙마다 비용이 줄어드는 교환을 찾아 적용한다(local search).
+    """
+
+    def __init__(self, squads, rules, priorities=None, rng=None, sample_size=64, max_rounds=50):
+        self.squads = squads
+        self.priorities = priorities or {}
+        self.rng = rng or random
+        self.sample_size = sample_size
+        self.max_rounds = max_rounds
+
+        self.position = dict()
+        self.leaders = set()
+        for squad_index, squad in enumerate(squads):
+            for member_index, user_id in enumerate(squad):
+                if user_id is None:
+                    continue
+                self.position[user_id] = (squad_index, member_index)
+                if member_index == 0:
+                    self.leaders.add(user_id)
+
+        # 이번 주 편성 대상이 아닌 사용자가 포함된 규칙은 제외
+        self.rules = [x for x in rules if x[2] in self.position and x[3] in self.position and x[2] != x[3]]
+        self.partners = dict()
+        for rule_index, (_, _, user_a, user_b) in enumerate(self.rules):
+            self.partners.setdefault(user_a, []).append(rule_index)
+            self.partners.setdefault(user_b, []).append(rule_index)
+
+        self.grouped = set()
+        self.movable = dict()
+        for user_id, (squad_index, member_index) in self.position.items():
+            if member_index != 0:
+                self.movable.setdefault(self.priorities.get(user_id, 100), []).append(user_id)
+
+    def squad_of(self, user_id):
+        return self.position[user_id][0]
+
+    def is_violated(self, rule_index):
+        _, rule_type, user_a, user_b = self.rules[rule_index]
+        same_squad = self.squad_of(user_a) == self.squad_of(user_b)
+        return same_squad if rule_type == RULE_APART else not same_squad
+
+    def local_cost(self, *user_ids):
+        rule_indexes = set()
+        for user_id in user_ids:
+            rule_indexes.update(self.partners.get(user_id, ()))
+        return sum(1 for x in rule_indexes if self.is_violated(x))
+
+    def swap(self, user_a, user_b):
+        squad_a, index_a = self.position[user_a]
+        squad_b, index_b = self.position[user_b]
+        self.squads[squad_a][index_a], self.squads[squad_b][index_b] = user_b, user_a
+        self.position[user_a], self.position[user_b] = (squad_b, index_b), (squad_a, index_a)
+
+    def swap_delta(self, user_a, user_b):
+        before = self.local_cost(user_a, user_b)
+        self.swap(user_a, user_b)
+        after = self.local_cost(user_a, user_b)
+        self.swap(user_a, user_b)
+        return after - before
+
+    def swap_candidates(self, user_id, target_squad=None):
+        if target_squad is not None:
+            members = [x for x in self.squads[target_squad][1:] if x is not None]
+            return self.rng.sample(members, min(len(members), self.sample_size))
+
+        # 같은 출력 그룹끼리 우선 교환해서 조별 구성 비율을 유지
+        own_squad = self.squad_of(user_id)
+        same_group = self.movable.get(self.priorities.get(user_id, 100), [])
+        candidates = [x for x in self.rng.sample(same_group, min(len(same_group), self.sample_size))
+                      if self.squad_of(x) != own_squad]
+        if not candidates:
+            others = [x for users in self.movable.values() for x in users]
+            candidates = [x for x in self.rng.sample(others, min(len(others), self.sample_size))
+                          if self.squad_of(x) != own_squad]
+        return candidates
+
+    def together_groups(self):
+        parent = dict()
+
+        def find(user_id):
+            parent.setdefault(user_id, user_id)
+            while parent[user_id] != user_id:
+                parent[user_id] = parent[parent[user_id]]
+                user_id = parent[user_id]
+            return user_id
+
+        for _, rule_type, user_a, user_b in self.rules:
+            if rule_type == RULE_TOGETHER:
+                parent[find(user_a)] = find(user_b)
+
+        groups = dict()
+        for user_id in parent:
+            groups.setdefault(find(user_id), []).append(user_id)
+        return sorted(groups.values(), key=len, reverse=True)
+
+    def place_groups(self):
+        for group in self.together_groups():
+            leader_squads = {self.squad_of(x) for x in group if x in self.leaders}
+            if len(leader_squads) > 1:
+                continue
+            group_set = set(group)
+            if leader_squads:
+                target_squad = leader_squads.pop()
+            else:
+                # 이미 배치된 사용자와 '같은 조 금지' 충돌이 적고, 옮길 인원이 적은 조를 선택
+                conflicts = Counter()
+                for user_id in group:
+                    for rule_index in self.partners[user_id]:
+                        _, rule_type, user_a, user_b = self.rules[rule_index]
+                        other_id = user_b if user_a == user_id else user_a
+                        if rule_type == RULE_APART and (other_id in self.grouped or other_id in self.leaders):
+                            conflicts[self.squad_of(other_id)] += 1
+                staying = Counter(self.squad_of(x) for x in group)
+                target_squad = min(range(len(self.squads)), key=lambda x: (conflicts[x], -staying[x]))
+
+            for user_id in group:
+                if self.squad_of(user_id) == target_squad or user_id in self.leaders:
+                    continue
+                candidates = [x for x in self.squads[target_squad][1:]
+                              if x is not None and x not in group_set and x not in self.grouped]
+                if not candidates:
+                    break
+                candidates = self.rng.sample(candidates, min(len(candidates), self.sample_size))
+                candidate = min(candidates, key=lambda x: (
+                    self.swap_delta(user_id, x),
+                    self.priorities.get(user_id, 100) != self.priorities.get(x, 100)))
+                self.swap(user_id, candidate)
+            self.grouped.update(group_set)
+
+    def repair_rule(self, rule_index):
+        _, rule_type, user_a, user_b = self.rules[rule_index]
+        moves = list()
+        for user_id, other_id in ((user_a, user_b), (user_b, user_a)):
+            if user_id in self.leaders:
+                continue
+            target_squad = self.squad_of(other_id) if rule_type == RULE_TOGETHER else None
+            for candidate in self.swap_candidates(user_id, target_squad):
+                # 이미 묶어서 배치한 사용자는 교환 대상으로 쓰지 않음
+                if candidate in self.leaders or candidate in self.grouped or candidate == other_id:
+                    continue
+                moves.append((self.swap_delta(user_id, candidate), user_id in self.grouped,
+                              self.priorities.get(user_id, 100) != self.priorities.get(candidate, 100),
+                              user_id, candidate))
+
+        if not moves:
+            return False
+        delta, _, _, user_id, candidate = min(moves, key=lambda x: x[:3])
+        if delta >= 0:
+            return False
+        self.swap(user_id, candidate)
+        return True
+
+    def solve(self):
+        self.place_groups()
+        for _ in range(self.max_rounds):
+            violated = [x for x in range(len(self.rules)) if self.is_violated(x)]
+            if not violated:
+                break
+            self.rng.shuffle(violated)
+            improved = False
+            for rule_index in violated:
+                if self.is_violated(rule_index) and self.repair_rule(rule_index):
+                    improved = True
+            if not improved:
+                break
+        return [self.rules[x] for x in range(len(self.rules)) if self.is_violated(x)]
@@ -0,0 +1,364 @@
+"""PyQt5 없이 조편성을 실행하는 명령행 도구
+
+    python -m squad generate --week 2026-10-19 --db lunch_squad.dat
+    python -m squad show --week 2026-10-19 --db lunch_squad.dat
+    python -m squad rule add --type apart 김도윤 "이민우 팀장"
+    python -m squad export-images --from 2026-07-06 --to 2026-09-28 --workers 4
+    python -m squad import-users users.csv
+    python -m squad import --table team_history export/team_history_1760000000000.csv
+    python -m squad export --format jsonl --compress --incremental
+    python -m squad group add 영업팀 --team-member 3 --leader-cycle 2
+    python -m squad generate --all-groups --week 2026-10-19
+    python -m squad show --week 2026-10-19 --query-stats query_stats.json --slow-ms 0
+    python -m squad replay --week 2026-10-05
+    python -m squad simulate --weeks 52 --seeds 1000 --leader-cycle 2 3 4 --team-member 4 5
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+from config import Cache, load_settings
+from database import LunchSquadDB, parse_leader_ids
+from engine import week_label, week_start
+from exporter import EXPORT_TABLES, FORMATS as EXPORT_FORMATS, export_data
+from importer import FORMATS as IMPORT_FORMATS, TABLES as IMPORT_TABLES, import_table, import_users
+from solver import RULE_APART, RULE_TYPES
+
+
+def squad_result(date_label, date_text, team_json_data, leader_ids, created, unsatisfied_rules=(), seed=None):
+    return {
+        "date_label": date_label,
+        "date_text": date_text,
+        "created": created,
+        "seed": seed,
+        "leader_ids": leader_ids,
+        "squads": json.loads(team_json_data) if team_json_data else [],
+        "unsatisfied_rules": [rule_result(x) for x in unsatisfied_rules],
+    }
+
+
+def rule_result(rule):
+    rule_id, rule_type, user_a, user_b = rule
+    return {"id": rule_id, "rule_type": rule_type, "user_a": user_a, "user_b": user_b}
+
+
+def find_user_id(db, user):
+    if user.isdigit():
+        return int(user)
+
+    cursor = db.connect.cursor()
+    cursor.execute("select id from users where name = ? and group_id = ?", (user, db.group_id))
+    user_ids = cursor.fetchall()
+    cursor.close()
+    if len(user_ids) != 1:
+        raise SystemExit(f"사용자를 특정할 수 없습니다. ({user})")
+    return user_ids[0][0]
+
+
+def find_group_id(db, group):
+    for group_id, name, _, _ in db.select_groups():
+        if group in (str(group_id), name):
+            return group_id
+    raise SystemExit(f"그룹이 없습니다. ({group})")
+
+
+def group_result(group):
+    group_id, name, team_member, leader_cycle = group
+    return {"id": group_id, "name": name, "team_member": team_member, "leader_cycle": leader_cycle}
+
+
+def show_week(db, date_text):
+    """해당 주의 조편성 (없으면 빈 목록)"""
+    date_label = week_label(date_text)
+    history = db.select_team_history(date_label=date_label)
+    if not history:
+        return squad_result(date_label, date_text, None, [], False)
+    team_json_data, leader_ids_text, _ = history[0]
+    return squad_result(date_label, date_text, team_json_data, parse_leader_ids(leader_ids_text), False,
+                        seed=db.select_team_seed(date_label))
+
+
+def generate_week(db, date_text, clone_from=None, seed=None):
+    """해당 주의 조편성을 생성 (이미 있으면 기존 조편성을 반환, clone_from: 같은 조편성으로 복제할 주)
+
+    조편성 저장과 조장 정보 변경을 하나의 커밋으로 처리합니다.
+    """
+    date_label = week_label(date_text)
+    if db.select_team_history(date_label=date_label):
+        return show_week(db, date_text)
+
+    with db.transaction():
+        if clone_from:
+            team_json_data, leader_ids_text = db.clone_team_history(date_label, date_text, clone_data=clone_from)
+            if team_json_data is None:
+                raise ValueError(f"{clone_from} 조편성이 없어 복제할 수 없습니다.")
+            leader_ids = parse_leader_ids(leader_ids_text)
+        else:
+            team_json_data, leader_ids = db.insert_team_history(date_label, date_text, seed=seed)
+
+        if leader_ids:
+            db.update_user(leader_ids, last_date=date_text)
+    return squad_result(date_label, date_text, team_json_data, leader_ids, True, db.unsatisfied_rules,
+                        seed=db.select_team_seed(date_label))
+
+
+def command_generate(db, args):
+    date_text = week_start(args.week)
+    if args.all_groups:
+        return command_generate_all_groups(db, args, date_text, week_label(date_text))
+
+    if args.starts is not None:
+        Cache.optimize_starts = args.starts
+    if args.budget is not None:
+        Cache.optimize_budget = args.budget
+    if args.workers is not None:
+        Cache.optimize_workers = args.workers
+
+    clone_from = None
+    if args.clone_last:
+        clone_from = (datetime.strptime(date_text, "%Y-%m-%d") - timedelta(weeks=1)).strftime("%Y-%m-%d")
+    try:
+        return generate_week(db, date_text, clone_from=clone_from, seed=args.seed)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+
+def command_generate_all_groups(db, args, date_text, date_label):
+    groups = {x[0]: x[1] for x in db.select_groups()}
+    results = db.insert_all_groups_history(date_text, workers=args.workers)
+    output = dict()
+    for group_id, (team_json_data, leader_ids, unsatisfied, seed, error) in results.items():
+        output[groups[group_id]] = squad_result(date_label, date_text, team_json_data, leader_ids or [],
+                                                leader_ids is not None, unsatisfied, seed=seed)
+        if error is not None:
+            # 편성하지 못한 그룹은 error 에 이유를 표시 (다른 그룹은 저장됨)
+            output[groups[group_id]]["error"] = error
+            sys.stderr.write(f"{groups[group_id]} 그룹을 조편성하지 못했습니다. ({error})\n")
+    return output
+
+
+def command_show(db, args):
+    return show_week(db, week_start(args.week))
+
+
+def command_replay(db, args):
+    # 저장된 seed 로 다시 계산해서 저장된 조편성과 비교 (DB 는 바꾸지 않음)
+    date_text = week_start(args.week)
+    try:
+        seed, stored, replayed = db.replay_team(date_text)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    return {"date_label": week_label(date_text), "date_text": date_text, "seed": seed, "matches": stored == replayed,
+            "stored": stored, "replayed": replayed}
+
+
+def command_rule(db, args):
+    if args.action == "add":
+        user_a, user_b = [find_user_id(db, x) for x in args.users]
+        db.insert_rule(args.type, user_a, user_b)
+    elif args.action == "delete":
+        for rule_id in args.rule_ids:
+            db.delete_rule(rule_id)
+    return [rule_result(x) for x in db.select_rules()]
+
+
+def command_export_images(db, args):
+    # 화면 없이 이미지를 그리기 위해 offscreen 플랫폼 사용 (QGuiApplication 을 만들기 전에 지정해야 함)
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    from PyQt5.QtGui import QGuiApplication
+    from tabs.squad_grid import export_squad_images
+
+    app = QGuiApplication.instance() or QGuiApplication([])
+    date_from = week_start(args.date_from)
+    date_to = args.date_to or (datetime.strptime(date_from, "%Y-%m-%d") + timedelta(weeks=12)).strftime("%Y-%m-%d")
+    files = export_squad_images(db, date_from, date_to, output_dir=args.output, workers=args.workers)
+    del app
+    return {"date_from": date_from, "date_to": date_to, "output": args.output, "files": files}
+
+
+def command_simulate(db, args):
+    # 시뮬레이션은 DB 에 저장하지 않음 (현재 사용자 명단과 조장 이력에서 시작)
+    from simulator import simulate_rotation
+
+    start_date = week_start(args.date_from)
+    users = db.select_generation_users(db.group_id, start_date)
+    if not users:
+        raise SystemExit("사용자가 없습니다.")
+    leader_weights = db.select_user_leader_weights(db.group_id)
+    return [simulate_rotation(users, start_date, args.weeks, args.seeds, team_number, leader_cycle, seed=args.seed,
+                              workers=args.workers, exact=args.exact, per_user=args.per_user,
+                              leader_weights=leader_weights, new_leader_weight=new_leader_weight)
+            for team_number in args.team_member or [db.team_number]
+            for leader_cycle in args.leader_cycle or [db.leader_cycle]
+            for new_leader_weight in args.new_leader_weight or [Cache.new_leader_weight]]
+
+
+def command_import_users(db, args):
+    return import_users(db, args.path, file_format=args.format, chunk_size=args.chunk_size).as_dict()
+
+
+def command_import(db, args):
+    return import_table(db, args.table, args.path, file_format=args.format, chunk_size=args.chunk_size).as_dict()
+
+
+def command_group(db, args):
+    if args.action == "add":
+        db.insert_group(args.name, team_member=args.team_member, leader_cycle=args.leader_cycle)
+    elif args.action == "update":
+        db.update_group(find_group_id(db, args.group_name), **{x: getattr(args, x) for x in (
+            "team_member", "leader_cycle") if getattr(args, x) is not None})
+    return [group_result(x) for x in db.select_groups()]
+
+
+def command_export(db, args):
+    try:
+        return export_data(db, output_dir=args.output, tables=args.tables, file_format=args.format,
+                           compress=args.compress, date_from=args.date_from, date_to=args.date_to,
+                           incremental=args.incremental)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+
+def dump_query_stats(stats, path):
+    if path == "-":
+        json.dump(stats.as_dict(), sys.stderr, ensure_ascii=False, indent=2)
+        sys.stderr.write("\n")
+    else:
+        stats.dump(path)
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--db", default="lunch_squad.dat", help="SQLite 데이터 파일")
+    common.add_argument("--settings", default="./settings.txt", help="설정 파일 (yaml)")
+    common.add_argument("--group", help="그룹(부서) id 또는 이름 (기본 그룹)")
+    common.add_argument("--query-stats", metavar="PATH",
+                        help="실행한 SQL 문별 횟수/시간/행 수와 느린 SQL 의 실행 계획을 JSON 으로 저장 (- 이면 stderr)")
+    common.add_argument("--slow-ms", type=float, help="실행 계획을 저장할 SQL 시간 기준 (ms, 기본: settings 의 slow_query_ms)")
+
+    parser = argparse.ArgumentParser(prog="squad", description="소통런치 조편성 (headless)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = subparsers.add_parser("generate", parents=[common], help="해당 주의 조편성을 생성합니다.")
+    generate_parser.add_argument("--week", default=datetime.now().strftime("%Y-%m-%d"), help="YYYY-MM-DD")
+    generate_parser.add_argument("--clone-last", action="store_true", help="지난 주와 동일하게 편성합니다.")
+    generate_parser.add_argument("--starts", type=int, help="여러 seed 로 편성해서 가장 좋은 결과를 선택 (시도 횟수)")
+    generate_parser.add_argument("--budget", type=float, help="최적화 제한 시간 (초)")
+    generate_parser.add_argument("--workers", type=int, help="최적화 프로세스 수 (기본: CPU 수)")
+    generate_parser.add_argument("--seed", type=int, help="저장된 seed 로 같은 조편성을 다시 생성합니다.")
+    generate_parser.add_argument("--all-groups", action="store_true",
+                                 help="모든 그룹의 조편성을 동시에 생성합니다. (--workers: 그룹을 처리할 프로세스 수)")
+    generate_parser.set_defaults(handler=command_generate)
+
+    show_parser = subparsers.add_parser("show", parents=[common], help="해당 주의 조편성을 출력합니다.")
+    show_parser.add_argument("--week", default=datetime.now().strftime("%Y-%m-%d"), help="YYYY-MM-DD")
+    show_parser.set_defaults(handler=command_show)
+
+    replay_parser = subparsers.add_parser("replay", parents=[common],
+                                          help="저장된 seed 로 조편성을 다시 계산해서 비교합니다. (저장하지 않음)")
+    replay_parser.add_argument("--week", default=datetime.now().strftime("%Y-%m-%d"), help="YYYY-MM-DD")
+    replay_parser.set_defaults(handler=command_replay)
+
+    export_parser = subparsers.add_parser("export-images", parents=[common],
+                                          help="기간 내 조편성을 주차별 PNG 로 저장합니다. (화면 필요 없음)")
+    export_parser.add_argument("--from", dest="date_from", default=datetime.now().strftime("%Y-%m-%d"),
+                               help="YYYY-MM-DD (해당 주부터)")
+    export_parser.add_argument("--to", dest="date_to", help="YYYY-MM-DD (기본: 시작 주부터 12주)")
+    export_parser.add_argument("--output", default="./output", help="저장 폴더")
+    export_parser.add_argument("--workers", type=int, help="이미지를 그릴 스레드 수")
+    export_parser.set_defaults(handler=command_export_images)
+
+    simulate_parser = subparsers.add_parser("simulate", parents=[common],
+                                            help="조장 순환을 메모리에서 시뮬레이션하고 공정성 통계를 출력합니다. (저장하지 않음)")
+    simulate_parser.add_argument("--from", dest="date_from", default=datetime.now().strftime("%Y-%m-%d"),
+                                 help="YYYY-MM-DD (해당 주부터)")
+    simulate_parser.add_argument("--weeks", type=int, default=52, help="시뮬레이션할 주 수")
+    simulate_parser.add_argument("--seeds", type=int, default=1000, help="서로 다른 seed 로 반복할 횟수")
+    simulate_parser.add_argument("--team-member", type=int, nargs="+", help="비교할 조 수 (기본: 그룹 설정)")
+    simulate_parser.add_argument("--leader-cycle", type=int, nargs="+", help="비교할 조장 주기 (기본: 그룹 설정)")
+    simulate_parser.add_argument("--new-leader-weight", type=float, nargs="+",
+                                 help="비교할 첫 조장 가중치 (기본: settings 의 new_leader_weight)")
+    simulate_parser.add_argument("--seed", type=int, help="같은 결과를 다시 만들 때 사용")
+    simulate_parser.add_argument("--workers", type=int, help="프로세스 수")
+    simulate_parser.add_argument("--exact", action="store_true", help="assign_squad 를 주마다 그대로 실행 (검증용, 느림)")
+    simulate_parser.add_argument("--per-user", action="store_true", help="사용자별 조장 횟수와 대기 주를 포함")
+    simulate_parser.set_defaults(handler=command_simulate)
+
+    import_parser = subparsers.add_parser("import-users", parents=[common],
+                                          help="사용자 명단을 id (없으면 이름) 기준으로 추가/변경합니다. (기존 사용자는 삭제하지 않음)")
+    import_parser.add_argument("path", help="users.txt (YAML), .csv, .jsonl")
+    import_parser.add_argument("--format", choices=IMPORT_FORMATS, help="기본: 확장자로 판단")
+    import_parser.add_argument("--chunk-size", type=int, default=500, help="한 번에 기록할 행 수")
+    import_parser.set_defaults(handler=command_import_users)
+
+    import_data_parser = subparsers.add_parser("import", parents=[common],
+                                               help="export 로 내보낸 사용자, 조편성 이력, 로그 파일을 가져옵니다.")
+    import_data_parser.add_argument("path", help=".csv, .jsonl (.zst 가능)")
+    import_data_parser.add_argument("--table", choices=IMPORT_TABLES, required=True)
+    import_data_parser.add_argument("--format", choices=IMPORT_FORMATS, help="기본: 확장자로 판단")
+    import_data_parser.add_argument("--chunk-size", type=int, default=500, help="한 번에 기록할 행 수")
+    import_data_parser.set_defaults(handler=command_import)
+
+    export_data_parser = subparsers.add_parser("export", parents=[common],
+                                               help="사용자, 조편성 이력, 로그를 CSV/JSONL 로 내보냅니다.")
+    export_data_parser.add_argument("--tables", nargs="+", choices=list(EXPORT_TABLES), default=list(EXPORT_TABLES))
+    export_data_parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    export_data_parser.add_argument("--compress", action="store_true", help="zstandard 로 압축 (.zst)")
+    export_data_parser.add_argument("--from", dest="date_from", help="YYYY-MM-DD (이력/로그)")
+    export_data_parser.add_argument("--to", dest="date_to", help="YYYY-MM-DD (이력/로그, 포함)")
+    export_data_parser.add_argument("--incremental", action="store_true",
+                                    help="지난번 내보낸 이후 추가된 이력/로그만 (--from, --to 와 함께 사용할 수 없음)")
+    export_data_parser.add_argument("--output", default="./export", help="저장 폴더")
+    export_data_parser.set_defaults(handler=command_export)
+
+    group_parser = subparsers.add_parser("group", help="그룹(부서)을 관리합니다.")
+    group_subparsers = group_parser.add_subparsers(dest="action", required=True)
+    group_subparsers.add_parser("list", parents=[common], help="그룹 목록을 출력합니다.")
+    group_add_parser = group_subparsers.add_parser("add", parents=[common], help="그룹을 추가합니다.")
+    group_add_parser.add_argument("name")
+    group_update_parser = group_subparsers.add_parser("update", parents=[common], help="그룹 설정을 변경합니다.")
+    group_update_parser.add_argument("group_name", help="그룹 id 또는 이름")
+    for sub_parser in (group_add_parser, group_update_parser):
+        sub_parser.add_argument("--team-member", type=int, help="조 수 (기본: settings 의 team_member)")
+        sub_parser.add_argument("--leader-cycle", type=int, help="조장 주기 (기본: settings 의 leader_cycle)")
+    group_parser.set_defaults(handler=command_group)
+
+    rule_parser = subparsers.add_parser("rule", help="조편성 규칙을 관리합니다.")
+    rule_subparsers = rule_parser.add_subparsers(dest="action", required=True)
+    rule_subparsers.add_parser("list", parents=[common], help="규칙 목록을 출력합니다.")
+    rule_add_parser = rule_subparsers.add_parser("add", parents=[common], help="규칙을 추가합니다.")
+    rule_add_parser.add_argument("users", nargs=2, help="사용자 id 또는 이름")
+    rule_add_parser.add_argument("--type", choices=RULE_TYPES, default=RULE_APART,
+                                 help="apart: 같은 조 금지, together: 같은 조 배정")
+    rule_delete_parser = rule_subparsers.add_parser("delete", parents=[common], help="규칙을 삭제합니다.")
+    rule_delete_parser.add_argument("rule_ids", nargs="+", type=int, help="규칙 id")
+    rule_parser.set_defaults(handler=command_rule)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    load_settings(args.settings)
+    if args.query_stats:
+        # 연결할 때 실행하는 스키마 확인부터 측정
+        Cache.query_stats = True
+        Cache.slow_query_ms = Cache.slow_query_ms if args.slow_ms is None else args.slow_ms
+    db = LunchSquadDB(args.db)
+    try:
+        if args.group:
+            db.use_group(find_group_id(db, args.group))
+        result = args.handler(db, args)
+    finally:
+        db.close()
+        if args.query_stats:
+            dump_query_stats(db.query_stats(), args.query_stats)
+
+    json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == '__main__':
+    main()
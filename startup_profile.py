@@ -0,0 +1,168 @@
+"""프로그램 시작 시간 측정
+
+    LUNCH_SQUAD_PROFILE=startup_profile.json lunch_squad.exe
+    python lunch_squad.py --profile-startup[=startup_profile.json] [--quit-after-startup]
+
+켜져 있으면 처음 불러오는 모듈별 import 시간과 단계별 시간(설정, DB 열기, 스키마 확인, 탭 생성, 첫 화면 표시)을
+첫 화면이 그려진 뒤 JSON 파일로 저장합니다. 꺼져 있으면 phase()/mark() 는 아무 일도 하지 않습니다.
+--quit-after-startup 은 측정 후 바로 종료합니다. (benchmarks/startup.py 에서 사용)
+"""
+import builtins
+import json
+import os
+import platform
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from importlib.util import resolve_name
+
+ENV_NAME = "LUNCH_SQUAD_PROFILE"
+PROFILE_FLAG = "--profile-startup"
+QUIT_FLAG = "--quit-after-startup"
+DEFAULT_REPORT = "startup_profile.json"
+
+profiler = None
+
+
+class StartupProfiler:
+    def __init__(self, path, quit_after_startup=False):
+        self.path = path
+        self.quit_after_startup = quit_after_startup
+        self.started = time.perf_counter()
+        self.phases = list()
+        self.marks = list()
+        self.imports = dict()
+        self.import_stack = list()
+        self.depth = 0
+        self.original_import = None
+        self.finished = False
+
+    def elapsed_ms(self, moment=None):
+        return round(((moment or time.perf_counter()) - self.started) * 1000, 3)
+
+    def install_import_hook(self):
+        self.original_import = builtins.__import__
+        builtins.__import__ = self.timed_import
+
+    def remove_import_hook(self):
+        if self.original_import is not None and builtins.__import__ == self.timed_import:
+            builtins.__import__ = self.original_import
+        self.original_import = None
+
+    def timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # 이미 불러온 모듈은 시간을 재지 않음 (처음 불러올 때만 기록)
+        module_name = name
+        if level:
+            try:
+                module_name = resolve_name("." * level + name, (globals or {}).get("__package__"))
+            except (ImportError, ValueError):
+                module_name = None
+        if not module_name or module_name in sys.modules:
+            return self.original_import(name, globals, locals, fromlist, level)
+
+        # 자기 시간(self) = 전체 시간 - 안에서 불러온 다른 모듈의 시간 (python -X importtime 과 같은 방식)
+        self.import_stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            return self.original_import(name, globals, locals, fromlist, level)
+        finally:
+            duration = time.perf_counter() - started
+            nested = self.import_stack.pop()
+            if self.import_stack:
+                self.import_stack[-1] += duration
+            if module_name not in self.imports:
+                self.imports[module_name] = (duration, duration - nested, len(self.import_stack))
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        self.depth += 1
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            self.phases.append({
+                "name": name,
+                "depth": self.depth,
+                "start_ms": self.elapsed_ms(started),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            })
+
+    def mark(self, name):
+        self.marks.append({"name": name, "at_ms": self.elapsed_ms()})
+
+    def report(self):
+        imports = sorted(self.imports.items(), key=lambda x: x[1][0], reverse=True)
+        return {
+            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "frozen": bool(getattr(sys, "frozen", False) or "__compiled__" in globals()),
+            "total_ms": self.elapsed_ms(),
+            "phases": sorted(self.phases, key=lambda x: x["start_ms"]),
+            "marks": self.marks,
+            "import_count": len(self.imports),
+            "import_total_ms": round(sum(x[0] for x in self.imports.values() if x[2] == 0) * 1000, 3),
+            "imports": [{"module": name, "cumulative_ms": round(cumulative * 1000, 3),
+                         "self_ms": round(own * 1000, 3)} for name, (cumulative, own, _) in imports],
+        }
+
+    def finish(self):
+        """측정을 끝내고 보고서를 저장 (두 번째 호출부터는 무시)"""
+        if self.finished:
+            return None
+        self.finished = True
+        self.remove_import_hook()
+        report = self.report()
+        with open(self.path, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        return report
+
+
+def parse_options(argv):
+    """(보고서 경로 또는 None, 측정 후 종료 여부, 측정 옵션을 뺀 argv)"""
+    path = os.environ.get(ENV_NAME) or None
+    quit_after_startup = False
+    rest = list()
+    for arg in argv:
+        if arg == PROFILE_FLAG:
+            path = path or DEFAULT_REPORT
+        elif arg.startswith(PROFILE_FLAG + "="):
+            path = arg.split("=", 1)[1] or DEFAULT_REPORT
+        elif arg == QUIT_FLAG:
+            quit_after_startup = True
+        else:
+            rest.append(arg)
+    return path, quit_after_startup, rest
+
+
+def start(argv=None):
+    """환경 변수나 옵션이 있으면 측정을 시작하고, 측정 옵션을 뺀 argv 를 반환합니다."""
+    global profiler
+    path, quit_after_startup, rest = parse_options(sys.argv if argv is None else argv)
+    if path and profiler is None:
+        profiler = StartupProfiler(path, quit_after_startup)
+        profiler.install_import_hook()
+    return rest
+
+
+def enabled():
+    return profiler is not None and not profiler.finished
+
+
+def phase(name):
+    return profiler.phase(name) if enabled() else nullcontext()
+
+
+def mark(name):
+    if enabled():
+        profiler.mark(name)
+
+
+def finish():
+    return profiler.finish() if enabled() else None
+
+
+def quit_after_startup():
+    return profiler is not None and profiler.quit_after_startup
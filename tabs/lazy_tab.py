@@ -0,0 +1,30 @@
+from PyQt5.QtWidgets import QVBoxLayout, QWidget
+
+
+class LazyTab(QWidget):
+    """탭이 처음 선택될 때 실제 탭 위젯을 만들고 데이터를 불러옴"""
+
+    def __init__(self, factory):
+        super().__init__()
+        self.factory = factory
+        self.widget = None
+
+        self.main_layout = QVBoxLayout()
+        self.main_layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(self.main_layout)
+
+    def is_loaded(self):
+        return self.widget is not None
+
+    def load(self):
+        if self.widget is None:
+            self.widget = self.factory()
+            self.main_layout.addWidget(self.widget)
+        return self.widget
+
+    def reset(self):
+        # 다음에 load() 할 때 탭을 새로 만듦 (그룹 변경 등)
+        if self.widget is not None:
+            self.main_layout.removeWidget(self.widget)
+            self.widget.deleteLater()
+            self.widget = None
@@ -0,0 +1,69 @@
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+
+class PagedTableModel(QAbstractTableModel):
+    """QTableView 가 스크롤할 때(fetchMore) 다음 페이지만 DB 에서 읽어오는 모델
+
+    상속한 클래스는 headers, columns 와 fetch_page(rows, limit) 를 정의합니다.
+    """
+    headers = []
+    columns = []
+    page_size = 200
+
+    def __init__(self, db):
+        super().__init__()
+        self.db = db
+        self.rows = list()
+        self.exhausted = False
+
+    def fetch_page(self, rows, limit):
+        raise NotImplementedError
+
+    def display_value(self, row, column):
+        value = row[self.columns[column]]
+        return "-" if value is None else str(value)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return self.display_value(self.rows[index.row()], index.column())
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.headers[section]
+        return str(section + 1)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.exhausted:
+            return
+
+        rows = self.fetch_page(self.rows, self.page_size)
+        if len(rows) < self.page_size:
+            self.exhausted = True
+        if rows:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(rows) - 1)
+            self.rows.extend(rows)
+            self.endInsertRows()
+
+    def reload(self):
+        self.beginResetModel()
+        self.rows = list()
+        self.exhausted = False
+        self.endResetModel()
+        self.fetchMore()
+
+    def row_data(self, row):
+        return self.rows[row] if 0 <= row < len(self.rows) else None
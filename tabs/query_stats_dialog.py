@@ -0,0 +1,96 @@
+from datetime import datetime
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem, \
+    QHeaderView, QAbstractItemView, QLabel, QCheckBox
+
+from utils import show_dialog
+
+COLUMNS = (("sql", "SQL"), ("count", "횟수"), ("total_ms", "전체(ms)"), ("max_ms", "최대(ms)"), ("avg_ms", "평균(ms)"),
+           ("rows", "행"), ("plan", "실행 계획"))
+SCAN_BACKGROUND = QColor("#ffd9d9")
+
+
+class QueryStatsDialog(QDialog):
+    """SQL 문별 실행 통계 (전체 시간 순, 테이블 전체를 읽는 SQL 은 빨간색)"""
+
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.setWindowTitle("쿼리 통계")
+        self.resize(1000, 500)
+
+        self.main_layout = QVBoxLayout()
+        self.setLayout(self.main_layout)
+
+        self.button_layout = QHBoxLayout()
+        self.enable_checkbox = QCheckBox("측정")
+        self.enable_checkbox.setChecked(self.db.query_stats() is not None)
+        self.enable_checkbox.toggled.connect(self.on_enable_toggled)
+        self.button_layout.addWidget(self.enable_checkbox)
+
+        self.reload_button = QPushButton("새로고침")
+        self.reload_button.clicked.connect(self.load_stats)
+        self.button_layout.addWidget(self.reload_button)
+
+        self.reset_button = QPushButton("초기화")
+        self.reset_button.clicked.connect(self.reset_stats)
+        self.button_layout.addWidget(self.reset_button)
+
+        self.save_button = QPushButton("JSON 저장")
+        self.save_button.clicked.connect(self.save_stats)
+        self.button_layout.addWidget(self.save_button)
+
+        self.summary_label = QLabel()
+        self.button_layout.addStretch()
+        self.button_layout.addWidget(self.summary_label)
+        self.main_layout.addLayout(self.button_layout)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels([x[1] for x in COLUMNS])
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setWordWrap(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.main_layout.addWidget(self.table)
+
+        self.load_stats()
+
+    def on_enable_toggled(self, checked):
+        if checked:
+            self.db.enable_query_stats()
+        else:
+            self.db.disable_query_stats()
+        self.load_stats()
+
+    def load_stats(self):
+        stats = self.db.query_stats()
+        self.reset_button.setEnabled(stats is not None)
+        self.save_button.setEnabled(stats is not None)
+        data = stats.as_dict() if stats else {"statements": [], "count": 0, "total_ms": 0, "full_scans": []}
+        self.summary_label.setText(f"{data['count']} 회, {data['total_ms']:.1f} ms, 전체 SCAN {len(data['full_scans'])} 개")
+
+        self.table.setRowCount(len(data["statements"]))
+        for row, statement in enumerate(data["statements"]):
+            for column, (key, _) in enumerate(COLUMNS):
+                value = statement[key]
+                if key == "plan":
+                    value = " / ".join(value) if value else ""
+                item = QTableWidgetItem(str(value))
+                item.setToolTip(str(value))
+                if key != "sql" and key != "plan":
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                if statement["full_scan"]:
+                    item.setBackground(SCAN_BACKGROUND)
+                self.table.setItem(row, column, item)
+
+    def reset_stats(self):
+        self.db.query_stats().reset()
+        self.load_stats()
+
+    def save_stats(self):
+        filename = f"query_stats_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        self.db.query_stats().dump(f"./{filename}")
+        show_dialog("쿼리 통계", f"저장되었습니다.\n(file: {filename})")
@@ -0,0 +1,126 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import zip_longest
+
+from PyQt5.QtCore import Qt, QRectF, QSize
+from PyQt5.QtGui import QColor, QPainter, QPen, QImage, QFont, QFontMetrics
+from PyQt5.QtWidgets import QWidget, QSizePolicy
+
+from config import Cache
+
+CELL_BACKGROUND = QColor("white")
+HEADER_COLOR = QColor("#3333ff")
+HEADER_BORDER_COLOR = QColor("blue")
+LEADER_BACKGROUND = QColor("#ffff55")
+FRAME_COLOR = QColor("#3e3e3e")
+FRAME_MARGIN = 3
+
+
+def squad_rows(squads):
+    """조 목록을 화면에 그릴 행 목록으로 변환 (첫 행은 'N 조' 헤더)"""
+    header = [f"{index + 1} 조" for index in range(len(squads))]
+    return [header] + [[(x or "").strip() for x in row] for row in zip_longest(*squads)]
+
+
+def paint_squad_grid(painter, rect, squads, leader_row=None):
+    """rect 영역에 조편성 표를 그립니다. (화면 표시와 이미지 저장에서 같이 사용)"""
+    if not squads:
+        return
+
+    leader_row = Cache.leader_display_row if leader_row is None else leader_row
+    rows = squad_rows(squads)
+    cell_width = rect.width() / len(rows[0])
+    cell_height = rect.height() / len(rows)
+
+    painter.save()
+    painter.fillRect(rect, CELL_BACKGROUND)
+    for index, row_data in enumerate(rows):
+        top = rect.top() + index * cell_height
+        for column, x in enumerate(row_data):
+            cell = QRectF(rect.left() + column * cell_width, top, cell_width, cell_height)
+            if index == 0:
+                painter.setPen(QPen(HEADER_BORDER_COLOR, 1))
+                painter.drawLine(cell.bottomLeft(), cell.bottomRight())
+                painter.setPen(HEADER_COLOR)
+            else:
+                if x and index == leader_row:
+                    painter.fillRect(cell, LEADER_BACKGROUND)
+                painter.setPen(QColor("black"))
+            painter.drawText(cell, Qt.AlignCenter, x)
+    painter.restore()
+
+
+def squad_image_size(squads, font=None):
+    """이미지로 저장할 때의 크기 (가장 긴 이름 기준으로 셀 크기를 맞춤)"""
+    rows = squad_rows(squads)
+    metrics = QFontMetrics(font or QFont())
+    cell_width = max(160, max(metrics.horizontalAdvance(x) for row in rows for x in row) + 40)
+    cell_height = max(40, metrics.height() + 24)
+    return QSize(cell_width * len(rows[0]) + FRAME_MARGIN * 2, cell_height * len(rows) + FRAME_MARGIN * 2)
+
+
+def render_squad_image(squads, size=None, font=None):
+    """화면 없이 (offscreen) 조편성 표를 QImage 로 그립니다."""
+    size = size or squad_image_size(squads, font)
+    image = QImage(size, QImage.Format_ARGB32)
+    image.fill(FRAME_COLOR)
+
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.TextAntialiasing)
+    if font:
+        painter.setFont(font)
+    rect = QRectF(image.rect()).adjusted(FRAME_MARGIN, FRAME_MARGIN, -FRAME_MARGIN, -FRAME_MARGIN)
+    paint_squad_grid(painter, rect, squads)
+    painter.end()
+    return image
+
+
+def save_squad_image(squads, path):
+    if not render_squad_image(squads).save(path):
+        raise OSError(f"이미지를 저장하지 못했습니다. ({path})")
+    return path
+
+
+def export_squad_images(db, date_from, date_to, output_dir="./output", workers=None):
+    """date_from ~ date_to 사이의 조편성을 주차별 PNG 로 저장 (workers 를 주면 스레드 풀에서 그림)
+
+    QGuiApplication 이 먼저 만들어져 있어야 합니다. (화면이 없으면 QT_QPA_PLATFORM=offscreen)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(json.loads(team_data), os.path.join(output_dir, f"{date_label}.png"))
+            for date_label, team_data, _, _ in db.select_team_history_range(date_from, date_to)]
+
+    if not workers or workers <= 1:
+        return [save_squad_image(squads, path) for squads, path in jobs]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda job: save_squad_image(*job), jobs))
+
+
+class SquadGridWidget(QWidget):
+    """조편성 결과를 하나의 위젯에 직접 그리는 표 (셀마다 QLabel 을 만들지 않음)"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.squads = list()
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+
+    def set_squads(self, squads):
+        squads = squads or list()
+        if squads != self.squads:
+            self.squads = squads
+            self.updateGeometry()
+            self.update()
+
+    def sizeHint(self):
+        if not self.squads:
+            return QSize(0, 0)
+        rows = squad_rows(self.squads)
+        metrics = self.fontMetrics()
+        width = max(metrics.horizontalAdvance(x) for row in rows for x in row) + 10
+        return QSize(width * len(rows[0]), (metrics.height() + 6) * len(rows))
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        paint_squad_grid(painter, QRectF(self.rect()), self.squads)
+        painter.end()
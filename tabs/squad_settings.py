@@ -1,9 +1,10 @@
 from datetime import datetime, timedelta
 
-from PyQt5.QtCore import Qt, QDate
-from PyQt5.QtWidgets import QVBoxLayout, QTableWidgetItem, QTableWidget, QWidget, QButtonGroup, QRadioButton, \
-    QHBoxLayout, QPushButton, QDialog, QLabel, QDialogButtonBox, QLineEdit, QDateEdit, QCheckBox, QSpinBox, QHeaderView
+from PyQt5.QtCore import QDate
+from PyQt5.QtWidgets import QVBoxLayout, QTableView, QAbstractItemView, QWidget, QHBoxLayout, QPushButton, \
+    QDateEdit, QCheckBox, QHeaderView
 
+from tabs.paged_model import PagedTableModel
 from utils import convert_to_date
 
 
@@ -29,63 +30,53 @@ class SquadSettingsTab(QWidget):
         self.button_layout.addWidget(self.reload_button)
         self.button_layout.addStretch()
 
+        # 기간 조회
+        self.range_checkbox = QCheckBox("기간")
+        self.range_checkbox.toggled.connect(self.reload_users)
+        self.button_layout.addWidget(self.range_checkbox)
+
+        self.date_from = QDateEdit()
+        self.date_from.setCalendarPopup(True)
+        self.date_from.setDate(QDate.currentDate().addMonths(-3))
+        self.date_from.dateChanged.connect(self.on_range_changed)
+        self.button_layout.addWidget(self.date_from)
+
+        self.date_to = QDateEdit()
+        self.date_to.setCalendarPopup(True)
+        self.date_to.setDate(QDate.currentDate().addMonths(1))
+        self.date_to.dateChanged.connect(self.on_range_changed)
+        self.button_layout.addWidget(self.date_to)
+
         self.main_layout.addLayout(self.button_layout)
 
-        # 사용자 명단 테이블 추가
-        self.squad_table = QTableWidget()
-        self.squad_table.setColumnCount(4)
-        self.squad_table.setHorizontalHeaderLabels(["선택", "date_label", "leaders", "date_text"])
-        self.squad_table.setEditTriggers(QTableWidget.NoEditTriggers)  # 기본적으로 편집 불가능
+        # 조편성 이력 테이블 추가 (스크롤할 때 필요한 만큼만 불러옴)
+        self.squad_model = HistoryTableModel(self.db)
+        self.squad_table = QTableView()
+        self.squad_table.setModel(self.squad_model)
+        self.squad_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.squad_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.squad_table.setEditTriggers(QAbstractItemView.NoEditTriggers)  # 기본적으로 편집 불가능
+        self.squad_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.main_layout.addWidget(self.squad_table)
-        self.squad_table.verticalHeader().setVisible(False)
 
-        # 사용자 목록 불러오기
+        # 조편성 이력 불러오기
         self.load_user_data()
 
     def load_user_data(self):
         self.delete_button.setEnabled(True)
 
-        user_data = self.db.select_team_history()
-        self.squad_table.setRowCount(len(user_data))
-        self.squad_table.cellClicked.connect(self.on_cell_clicked)
-        self.squad_table.verticalHeader().setVisible(True)
-
-        self.radio_button_group = QButtonGroup(self.squad_table)
-        self.radio_button_group.setExclusive(True)
-        for row_index, (squad_id, date_label, leader_ids, date_text) in enumerate(user_data):
-            radio_button_cell = self.create_radio_button_cell(self.radio_button_group, row_index)
-            self.squad_table.setCellWidget(row_index, 0, radio_button_cell)
-            self.squad_table.setColumnWidth(0, 100)
-
-            name_item = QTableWidgetItem(date_label)
-            self.squad_table.setItem(row_index, 1, name_item)
-            self.squad_table.setColumnWidth(1, 200)
-
-            last_date_item = QTableWidgetItem(str(leader_ids))
-            self.squad_table.setItem(row_index, 2, last_date_item)
-            self.squad_table.setColumnWidth(2, 200)
-
-            date_text_item = QTableWidgetItem(str(date_text))
-            self.squad_table.setItem(row_index, 3, date_text_item)
-            self.squad_table.setColumnWidth(3, 200)
-
-    def on_cell_clicked(self, row, column):
-        if column == 0:
-            radio_button = self.user_table.cellWidget(row, column)
-            if radio_button:
-                radio_button.setChecked(True)
-
-    def create_radio_button_cell(self, button_group, row_index):
-        radio_button = QRadioButton()
-        radio_button.setStyleSheet("margin: auto;")
-        button_group.addButton(radio_button, row_index)
-        return radio_button
+        if self.range_checkbox.isChecked():
+            self.squad_model.set_range(convert_to_date(self.date_from.date()), convert_to_date(self.date_to.date()))
+        else:
+            self.squad_model.set_range(None, None)
+        self.squad_model.reload()
 
-    def reload_users(self):
-        # 테이블의 데이터를 초기화
-        self.squad_table.setRowCount(0)
+    def on_range_changed(self):
+        if self.range_checkbox.isChecked():
+            self.reload_users()
 
-        # 사용자 데이터를 다시 로드
+    def reload_users(self):
+        # 조편성 이력을 다시 로드
         self.load_user_data()
 
     def delete_squad_data(self):
@@ -116,13 +107,29 @@ class SquadSettingsTab(QWidget):
                 self.reload_users()
 
     def get_selected_row(self):
-        for row in range(self.squad_table.rowCount()):
-            radio_button = self.squad_table.cellWidget(row, 0)
-            if radio_button and radio_button.isChecked():
-                return row
-        return None
+        selected_rows = self.squad_table.selectionModel().selectedRows()
+        return selected_rows[0].row() if selected_rows else None
 
     def get_data(self, row):
-        id_item = self.squad_table.item(row, 1)
-        date_text = self.squad_table.item(row, 3)
-        return (id_item.text(), date_text.text()) if id_item else (None, None)
+        history = self.squad_model.row_data(row)
+        return (history[1], history[3]) if history else (None, None)
+
+
+class HistoryTableModel(PagedTableModel):
+    headers = ["date_label", "leaders", "date_text"]
+    columns = [1, 2, 3]
+    page_size = 100
+
+    def __init__(self, db):
+        super().__init__(db)
+        self.date_from = None
+        self.date_to = None
+
+    def set_range(self, date_from, date_to):
+        self.date_from, self.date_to = date_from, date_to
+
+    def fetch_page(self, rows, limit):
+        # 마지막으로 읽은 행 다음부터 조회 (date_text, id 기준)
+        before = (rows[-1][3], rows[-1][0]) if rows else None
+        return self.db.select_team_history_page(limit=limit, before=before, date_from=self.date_from,
+                                                date_to=self.date_to)
@@ -1,12 +1,15 @@
 import json
 import os
+import sqlite3
 from datetime import datetime, timedelta
 
-from PyQt5.QtCore import Qt, QDate, QRect
-from PyQt5.QtGui import QPixmap
+from PyQt5.QtCore import Qt, QDate, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+from PyQt5.QtGui import QColor, QTextCharFormat
 from PyQt5.QtWidgets import QPushButton, QLabel, QHBoxLayout, QWidget, QVBoxLayout, QCalendarWidget
 
-from utils import convert_to_date, show_dialog, Cache
+from database import LunchSquadDB, parse_leader_ids
+from tabs.squad_grid import SquadGridWidget, save_squad_image
+from utils import convert_to_date, show_dialog
 
 
 class TeamResultLayout(QVBoxLayout):
@@ -17,79 +20,46 @@ class TeamResultLayout(QVBoxLayout):
         self.setContentsMargins(0, 0, 0, 0)
         self.data = None
 
+        self.grid = SquadGridWidget()
+        self.addWidget(self.grid)
+
     def clear_layout(self):
-        """ 레이아웃에 추가된 모든 위젯과 하위 레이아웃을 삭제합니다. """
-        while self.count():
-            child = self.takeAt(0)  # 레이아웃에서 항목을 가져옵니다.
-
-            # 위젯이면 삭제
-            if child.widget():
-                child.widget().deleteLater()  # 위젯 메모리에서 삭제
-            # 하위 레이아웃이 있는 경우 (재귀적으로 삭제)
-            elif child.layout():
-                self._clear_sub_layout(child.layout())
-
-    def _clear_sub_layout(self, layout):
-        """재귀적으로 하위 레이아웃의 모든 위젯과 레이아웃을 삭제합니다."""
-        while layout.count():
-            child = layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
-            elif child.layout():
-                self._clear_sub_layout(child.layout())
-        layout.deleteLater()
+        """ 표시 중인 조편성 표를 비웁니다. (위젯은 재사용) """
+        self.grid.set_squads(None)
 
     def select_team_member(self, date_label="", date_text=""):
         self.clear_layout()  # 레이아웃 정리
-        self.data = []  # 데이터 초기화
-
-        result = self.db.select_team_history(date_label=date_label, date_text=date_text)
-        try:
-            self.data = json.loads(result[0][0])
-            if self.data:
-                self.show_team_member()
-        except IndexError:
-            self.data = list()
+        self.data = self.db.select_team_squads(date_label=date_label, date_text=date_text) or list()
+        if self.data:
+            self.show_team_member()
 
     def insert_team_member(self, date_label, selected_date, clone_date=None):
         self.clear_layout()  # 레이아웃 정리
         self.data = []  # 데이터 초기화
 
-        if clone_date:
-            team_json_data, leader_ids = self.db.clone_team_history(date_label=date_label,
-                                                                    date_text=selected_date,
-                                                                    clone_data=clone_date)
-            leader_ids = [int(x.strip()) for x in leader_ids.split(",") if x.strip()]
-        else:
-            team_json_data, leader_ids = self.db.insert_team_history(date_label, selected_date)
+        # 조편성 저장과 조장 정보 변경을 하나의 커밋으로 처리
+        with self.db.transaction():
+            if clone_date:
+                team_json_data, leader_ids = self.db.clone_team_history(date_label=date_label,
+                                                                        date_text=selected_date,
+                                                                        clone_data=clone_date)
+                leader_ids = parse_leader_ids(leader_ids)
+            else:
+                team_json_data, leader_ids = self.db.insert_team_history(date_label, selected_date)
 
-        if leader_ids:
-            self.db.update_user(leader_ids, last_date=selected_date)
+            if leader_ids:
+                self.db.update_user(leader_ids, last_date=selected_date)
 
         self.data = json.loads(team_json_data)
         if self.data:
             self.show_team_member()
 
+        if self.db.unsatisfied_rules:
+            show_dialog("조편성 규칙", f"만족하지 못한 조편성 규칙이 있습니다.\n"
+                                  f"(규칙: {', '.join(str(x[0]) for x in self.db.unsatisfied_rules)})")
+
     def show_team_member(self):
-        [x.insert(0, f"{index + 1} 조") for index, x in enumerate(self.data)]
-        for index, row_data in enumerate(zip(*self.data)):
-            row_layout = QHBoxLayout()
-            row_layout.setSpacing(0)
-            for x in row_data:
-                x = x or ""
-
-                stylesheet = ["background-color: white;"]
-                if index == 0:
-                    stylesheet.append("color: #3333ff; border-bottom: 1px solid blue;")
-                elif x and index == Cache.leader_display_row:
-                    stylesheet = ["background-color: #ffff55;"]
-
-                label_number = QLabel(x.strip())
-                label_number.setAlignment(Qt.AlignCenter)
-                label_number.setStyleSheet("".join(stylesheet))
-                row_layout.addWidget(label_number)
-
-            self.addLayout(row_layout)
+        self.grid.set_squads(self.data)
 
     def select_last_week_data(self, last_week):
         try:
@@ -99,6 +69,49 @@ class TeamResultLayout(QVBoxLayout):
             return None
 
 
+# 달력에 표시하는 주 상태별 배경색
+WEEK_COLORS = {
+    "generated": "#d6e4ff",  # 조편성 완료
+    "clone": "#fff2b3",  # 지난 주와 동일하게 편성 가능
+    "pending": "#ffd9d9",  # 조편성 필요
+}
+
+
+class MonthPrefetchSignals(QObject):
+    # (요청 번호, 조편성 목록), 읽지 못하면 조편성 목록은 None
+    loaded = pyqtSignal(int, object)
+
+
+class MonthPrefetchTask(QRunnable):
+    """달력 페이지의 조편성을 별도의 읽기 전용 연결로 읽음 (화면 스레드가 멈추지 않도록)
+
+    history_cache 는 화면 스레드에서만 사용하므로 읽은 결과는 loaded 시그널로 넘깁니다.
+    """
+
+    def __init__(self, db_name, group_id, serial, date_from, date_to):
+        super().__init__()
+        self.db_name = db_name
+        self.group_id = group_id
+        self.serial = serial
+        self.date_from = date_from
+        self.date_to = date_to
+        self.signals = MonthPrefetchSignals()
+
+    def run(self):
+        histories = None
+        try:
+            reader = LunchSquadDB(self.db_name, read_only=True)
+            try:
+                reader.group_id = self.group_id
+                histories = reader.select_team_history_range(self.date_from, self.date_to)
+            finally:
+                reader.close()
+        except (sqlite3.Error, ValueError):
+            # 스레드에서 발생한 예외는 프로그램을 종료시키므로 화면 스레드에서 다시 읽도록 None 을 넘김
+            pass
+        self.signals.loaded.emit(self.serial, histories)
+
+
 class TeamCreationTab(QWidget):
     week_label = None
     first_monday = None
@@ -129,6 +142,7 @@ class TeamCreationTab(QWidget):
         self.calendar.setGridVisible(True)
         self.calendar.setVerticalHeaderFormat(QCalendarWidget.NoVerticalHeader)  # 주 번호를 제거
         self.calendar.clicked.connect(self.on_date_selected)
+        self.calendar.currentPageChanged.connect(self.on_page_changed)
 
         next_sunday = QDate.currentDate().addDays(21)
         while next_sunday.dayOfWeek() != 7:
@@ -164,7 +178,82 @@ class TeamCreationTab(QWidget):
         self.main_layout.addWidget(self.right_widget, 1)
         self.setLayout(self.main_layout)
 
+        # 달력 페이지의 조편성을 한 번에 읽어 두는 작업은 화면을 그린 다음으로 미루고 백그라운드에서 읽음
+        self.db = db
+        self.prefetch_serial = 0
+        self.prefetch_range = None
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.setInterval(0)
+        self.prefetch_timer.timeout.connect(self.prefetch_month)
+        self.prefetch_timer.start()
+
+    def showEvent(self, event):
+        # 다른 탭에서 이력을 삭제했을 수 있으므로 다시 표시
+        super().showEvent(event)
+        self.prefetch_timer.start()
+
+    def on_page_changed(self, year, month):
+        self.prefetch_timer.start()
+
+    def prefetch_month(self):
+        # 다른 프로그램(서버, 다른 PC)이 조편성을 바꿨으면 읽어 둔 이력을 비움
+        self.db.refresh()
+        first_of_month = QDate(self.calendar.yearShown(), self.calendar.monthShown(), 1)
+        # 달력에 보이는 6주와 첫 주의 지난 주(복제 원본)까지
+        date_from = first_of_month.addDays(1 - first_of_month.dayOfWeek() - 7)
+        date_to = date_from.addDays(7 * 8 - 1)
+        # 읽는 동안 페이지를 넘기거나 조편성을 만들면 이전 요청의 결과는 버림
+        self.prefetch_serial += 1
+        self.prefetch_range = (date_from, date_to)
+        task = MonthPrefetchTask(self.db.db_name, self.db.group_id, self.prefetch_serial,
+                                 convert_to_date(date_from), convert_to_date(date_to))
+        task.signals.loaded.connect(self.on_month_loaded)
+        QThreadPool.globalInstance().start(task)
+
+    def on_month_loaded(self, serial, histories):
+        if serial != self.prefetch_serial:
+            return
+        if self.db.refresh():
+            # 읽는 동안 다른 프로그램이 커밋했으면 이전 내용일 수 있으므로 다시 읽음
+            self.prefetch_timer.start()
+            return
+        date_from, date_to = self.prefetch_range
+        if histories is None:
+            # 읽기 전용으로 열 수 없으면 (파일이 잠긴 경우 등) 화면 스레드에서 읽음
+            exists_weeks = self.db.prefetch_team_history(convert_to_date(date_from), convert_to_date(date_to))
+        else:
+            exists_weeks = self.db.fill_history_cache(convert_to_date(date_from), convert_to_date(date_to),
+                                                      histories)
+        self.update_week_formats(date_from, date_to, exists_weeks)
+
+    def update_week_formats(self, date_from, date_to, exists_weeks):
+        self.calendar.setDateTextFormat(QDate(), QTextCharFormat())  # 기존 표시 초기화
+        this_week_date = (datetime.now() - timedelta(days=datetime.now().weekday())).strftime("%Y-%m-%d")
+
+        monday = date_from.addDays(7)
+        while monday <= date_to:
+            date_text = convert_to_date(monday)
+            if date_text in exists_weeks:
+                status = "generated"
+            elif date_text < this_week_date:
+                status = None
+            elif convert_to_date(monday.addDays(-7)) in exists_weeks:
+                status = "clone"
+            else:
+                status = "pending"
+
+            if status:
+                text_format = QTextCharFormat()
+                text_format.setBackground(QColor(WEEK_COLORS[status]))
+                for day in range(7):
+                    self.calendar.setDateTextFormat(monday.addDays(day), text_format)
+            monday = monday.addDays(7)
+
     def on_date_selected(self, date):
+        if self.db.refresh():
+            # 다른 프로그램이 조편성을 바꿨으면 달력 표시도 다시 읽음
+            self.prefetch_timer.start()
         self.selected_date = date
         self.get_week_number(date)
         self.week_label = f"{self.first_monday.year()}년 {self.first_monday.month()}월 {self.week_number}주차"
@@ -187,32 +276,22 @@ class TeamCreationTab(QWidget):
 
     def generate_team(self):
         if self.week_label:
+            # 저장하기 전에 시작한 읽기는 이 주를 빈 주로 읽었을 수 있으므로 저장 전에 버림
+            self.prefetch_serial += 1
             self.result_layout.insert_team_member(date_label=self.week_label, selected_date=self.this_week_date)
+            self.prefetch_timer.start()
 
     def generate_team_as_same(self):
         if self.week_label:
+            self.prefetch_serial += 1
             self.result_layout.insert_team_member(date_label=self.week_label, selected_date=self.this_week_date,
                                                   clone_date=self.last_week_date)
+            self.prefetch_timer.start()
 
     def capture_squad(self):
-        parent_widget = self.left_layout.parentWidget()
-        if not parent_widget:
-            raise ValueError("Layout must be set to a parent widget.")
-
-        # 레이아웃의 영역(Rect)을 계산
-        layout_rect = QRect()
-        for i in range(self.left_layout.count()):
-            item = self.left_layout.itemAt(i)
-            widget = item.widget()
-            if widget:
-                layout_rect = layout_rect.united(widget.geometry())
-
-        # 부모 위젯에서 레이아웃 부분 캡처
-        pixmap = QPixmap(parent_widget.size())
-        parent_widget.render(pixmap)
-        cropped_pixmap = pixmap.copy(layout_rect)
+        # 화면에 보이는 위젯 대신 같은 모양으로 이미지에 직접 그려서 저장
         os.makedirs("./output", exist_ok=True)
-        cropped_pixmap.save(f"./output/{self.week_label}.png")
+        save_squad_image(self.result_layout.data, f"./output/{self.week_label}.png")
         show_dialog("완료", "캡쳐가 완료되었습니다!")
 
     def get_week_number(self, date):
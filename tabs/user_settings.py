@@ -1,9 +1,8 @@
-from datetime import datetime
-
 from PyQt5.QtCore import Qt, QDate
-from PyQt5.QtWidgets import QVBoxLayout, QTableWidgetItem, QTableWidget, QWidget, QButtonGroup, QRadioButton, \
-    QHBoxLayout, QPushButton, QDialog, QLabel, QDialogButtonBox, QLineEdit, QDateEdit, QCheckBox, QSpinBox
+from PyQt5.QtWidgets import QVBoxLayout, QTableView, QAbstractItemView, QWidget, QHBoxLayout, QPushButton, \
+    QDialog, QLabel, QDialogButtonBox, QLineEdit, QDateEdit, QCheckBox, QSpinBox, QDoubleSpinBox
 
+from tabs.paged_model import PagedTableModel
 from utils import convert_to_date
 
 
@@ -46,59 +45,25 @@ class UserSettingsTab(QWidget):
 
         self.main_layout.addLayout(self.button_layout)
 
-        # 사용자 명단 테이블 추가
-        self.user_table = QTableWidget()
-        self.user_table.setColumnCount(5)
-        self.user_table.setHorizontalHeaderLabels(["선택", "ID", "이름", "마지막 조장 날짜", "출력 그룹"])
-        self.user_table.setEditTriggers(QTableWidget.NoEditTriggers)  # 기본적으로 편집 불가능
+        # 사용자 명단 테이블 추가 (스크롤할 때 필요한 만큼만 불러옴)
+        self.user_model = UserTableModel(self.db)
+        self.user_table = QTableView()
+        self.user_table.setModel(self.user_model)
+        self.user_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.user_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.user_table.setEditTriggers(QAbstractItemView.NoEditTriggers)  # 기본적으로 편집 불가능
+        self.user_table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.user_table.setSortingEnabled(True)
+        self.user_table.setColumnWidth(0, 50)
         self.main_layout.addWidget(self.user_table)
-        self.user_table.verticalHeader().setVisible(False)
 
         # 사용자 목록 불러오기
         self.load_user_data()
 
     def load_user_data(self):
-        user_data = self.db.select_users()  # 예시: DB에서 사용자 목록 불러오기
-        self.user_table.setRowCount(len(user_data))
-        self.user_table.cellClicked.connect(self.on_cell_clicked)
-        self.user_table.verticalHeader().setVisible(True)
-
-        self.radio_button_group = QButtonGroup(self.user_table)
-        self.radio_button_group.setExclusive(True)
-        for row_index, (user_id, name, enable_date, last_date, display_group) in enumerate(user_data):
-            radio_button_cell = self.create_radio_button_cell(self.radio_button_group, row_index)
-            self.user_table.setCellWidget(row_index, 0, radio_button_cell)
-
-            user_id_item = QTableWidgetItem(str(user_id))
-            self.user_table.setItem(row_index, 1, user_id_item)
-            self.user_table.setColumnWidth(1, 50)
-
-            name_item = QTableWidgetItem(name)
-            self.user_table.setItem(row_index, 2, name_item)
-
-            last_date_item = QTableWidgetItem(str(last_date or '-'))
-            self.user_table.setItem(row_index, 3, last_date_item)
-
-            display_group_item = QTableWidgetItem(str(display_group))
-            self.user_table.setItem(row_index, 4, display_group_item)
-
-    def on_cell_clicked(self, row, column):
-        # 첫 번째 열(선택 칸)인 경우 라디오 버튼 선택
-        if column == 0:
-            radio_button = self.user_table.cellWidget(row, column)
-            if radio_button:
-                radio_button.setChecked(True)
-
-    def create_radio_button_cell(self, button_group, row_index):
-        radio_button = QRadioButton()
-        radio_button.setStyleSheet("margin: auto;")
-        button_group.addButton(radio_button, row_index)
-        return radio_button
+        self.user_model.reload()
 
     def reload_users(self):
-        # 테이블의 데이터를 초기화
-        self.user_table.setRowCount(0)
-
         # 사용자 데이터를 다시 로드
         self.load_user_data()
 
@@ -106,8 +71,8 @@ class UserSettingsTab(QWidget):
         selected_row = self.get_selected_row()
         if selected_row is not None:
             user_id = self.get_user_id(selected_row)
-            name, enable_date, _, priority = list(self.db.select_user(user_id=user_id))
-            dialog = UserEditDialog(name, enable_date, priority)
+            name, enable_date, _, priority, leader_weight = list(self.db.select_user(user_id=user_id))
+            dialog = UserEditDialog(name, enable_date, priority, leader_weight)
             if dialog.exec_() == QDialog.Accepted:
                 user_input = dialog.get_user_input()
                 self.db.update_user([user_id], **user_input)
@@ -132,27 +97,48 @@ class UserSettingsTab(QWidget):
         selected_row = self.get_selected_row()
         if selected_row is not None:
             user_id = self.get_user_id(selected_row)
-            name, enable_date, last_date, priority = list(self.db.select_user(user_id=user_id))
-            self.display_user_info(name, enable_date, last_date, priority)
+            name, enable_date, last_date, priority, leader_weight = list(self.db.select_user(user_id=user_id))
+            self.display_user_info(name, enable_date, last_date, priority, leader_weight)
 
     def get_selected_row(self):
-        for row in range(self.user_table.rowCount()):
-            radio_button = self.user_table.cellWidget(row, 0)
-            if radio_button and radio_button.isChecked():
-                return row
-        return None
+        selected_rows = self.user_table.selectionModel().selectedRows()
+        return selected_rows[0].row() if selected_rows else None
 
     def get_user_id(self, row):
-        user_id_item = self.user_table.item(row, 1)
-        return user_id_item.text() if user_id_item else None
+        user = self.user_model.row_data(row)
+        return user[0] if user else None
 
     def display_user_info(self, *user_info):
         dialog = UserDetailDialog(*user_info)
         dialog.exec_()
 
 
+class UserTableModel(PagedTableModel):
+    headers = ["ID", "이름", "마지막 조장 날짜", "출력 그룹"]
+    columns = [0, 1, 3, 4]
+    sort_columns = ["id", "name", "recent_date", "priority"]
+
+    def __init__(self, db):
+        super().__init__(db)
+        self.order_by = None
+        self.descending = False
+
+    def fetch_page(self, rows, limit):
+        return self.db.select_users_page(offset=len(rows), limit=limit, order_by=self.order_by,
+                                         descending=self.descending)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # 정렬은 DB 에서 처리 (column 이 -1 이면 기본 순서)
+        order_by = self.sort_columns[column] if 0 <= column < len(self.sort_columns) else None
+        descending = order == Qt.DescendingOrder
+        if (order_by, descending) == (self.order_by, self.descending):
+            return
+        self.order_by, self.descending = order_by, descending
+        self.reload()
+
+
 class UserDetailDialog(QDialog):
-    def __init__(self, name, enable_date, last_date, priority):
+    def __init__(self, name, enable_date, last_date, priority, leader_weight=None):
         super().__init__()
 
         self.setWindowTitle("사용자 정보")
@@ -177,6 +163,10 @@ class UserDetailDialog(QDialog):
         date_label = QLabel(f"출력번호: {priority}", self)
         date_label.setAlignment(Qt.AlignLeft)
         layout.addWidget(date_label)
+
+        weight_label = QLabel(f"조장 가중치: {1.0 if leader_weight is None else leader_weight}", self)
+        weight_label.setAlignment(Qt.AlignLeft)
+        layout.addWidget(weight_label)
         layout.addStretch()
 
         self.setLayout(layout)
@@ -239,7 +229,7 @@ class UserAddDialog(QDialog):
 
 
 class UserEditDialog(QDialog):
-    def __init__(self, name, enable_date, priority):
+    def __init__(self, name, enable_date, priority, leader_weight=None):
         super().__init__()
 
         self.setWindowTitle("사용자 수정")
@@ -274,6 +264,15 @@ class UserEditDialog(QDialog):
         layout.addWidget(order_label)
         layout.addWidget(self.order_input)
 
+        # 조장 가중치 (2 는 2 배 자주, 0.5 는 절반, 0 은 조장 제외)
+        weight_label = QLabel("조장 가중치:")
+        self.weight_input = QDoubleSpinBox()
+        self.weight_input.setRange(0.0, 10.0)
+        self.weight_input.setSingleStep(0.1)
+        self.weight_input.setValue(1.0 if leader_weight is None else leader_weight)
+        layout.addWidget(weight_label)
+        layout.addWidget(self.weight_input)
+
         # 날짜 선택 도움말
         date_help_text = QLabel("※ 해당 일의 월요일이 입력됩니다.")
         date_help_text.setStyleSheet("color: gray; font-size: 10pt;")  # 스타일 지정
@@ -300,5 +299,6 @@ class UserEditDialog(QDialog):
         return {
             "name": user_name,
             "enable_date": enable_date,
-            "priority": self.order_input.value()
+            "priority": self.order_input.value(),
+            "leader_weight": self.weight_input.value()
         }
@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import load_settings  # noqa: E402
+from database import LunchSquadDB  # noqa: E402
+
+
+@pytest.fixture
+def settings_path(tmp_path):
+    # 없는 파일이면 load_settings 는 기본값을 사용
+    path = str(tmp_path / "settings.txt")
+    load_settings(path)
+    return path
+
+
+@pytest.fixture
+def db_path(tmp_path, settings_path):
+    return str(tmp_path / "lunch_squad.dat")
+
+
+@pytest.fixture
+def db(db_path):
+    database = LunchSquadDB(db_path)
+    yield database
+    database.close()
+
+
+def add_users(db, names, enable_date="2020-01-01"):
+    """현재 그룹에 사용자를 추가하고 {이름: id} 를 반환"""
+    db.insert_users([(name, enable_date, enable_date, None) for name in names])
+    db.commit()
+    return {name: user_id for user_id, name, _, _, _ in db.select_users()}
@@ -0,0 +1,99 @@
+import os
+
+import pytest
+
+from conftest import add_users
+from database import LunchSquadDB
+from exporter import export_data, export_table
+from importer import import_table
+
+USER_QUERY = "select id, name, enable_date, priority, group_id, leader_weight from users order by id"
+HISTORY_QUERY = "select group_id, date_label, date_text, team_data, leader_ids, seed from team_history order by id"
+MEMBER_QUERY = ("select b.group_id, b.date_label, a.squad_no, a.user_id, a.is_leader, a.position "
+                "from squad_member a join team_history b on a.history_id = b.id order by 1, 2, 3, 6")
+LEADER_QUERY = "select user_id, date_text from squad_leader order by 1, 2"
+LOG_QUERY = "select created_at, event, text, user_ids, payload from log"
+
+
+def select(db, query):
+    cursor = db.connect.cursor()
+    cursor.execute(query)
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+
+def test_users_export_is_scoped_to_group(db, tmp_path):
+    add_users(db, ["a", "b"])
+    db.use_group(db.insert_group("영업팀"))
+    add_users(db, ["c"])
+    path = str(tmp_path / "users.csv")
+
+    count, _ = export_table(db, "users", path)
+
+    assert count == 1
+    with open(path, encoding="utf-8") as file:
+        assert "c" in file.read().splitlines()[1].split(",")
+
+
+@pytest.mark.parametrize("file_format", ["csv", "jsonl"])
+def test_round_trip(db, tmp_path, file_format):
+    add_users(db, [f"user{x}" for x in range(12)] + ["O'Brien"])
+    sales = db.insert_group("영업팀", team_member=2)
+    db.use_group(sales)
+    add_users(db, [f"user{x}" for x in range(6)])
+    for date_text in ("2026-10-05", "2026-10-12", "2026-10-19"):
+        results = db.insert_all_groups_history(date_text, workers=1)
+        assert all(x[4] is None for x in results.values())
+    db.flush_log(force=True)
+    source_logs = set(select(db, LOG_QUERY))
+
+    output = str(tmp_path / "export")
+    files = dict()
+    for group_id in (1, sales):
+        db.use_group(group_id)
+        result = export_data(db, output_dir=os.path.join(output, str(group_id)), file_format=file_format)
+        files[group_id] = {x["table"]: x["path"] for x in result}
+
+    target = LunchSquadDB(str(tmp_path / "target.dat"))
+    try:
+        assert target.insert_group("영업팀", team_member=2) == sales
+        for group_id in (1, sales):
+            report = import_table(target, "users", files[group_id]["users"])
+            assert report.errors == []
+        report = import_table(target, "team_history", files[1]["team_history"])
+        assert report.errors == [] and report.inserted == report.total == 6
+        # target 에서 이미 기록한 로그 (app_start, group_insert 등) 와 같은 로그만 제외
+        target.flush_log(force=True)
+        target_events = {x[1] for x in select(target, LOG_QUERY)}
+        report = import_table(target, "log", files[1]["log"])
+        assert report.inserted > 0 and {x[1] for x in report.errors} <= target_events
+        target.flush_log(force=True)
+
+        for query in (USER_QUERY, HISTORY_QUERY, MEMBER_QUERY, LEADER_QUERY):
+            assert select(target, query) == select(db, query)
+        assert source_logs <= set(select(target, LOG_QUERY))
+        target.use_group(sales)
+        assert target.select_team_squads(date_text="2026-10-19") == db.select_team_squads(date_text="2026-10-19")
+
+        # 다시 가져오면 이미 있는 이력과 로그는 제외
+        for table in ("team_history", "log"):
+            report = import_table(target, table, files[1][table])
+            assert report.inserted == 0 and len(report.errors) == report.total
+    finally:
+        target.close()
+
+
+def test_incremental_rejects_date_filter(db, tmp_path):
+    add_users(db, [f"user{x}" for x in range(6)])
+    for date_text in ("2026-10-05", "2026-10-12"):
+        db.insert_all_groups_history(date_text, workers=1)
+    output = str(tmp_path / "export")
+
+    with pytest.raises(ValueError):
+        export_data(db, output_dir=output, tables=("team_history",), date_from="2026-10-12", incremental=True)
+    assert db.select_export_state("team_history") == 0
+
+    # 기간 없이 증분으로 내보내면 두 주 모두 포함
+    result = export_data(db, output_dir=output, tables=("team_history",), incremental=True)
+    assert result[0]["rows"] == 2
@@ -0,0 +1,54 @@
+import json
+
+import squad
+from conftest import add_users
+from database import LunchSquadDB
+
+
+def test_all_groups_skips_undersized_group(db):
+    add_users(db, [f"user{x}" for x in range(12)])
+    small_group = db.insert_group("소수", team_member=3)
+    db.use_group(small_group)
+    add_users(db, ["a", "b"])
+
+    results = db.insert_all_groups_history("2026-10-19", workers=1)
+
+    team_json_data, leader_ids, _, _, error = results[1]
+    assert error is None and len(leader_ids) == 4 and json.loads(team_json_data)
+    team_json_data, leader_ids, _, _, error = results[small_group]
+    assert team_json_data is None and leader_ids is None
+    assert "조장" in error
+    # 다른 그룹의 조편성은 저장됨
+    db.use_group(1)
+    assert db.select_team_squads(date_text="2026-10-19")
+
+
+def test_cli_all_groups_reports_failed_group(db_path, settings_path, capsys):
+    db = LunchSquadDB(db_path)
+    add_users(db, [f"user{x}" for x in range(12)])
+    db.use_group(db.insert_group("소수", team_member=3))
+    add_users(db, ["a", "b"])
+    db.close()
+
+    squad.main(["generate", "--all-groups", "--week", "2026-10-19", "--workers", "1", "--db", db_path,
+                "--settings", settings_path])
+
+    captured = capsys.readouterr()
+    output = json.loads(captured.out)
+    assert output["기본"]["created"] and "error" not in output["기본"]
+    assert not output["소수"]["created"] and "조장" in output["소수"]["error"]
+    assert "소수" in captured.err
+
+
+def test_clone_name_with_apostrophe(db):
+    add_users(db, ["O'Brien"] + [f"user{x}" for x in range(11)])
+    with db.transaction():
+        db.insert_team_history("2026년 10월 3주차", "2026-10-19")
+
+    with db.transaction():
+        team_json_data, leader_ids_text = db.clone_team_history("2026년 10월 4주차", "2026-10-26", "2026-10-19")
+
+    assert team_json_data == db.select_team_history(date_text="2026-10-19")[0][0]
+    cloned = db.select_team_squads(date_text="2026-10-26")
+    assert "O'Brien" in sum(cloned, [])
+    assert db.select_squad_members("2026-10-26") == db.select_squad_members("2026-10-19")
@@ -0,0 +1,34 @@
+from conftest import add_users
+from database import LunchSquadDB
+
+WEEK = "2026-10-12"
+
+
+def test_refresh_sees_commit_from_other_connection(db, db_path):
+    add_users(db, [f"user{x}" for x in range(12)])
+    # 조편성이 없는 주도 history_cache 에 보관
+    assert db.select_team_history(date_text=WEEK) == []
+    assert db.refresh() is False
+
+    other = LunchSquadDB(db_path)
+    try:
+        with other.transaction():
+            other.insert_team_history("2026년 10월 2주차", WEEK)
+    finally:
+        other.close()
+
+    # refresh() 전에는 읽어 둔 빈 주를 그대로 사용
+    assert db.select_team_history(date_text=WEEK) == []
+    assert db.refresh() is True
+    assert len(db.select_team_history(date_text=WEEK)) == 1
+    assert db.refresh() is False
+
+
+def test_refresh_ignores_own_commit(db):
+    add_users(db, [f"user{x}" for x in range(12)])
+    assert db.refresh() is False
+    with db.transaction():
+        db.insert_team_history("2026년 10월 2주차", WEEK)
+
+    assert db.refresh() is False
+    assert len(db.select_team_history(date_text=WEEK)) == 1
@@ -0,0 +1,108 @@
+import csv
+import io
+import sqlite3
+
+import pytest
+
+from conftest import add_users
+from exporter import export_table
+from importer import FileFormatError, import_users, read_yaml_rows
+
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerows(rows)
+    return str(path)
+
+
+def test_rename_and_reimport_by_id(db, tmp_path):
+    user_ids = add_users(db, ["김도윤", "이민우"])
+    path = str(tmp_path / "users.csv")
+    export_table(db, "users", path)
+    with open(path, encoding="utf-8") as file:
+        text = file.read().replace("김도윤", "김도윤 팀장")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(text)
+
+    report = import_users(db, path)
+
+    assert (report.inserted, report.updated, report.errors) == (0, 2, [])
+    names = {x[1]: x[0] for x in db.select_users()}
+    assert names == {"김도윤 팀장": user_ids["김도윤"], "이민우": user_ids["이민우"]}
+
+
+def test_import_honours_group_id(db, tmp_path):
+    sales = db.insert_group("영업팀")
+    path = write_csv(tmp_path / "users.csv", [
+        ["name", "enable_date", "last_date", "priority", "group_id"],
+        ["a", "2024-01-01", "", "", "1"],
+        ["b", "2024-01-01", "", "", str(sales)],
+        ["c", "2024-01-01", "", "", "99"],
+    ])
+
+    report = import_users(db, path)
+
+    assert report.inserted == 2 and [x[1] for x in report.errors] == ["c"]
+    assert [x[1] for x in db.select_users()] == ["a"]
+    db.use_group(sales)
+    assert [x[1] for x in db.select_users()] == ["b"]
+
+
+def test_same_name_in_other_group_is_a_new_user(db, tmp_path):
+    add_users(db, ["a"])
+    sales = db.insert_group("영업팀")
+    path = write_csv(tmp_path / "users.csv", [["name", "enable_date", "group_id"], ["a", "2024-01-01", str(sales)]])
+
+    report = import_users(db, path)
+
+    assert (report.inserted, report.updated) == (1, 0)
+
+
+def test_yaml_flow_and_block_style(db, tmp_path):
+    path = tmp_path / "users.txt"
+    path.write_text("# name: ['enable_date', 'last_date', display_group]\n"
+                    "user1: ['2024-12-02', '2024-01-01', 100]\n"
+                    "user2:\n"
+                    "  - '2024-12-02'\n"
+                    "  - '2024-01-01'\n"
+                    "  - 200\n", encoding="utf-8")
+
+    report = import_users(db, str(path))
+
+    assert (report.inserted, report.errors) == (2, [])
+    assert {x[1]: x[4] for x in db.select_users()} == {"user1": 100, "user2": 200}
+
+
+def test_yaml_errors_have_line_numbers(db, tmp_path):
+    path = tmp_path / "users.txt"
+    path.write_text("user1: ['2024-12-02', '2024-01-01', 100]\nuser2: ['2024-13-02']\nuser3: [\n", encoding="utf-8")
+
+    report = import_users(db, str(path))
+
+    assert report.inserted == 0
+    assert [x[0] for x in report.sorted_errors()] == [4]
+    path.write_text("user1: ['2024-12-02', '2024-01-01', 100]\nuser2: ['2024-13-02']\n", encoding="utf-8")
+    report = import_users(db, str(path))
+    assert report.inserted == 1 and [(x[0], x[1]) for x in report.errors] == [(2, "user2")]
+
+
+def test_yaml_is_read_one_entry_at_a_time():
+    rows = read_yaml_rows(io.StringIO("user1: ['2024-12-02']\nuser2: ['2024-12-02']\nuser3: [\n"))
+
+    # 파일 끝의 문법 오류보다 앞의 항목을 먼저 반환
+    assert next(rows) == (1, {"name": "user1", "enable_date": "2024-12-02"})
+    assert next(rows)[0] == 2
+    with pytest.raises(FileFormatError):
+        next(rows)
+
+
+def test_chunk_larger_than_variable_limit(db, tmp_path):
+    add_users(db, ["user0"])
+    db.connect.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+    path = write_csv(tmp_path / "users.csv", [["name", "enable_date"]] +
+                     [[f"user{x}", "2024-01-01"] for x in range(1200)])
+
+    report = import_users(db, path, chunk_size=2000)
+
+    assert (report.inserted, report.updated, report.errors) == (1199, 1, [])
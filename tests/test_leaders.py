@@ -0,0 +1,53 @@
+import random
+
+from leaders import LeaderQueue, effective_weights
+
+WEEK = "2026-10-19"
+
+
+def user(user_id, recent_date, enable_date="2025-01-06"):
+    return user_id, f"user{user_id}", enable_date, recent_date, None
+
+
+def pop_all(users, leader_weights=None, seed=0, leader_cycle=3):
+    queue = LeaderQueue.from_users(users, WEEK, leader_cycle, leader_weights=leader_weights, rng=random.Random(seed))
+    return queue.pop(len(queue))
+
+
+def test_longest_wait_first_within_tier():
+    # 모두 1 순위 (3 주 이상), 오래 기다린 순서대로
+    users = [user(1, "2026-09-28"), user(2, "2025-11-03"), user(3, "2026-07-06")]
+    for seed in range(20):
+        assert pop_all(users, seed=seed) == [2, 3, 1]
+
+
+def test_tier_caps_weighted_wait():
+    # 2 주 전에 조장을 한 사용자는 가중치가 커도 3 주 이상 기다린 사용자보다 뒤 (가중치 2 x 2 주 = 4 주)
+    users = [user(1, "2026-10-05"), user(2, "2026-09-28"), user(3, "2026-10-12")]
+    assert pop_all(users, leader_weights={1: 2.0}) == [1, 2, 3]
+    assert pop_all(users, leader_weights={1: 1.0}) == [2, 1, 3]
+
+
+def test_weight_scales_wait():
+    users = [user(1, "2026-07-06"), user(2, "2026-04-06")]
+    assert pop_all(users) == [2, 1]
+    # 15 주 x 2 = 30 주 > 28 주
+    assert pop_all(users, leader_weights={1: 2.0}) == [1, 2]
+
+
+def test_weight_zero_and_not_enabled_are_excluded():
+    users = [user(1, None), user(2, "2026-09-28"), user(3, None, enable_date="2026-10-19")]
+    assert pop_all(users, leader_weights={1: 0}) == [2]
+
+
+def test_new_leader_weight_orders_never_led_users():
+    # 한 번도 하지 않은 사용자는 조장 가능해진 날부터 기다린 주 (2025-01-06 부터 93 주)
+    users = [user(1, None), user(2, "2024-01-01")]
+    assert pop_all(users, leader_weights=effective_weights(users)) == [2, 1]
+    assert pop_all(users, leader_weights=effective_weights(users, new_leader_weight=2.0)) == [1, 2]
+    assert pop_all(users, leader_weights=effective_weights(users, new_leader_weight=0)) == [2]
+
+
+def test_equal_waits_are_random():
+    users = [user(x, "2026-09-28") for x in range(1, 6)]
+    assert len({tuple(pop_all(users, seed=seed)) for seed in range(20)}) > 1
@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from config import Cache
+from conftest import add_users
+from engine import assign_squad, week_label
+from optimizer import optimize_squad
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_best_seed_replays_with_assign_squad(db, workers):
+    add_users(db, [f"user{x}" for x in range(20)])
+    users = db.select_generation_users(db.group_id)
+
+    squad, leader_ids, unsatisfied, seed, _ = optimize_squad(users, "2026-10-19", 4, 3, starts=4, time_budget=60,
+                                                             workers=workers, base_seed=7)
+
+    assert (squad, leader_ids, unsatisfied) == assign_squad(users, "2026-10-19", 4, 3, rng=random.Random(seed))
+
+
+def test_same_base_seed_same_result_in_process_and_pool(db):
+    add_users(db, [f"user{x}" for x in range(20)])
+    users = db.select_generation_users(db.group_id)
+
+    results = [optimize_squad(users, "2026-10-19", 4, 3, starts=4, time_budget=60, workers=x, base_seed=7)
+               for x in (1, 2)]
+
+    assert results[0] == results[1]
+
+
+def test_stored_seed_regenerates_same_week(db):
+    add_users(db, [f"user{x}" for x in range(20)])
+    Cache.optimize_starts, Cache.optimize_workers = 4, 1
+    date_label = "2026년 10월 3주차"
+    team_json_data, _ = db.insert_team_history(date_label, "2026-10-19", optimize=True)
+    seed = db.select_team_seed(date_label)
+
+    db.delete_team_history(date_label)
+    replayed, _ = db.insert_team_history(date_label, "2026-10-19", seed=seed)
+
+    assert replayed == team_json_data and db.select_team_seed(date_label) == seed
+
+
+def generate_weeks(db, weeks):
+    for date_text in weeks:
+        db.insert_team_history(week_label(date_text), date_text)
+
+
+def test_older_week_replays_after_later_weeks(db):
+    add_users(db, [f"user{x}" for x in range(16)])
+    generate_weeks(db, ["2026-10-05", "2026-10-12", "2026-10-19", "2026-10-26"])
+    date_label = week_label("2026-10-05")
+    team_json_data, _ = db.insert_team_history(date_label, "2026-10-05")
+    seed = db.select_team_seed(date_label)
+
+    db.delete_team_history(date_label)
+    replayed, _ = db.insert_team_history(date_label, "2026-10-05", seed=seed)
+
+    assert replayed == team_json_data
+
+
+def test_replay_team_does_not_change_history(db):
+    add_users(db, [f"user{x}" for x in range(16)])
+    generate_weeks(db, ["2026-10-05", "2026-10-12", "2026-10-19"])
+    before = db.select_squad_members("2026-10-05")
+
+    seed, stored, replayed = db.replay_team("2026-10-07")
+
+    assert seed == db.select_team_seed(week_label("2026-10-05"))
+    assert stored == replayed
+    assert db.select_squad_members("2026-10-05") == before
+
+
+def test_replay_team_without_seed(db):
+    add_users(db, [f"user{x}" for x in range(16)])
+    generate_weeks(db, ["2026-10-05"])
+    db.clone_team_history(week_label("2026-10-12"), "2026-10-12", clone_data="2026-10-05")
+
+    with pytest.raises(ValueError):
+        db.replay_team("2026-10-12")
@@ -0,0 +1,46 @@
+import random
+
+import pairs
+from conftest import add_users
+from pairs import PairMatrix
+
+
+def test_add_and_remove_week():
+    matrix = PairMatrix([1, 2, 3, 4])
+    matrix.add_week("2026-10-12", [[1, 2], [3, 4]])
+    matrix.add_week("2026-10-19", [[1, 2], [3, None]])
+
+    assert matrix.counts[0, 1] == 2 and matrix.counts[2, 3] == 1
+    assert matrix.counts.diagonal().sum() == 0
+    assert matrix.score([[1, 2], [3, 4]]) == 3
+
+    matrix.remove_week("2026-10-12")
+    assert matrix.score([[1, 2], [3, 4]]) == 1
+    # 같은 주를 다시 더하면 이전 조편성을 빼고 더함
+    matrix.add_week("2026-10-19", [[1, 3], [2, 4]])
+    assert matrix.score([[1, 2], [3, 4]]) == 0 and matrix.score([[1, 3], [2, 4]]) == 2
+
+
+def test_improve_reduces_repeat_pairs():
+    user_ids = list(range(1, 17))
+    matrix = PairMatrix(user_ids)
+    squads = [[1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11, 12], [13, 14, 15, 16]]
+    matrix.add_week("2026-10-12", squads)
+
+    squads = [list(x) for x in squads]
+    before = matrix.score(squads)
+    matrix.improve(squads, rng=random.Random(1))
+
+    assert matrix.score(squads) < before
+    # 조장(첫 번째) 자리는 그대로, 사용자는 빠지거나 중복되지 않음
+    assert [x[0] for x in squads] == [1, 5, 9, 13]
+    assert sorted(sum(squads, [])) == user_ids
+
+
+def test_pair_matrix_skipped_above_max_users(db, monkeypatch):
+    user_ids = list(add_users(db, [f"user{x}" for x in range(6)]).values())
+    assert db.select_pair_matrix("2026-10-19", user_ids) is not None
+
+    monkeypatch.setattr(pairs, "MAX_USERS", 5)
+    db.pair_matrix = None
+    assert db.select_pair_matrix("2026-10-19", user_ids) is None
@@ -0,0 +1,94 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import add_users
+from database import LunchSquadDB
+from engine import week_start
+
+pytest.importorskip("bottle")
+pytest.importorskip("gevent")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOKEN = "secret"
+# 지난 주 조편성은 삭제할 수 없으므로 다음 주
+WEEK = week_start((datetime.now() + timedelta(weeks=1)).strftime("%Y-%m-%d"))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def request(url, method="GET", headers=None):
+    """(상태 코드, 헤더, 본문) 을 반환 (4xx, 304 도 예외 없이)"""
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, method=method, headers=headers or {})) as res:
+            return res.status, res.headers, res.read().decode("utf-8")
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read().decode("utf-8")
+
+
+@pytest.fixture
+def server_url(db_path, settings_path):
+    # server 는 import 할 때 gevent monkey.patch_all() 을 실행하므로 별도 프로세스에서 실행
+    db = LunchSquadDB(db_path)
+    add_users(db, [f"user{x}" for x in range(12)])
+    db.close()
+
+    port = free_port()
+    process = subprocess.Popen([sys.executable, "-m", "server", "--db", db_path, "--settings", settings_path,
+                                "--port", str(port), "--token", TOKEN, "--pool-size", "2"],
+                               cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 20
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    pytest.fail(f"서버가 시작되지 않았습니다.\n{process.stderr.read().decode('utf-8')}")
+                time.sleep(0.1)
+        yield url
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def test_write_requires_token(server_url):
+    status, _, _ = request(f"{server_url}/api/weeks/{WEEK}/generate", method="POST")
+    assert status == 401
+    status, _, _ = request(f"{server_url}/api/weeks/{WEEK}/generate", method="POST",
+                           headers={"Authorization": "Bearer wrong"})
+    assert status == 401
+
+
+def test_week_etag(server_url):
+    status, _, body = request(f"{server_url}/api/weeks/{WEEK}/generate", method="POST",
+                              headers={"Authorization": f"Bearer {TOKEN}"})
+    assert status == 201 and json.loads(body)["created"]
+
+    status, headers, body = request(f"{server_url}/api/weeks/{WEEK}")
+    etag = headers["ETag"]
+    assert status == 200 and json.loads(body)["squads"] and etag
+
+    status, _, body = request(f"{server_url}/api/weeks/{WEEK}", headers={"If-None-Match": etag})
+    assert status == 304 and body == ""
+
+    # 조편성이 바뀌면 (삭제) 같은 ETag 로도 본문을 다시 받음
+    status, _, _ = request(f"{server_url}/api/weeks/{WEEK}", method="DELETE",
+                           headers={"Authorization": f"Bearer {TOKEN}"})
+    assert status == 200
+    status, headers, body = request(f"{server_url}/api/weeks/{WEEK}", headers={"If-None-Match": etag})
+    assert status == 200 and headers["ETag"] != etag and json.loads(body)["squads"] == []
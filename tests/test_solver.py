@@ -0,0 +1,64 @@
+import random
+
+from solver import RULE_APART, RULE_TOGETHER, SquadSolver
+
+
+def squad_of(squads, user_id):
+    return next(index for index, squad in enumerate(squads) if user_id in squad)
+
+
+def solve(squads, rules, seed=1, priorities=None):
+    squads = [list(x) for x in squads]
+    unsatisfied = SquadSolver(squads, rules, priorities=priorities, rng=random.Random(seed)).solve()
+    return squads, unsatisfied
+
+
+def test_apart_rule_is_repaired():
+    rules = [(1, RULE_APART, 2, 3), (2, RULE_APART, 6, 7)]
+    squads, unsatisfied = solve([[1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11, 12]], rules)
+
+    assert unsatisfied == []
+    assert squad_of(squads, 2) != squad_of(squads, 3) and squad_of(squads, 6) != squad_of(squads, 7)
+    # 사용자는 빠지거나 중복되지 않음
+    assert sorted(sum(squads, [])) == list(range(1, 13))
+
+
+def test_together_rules_are_grouped():
+    # 2-7, 7-11 로 이어진 세 명은 한 조로 모음
+    rules = [(1, RULE_TOGETHER, 2, 7), (2, RULE_TOGETHER, 7, 11), (3, RULE_APART, 2, 6)]
+    squads, unsatisfied = solve([[1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11, 12]], rules)
+
+    assert unsatisfied == []
+    assert squad_of(squads, 2) == squad_of(squads, 7) == squad_of(squads, 11)
+    assert squad_of(squads, 2) != squad_of(squads, 6)
+
+
+def test_leaders_stay_fixed():
+    # 조장과 같은 조 배정이면 조원을 조장의 조로 옮김, 빈 자리(None)도 움직이지 않음
+    rules = [(1, RULE_TOGETHER, 2, 5), (2, RULE_APART, 9, 3)]
+    squads, unsatisfied = solve([[1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11, None]], rules)
+
+    assert unsatisfied == []
+    assert [x[0] for x in squads] == [1, 5, 9] and squads[2][3] is None
+    assert squad_of(squads, 2) == 1 and squad_of(squads, 3) != 2
+
+
+def test_unsatisfiable_rules_are_reported():
+    rules = [
+        (1, RULE_TOGETHER, 1, 5),  # 서로 다른 조의 조장은 같은 조가 될 수 없음
+        (2, RULE_APART, 1, 2),  # 나머지는 만족
+        (3, RULE_APART, 2, 99),  # 이번 주 편성 대상이 아닌 사용자는 제외
+    ]
+    squads, unsatisfied = solve([[1, 2, 3], [5, 6, 7]], rules)
+
+    assert unsatisfied == [rules[0]]
+    assert [x[0] for x in squads] == [1, 5] and squad_of(squads, 2) == 1
+
+
+def test_too_many_together_for_one_squad():
+    # 세 명을 묶어도 조원 자리는 두 개뿐이므로 하나 이상의 규칙이 남음
+    rules = [(1, RULE_TOGETHER, 2, 3), (2, RULE_TOGETHER, 3, 6), (3, RULE_TOGETHER, 6, 7)]
+    squads, unsatisfied = solve([[1, 2, 3], [5, 6, 7]], rules)
+
+    assert unsatisfied and set(unsatisfied) <= set(rules)
+    assert [x[0] for x in squads] == [1, 5] and sorted(sum(squads, [])) == [1, 2, 3, 5, 6, 7]
@@ -0,0 +1,48 @@
+from conftest import add_users
+from database import LunchSquadDB
+from engine import week_label
+
+
+def leader_dates(db):
+    return {x[1]: x[3] for x in db.select_users_page(limit=1000)}
+
+
+def test_leader_date_follows_history(db):
+    add_users(db, [f"user{x}" for x in range(12)])
+    for date_text in ("2026-10-12", "2026-10-19"):
+        db.insert_team_history(week_label(date_text), date_text)
+    assert leader_dates(db) == {x[1]: x[3] for x in db.select_users()}
+
+    db.delete_team_history(week_label("2026-10-19"))
+    assert leader_dates(db) == {x[1]: x[3] for x in db.select_users()}
+
+
+def test_page_sorted_by_recent_date(db):
+    add_users(db, [f"user{x}" for x in range(12)])
+    db.insert_team_history(week_label("2026-10-19"), "2026-10-19")
+
+    pages = [db.select_users_page(offset=offset, limit=5, order_by="recent_date", descending=True)
+             for offset in (0, 5, 10)]
+    rows = [x for page in pages for x in page]
+    expected = sorted(db.select_users(), key=lambda x: (x[3] or "", x[0]), reverse=True)
+    assert [x[0] for x in rows] == [x[0] for x in expected]
+
+
+def test_leader_date_backfilled_on_upgrade(db_path):
+    db = LunchSquadDB(db_path)
+    add_users(db, [f"user{x}" for x in range(12)])
+    db.insert_team_history(week_label("2026-10-19"), "2026-10-19")
+    expected = leader_dates(db)
+    # 컬럼이 없던 이전 버전의 파일
+    for trigger in ("trg_users_insert", "trg_squad_leader_insert", "trg_squad_leader_delete"):
+        db.connect.execute(f"DROP TRIGGER {trigger}")
+    db.connect.execute("DROP INDEX idx_users_group_leader_date")
+    db.connect.execute("ALTER TABLE users DROP COLUMN leader_date")
+    db.connect.execute("PRAGMA user_version = 3")
+    db.close()
+
+    db = LunchSquadDB(db_path)
+    try:
+        assert leader_dates(db) == expected
+    finally:
+        db.close()
@@ -1,5 +1,3 @@
-from dataclasses import dataclass
-
 from PyQt5.QtWidgets import QMessageBox
 
 
@@ -14,10 +12,3 @@ def show_dialog(title, content):
     msg.setText(content)
     msg.setStandardButtons(QMessageBox.Ok)
     msg.exec_()
-
-
-@dataclass
-class Cache:
-    team_member: int
-    leader_display_row: int
-    leader_cycle: int